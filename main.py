@@ -1,69 +1,267 @@
-import time
-import random
-from src.config.config import MODELOS_BUSQUEDA, SITIOS_HABILITADOS
-from src.utils.utils import fetch_page, get_headers
-from src.database.database import crear_tabla, guardar_en_db, obtener_historial_precios
+import asyncio
+import sys
+from datetime import datetime
+from src.config.config import (
+    MODELOS_BUSQUEDA,
+    SITIOS_HABILITADOS,
+    NAVEGADOR_POR_SITIO,
+    ARCHIVAR_HTML,
+    MAX_PRODUCTOS_POR_PAGINA,
+    PARSEO_EN_PROCESOS,
+    RETENER_PRODUCTOS
+)
+from src.database.database import crear_tabla, guardar_lote_en_db, obtener_historial_precios
 from src.utils.alerts import enviar_alertas
+from src.utils.pipeline import ejecutar_pipeline
+from src.utils.archive import archivo_html
+from src.utils.utils import fetch_por_trozos
+from src.utils.parse_pool import pool_parseo
+from src.utils.browser_pool import pool_selenium
+from src.utils.batch import LoteProductos
+from src.utils.filters import filtrar_pagina
 
 # Importación de scrapers según configuración
-from src.scrapers.amazon_scraper import scrape_amazon_page
-from src.scrapers.mercadolibre_scraper import scrape_mercadolibre_page
+from src.scrapers.base_scraper import scrape_incremental
+from src.scrapers.amazon_scraper import scrape_amazon_page, ESPECIFICACION_AMAZON_COMPILADA
+from src.scrapers.mercadolibre_scraper import scrape_mercadolibre_page, ESPECIFICACION_MERCADOLIBRE_COMPILADA
+from src.scrapers.newegg_scraper import scrape_newegg_page, ESPECIFICACION_NEWEGG_COMPILADA
+from src.scrapers.bestbuy_scraper import scrape_bestbuy_page, ESPECIFICACION_BESTBUY_COMPILADA
+from src.scrapers.aliexpress_scraper import scrape_aliexpress_page, ESPECIFICACION_ALIEXPRESS_COMPILADA
 
-def ejecutar_scraper():
-    """
-    Ejecuta el proceso de scraping y almacena los datos en la base de datos.
-    Se puede llamar desde Flask o ejecutarlo manualmente.
+# Mapa de funciones de scraping por sitio ('especificacion' la usa el scraping incremental)
+SCRAPERS = {
+    'amazon': {'func': scrape_amazon_page, 'especificacion': ESPECIFICACION_AMAZON_COMPILADA,
+               'url_template': "https://www.amazon.com.mx/s?k=rtx+{}"},
+    'mercadolibre': {'func': scrape_mercadolibre_page, 'especificacion': ESPECIFICACION_MERCADOLIBRE_COMPILADA,
+                     'url_template': "https://listado.mercadolibre.com.mx/rtx-{}"},
+    'newegg': {'func': scrape_newegg_page, 'especificacion': ESPECIFICACION_NEWEGG_COMPILADA,
+               'url_template': "https://www.newegg.com/p/pl?d=rtx+{}"},
+    'bestbuy': {'func': scrape_bestbuy_page, 'especificacion': ESPECIFICACION_BESTBUY_COMPILADA,
+                'url_template': "https://www.bestbuy.com.mx/c/videocards/buscar/rtx+{}"},
+    'aliexpress': {'func': scrape_aliexpress_page, 'especificacion': ESPECIFICACION_ALIEXPRESS_COMPILADA,
+                   'url_template': "https://es.aliexpress.com/wholesale?SearchText=rtx+{}"}
+}
+
+def construir_busquedas():
     """
-    crear_tabla()
-    todos_productos = []
+    Genera la lista de búsquedas (sitio, modelo, URL y parser) para los sitios habilitados.
 
-    # Mapa de funciones de scraping por sitio
-    scrapers = {
-        'amazon': {'func': scrape_amazon_page, 'url_template': "https://www.amazon.com.mx/s?k=rtx+{}"},
-        'mercadolibre': {'func': scrape_mercadolibre_page, 'url_template': "https://listado.mercadolibre.com.mx/rtx-{}"}
-    }
-    
+    Returns:
+        list: Lista de diccionarios con las claves 'sitio', 'modelo', 'url' y 'parser'
+    """
+    busquedas = []
     for sitio in SITIOS_HABILITADOS:
-        if sitio not in scrapers:
+        if sitio not in SCRAPERS:
             print(f"⚠️ Sitio {sitio} no implementado. Omitiendo...")
             continue
-            
+
+        scraper_info = SCRAPERS[sitio]
         for modelo in MODELOS_BUSQUEDA:
-            scraper_info = scrapers[sitio]
-            print(f"🔍 Buscando RTX {modelo} en {sitio.capitalize()}...")
-            
-            url = scraper_info['url_template'].format(modelo)
-            html_content = fetch_page(url)
-
-            if html_content:
-                productos = scraper_info['func'](html_content)
-                
-                for producto in productos:
-                    try:
-                        # Obtener historial de precios y desempaquetar la tupla
-                        historial_precios, info_producto = obtener_historial_precios(producto['id_producto'], limite=2)
-                        
-                        # Verificar si hay suficiente historial
-                        if historial_precios and len(historial_precios) >= 2:
-                            precio_anterior = historial_precios[1]['precio']
-                            # Enviar alertas si es necesario
-                            enviar_alertas(producto, precio_anterior)
-                        else:
-                            print(f"ℹ️ Primer registro o sin historial para el producto {producto.get('nombre', 'Nombre desconocido')} ({producto.get('id_producto', 'ID desconocido')})")
-                    except Exception as e:
-                        print(f"❌ Error procesando historial del producto {producto.get('id_producto', 'ID desconocido')}: {str(e)}")
-                        continue
-                
-                # Guardar productos en la base de datos
-                guardar_en_db(productos)
-                todos_productos.extend(productos)
-                
-                # Delay aleatorio entre peticiones
-                time.sleep(random.uniform(2, 5))
-                
+            busquedas.append({
+                'sitio': sitio,
+                'modelo': modelo,
+                'url': scraper_info['url_template'].format(modelo),
+                'parser': scraper_info['func']
+            })
+    return busquedas
+
+def alertar_productos(productos):
+    """
+    Revisa el historial de cada producto y envía alertas si bajó de precio.
+    Se llama antes de guardar la página, así que el historial aún no la incluye.
+
+    Args:
+        productos (list): Lista de productos de una página
+    """
+    for producto in productos:
+        try:
+            # Obtener historial de precios y desempaquetar la tupla
+            historial_precios, info_producto = obtener_historial_precios(producto['id_producto'], limite=2)
+
+            # Verificar si hay suficiente historial
+            if historial_precios and len(historial_precios) >= 2:
+                precio_anterior = historial_precios[1]['precio']
+                # Enviar alertas si es necesario
+                enviar_alertas(producto, precio_anterior)
+            else:
+                print(f"ℹ️ Primer registro o sin historial para el producto {producto.get('nombre', 'Nombre desconocido')} ({producto.get('id_producto', 'ID desconocido')})")
+        except Exception as e:
+            print(f"❌ Error procesando historial del producto {producto.get('id_producto', 'ID desconocido')}: {str(e)}")
+            continue
+
+def guardar_productos(productos, fecha=None):
+    """
+    Guarda los productos de una página en la base de datos (inserción masiva del lote columnar).
+
+    Args:
+        productos (list): Lista de productos de una página
+        fecha (datetime, opcional): Fecha de la captura de la página; por defecto, la actual
+    """
+    guardar_lote_en_db(LoteProductos.desde_productos(productos), fecha)
+
+def procesar_productos(productos, fecha=None):
+    """
+    Revisa el historial de cada producto para enviar alertas y guarda los productos en la base de datos.
+
+    Args:
+        productos (list): Lista de diccionarios de productos de una página
+        fecha (datetime, opcional): Fecha de la captura de la página; por defecto, la actual
+    """
+    alertar_productos(productos)
+    guardar_productos(productos, fecha)
+
+def extraer_pagina(busqueda, html_content, productos=None):
+    """
+    Archiva una página descargada, extrae sus productos y les aplica los filtros posteriores
+    al parseo sobre el lote de la página (sin alertas ni base de datos).
+
+    Args:
+        busqueda (dict): Búsqueda a la que pertenece la página
+        html_content (bytes | str): Contenido HTML de la página (lo decodifica el parser)
+        productos (list, opcional): Productos ya extraídos en el pool de parseo; si no se
+            indican, la página se parsea aquí
+
+    Returns:
+        list: Productos de la página que pasan los filtros
+    """
+    # Archivar la página original (solo en corridas con red, no al reproducir)
+    if busqueda.get('corrida'):
+        try:
+            archivo_html.guardar(busqueda['corrida'], busqueda['sitio'], busqueda['modelo'], busqueda['url'], html_content)
+        except Exception as e:
+            print(f"⚠️ No se pudo archivar la página {busqueda['url']}: {e}")
+
+    if productos is None:
+        productos = busqueda['parser'](html_content)
+    return filtrar_pagina(productos, busqueda['sitio'])
+
+def procesar_pagina(busqueda, html_content, productos=None, fecha=None):
+    """
+    Extrae los productos de una página descargada y los procesa.
+    Se usa al reproducir corridas archivadas (la corrida normal pasa por ejecutar_pipeline).
+
+    Args:
+        busqueda (dict): Búsqueda a la que pertenece la página
+        html_content (bytes | str): Contenido HTML de la página (lo decodifica el parser)
+        productos (list, opcional): Productos ya extraídos en el pool de parseo; si no se
+            indican, la página se parsea aquí
+        fecha (datetime, opcional): Fecha de la captura de la página; por defecto, la actual
+
+    Returns:
+        list: Productos extraídos de la página
+    """
+    productos = extraer_pagina(busqueda, html_content, productos)
+    procesar_productos(productos, fecha)
+    return productos
+
+def buscar_incremental(sitio, modelo, max_productos=MAX_PRODUCTOS_POR_PAGINA, usar_cache=True):
+    """
+    Busca un modelo en un sitio y entrega los productos de la primera página de resultados
+    a medida que se descarga, sin esperar la página completa. La descarga se corta al
+    terminar la lista de resultados, al alcanzar max_productos o si se deja de consumir el
+    generador. Los productos no se guardan en la base de datos (ver procesar_productos).
+
+    Args:
+        sitio (str): Sitio a consultar (ej: 'amazon')
+        modelo (str): Modelo a buscar (ej: '4070')
+        max_productos (int, opcional): Número máximo de productos; None para toda la página
+        usar_cache (bool): Si es False, se ignora la caché de respuestas HTTP
+
+    Yields:
+        dict: Producto filtrado
+    """
+    scraper_info = SCRAPERS[sitio]
+    url = scraper_info['url_template'].format(modelo)
+    print(f"🔍 Buscando RTX {modelo} en {sitio.capitalize()} (incremental)...")
+    yield from scrape_incremental(
+        fetch_por_trozos(url, usar_cache=usar_cache), sitio, scraper_info['especificacion'], max_productos
+    )
+
+def ejecutar_scraper(usar_cache=True, retener=RETENER_PRODUCTOS):
+    """
+    Ejecuta el proceso de scraping y almacena los datos en la base de datos.
+    Todas las búsquedas (sitio × modelo) se descargan de forma concurrente y cada página
+    pasa por las etapas de parseo, alertas y guardado (ver ejecutar_pipeline).
+    Se puede llamar desde Flask o ejecutarlo manualmente.
+
+    Args:
+        usar_cache (bool): Si es False, se descargan todas las páginas ignorando la caché HTTP
+        retener (bool): Si es False, no se juntan los productos de la corrida (memoria constante)
+
+    Returns:
+        list | int: Productos de la corrida, o el número de productos procesados si retener es False
+    """
+    crear_tabla()
+
+    busquedas = construir_busquedas()
+    if ARCHIVAR_HTML:
+        corrida = archivo_html.nueva_corrida()
+        print(f"🗄️ Archivando páginas de la corrida {corrida}")
+        for busqueda in busquedas:
+            busqueda['corrida'] = corrida
+
+    if any(NAVEGADOR_POR_SITIO.get(sitio) == 'selenium' for sitio in SITIOS_HABILITADOS):
+        # Chrome y el driver se preparan antes de que la primera página los necesite
+        try:
+            pool_selenium.calentar()
+        except Exception as e:
+            print(f"⚠️ No se pudieron lanzar los navegadores Selenium por adelantado: {e}")
+
+    todos_productos = asyncio.run(
+        ejecutar_pipeline(busquedas, extraer_pagina, alertar_productos, guardar_productos,
+                          usar_cache=usar_cache, retener=retener,
+                          pool_parseo=pool_parseo if PARSEO_EN_PROCESOS else None)
+    )
+
     print("✅ Scraping completado y datos almacenados en la base de datos.")
     return todos_productos
 
+def reproducir_corrida(corrida=None):
+    """
+    Vuelve a procesar las páginas archivadas de una corrida sin acceder a la red:
+    parsers, filtros, base de datos y alertas se ejecutan igual que en una corrida normal.
+    Los precios se guardan con la fecha en que se descargó cada página, no con la de la
+    reproducción, para que el historial no registre precios viejos como actuales.
+
+    Args:
+        corrida (str, opcional): Identificador de la corrida; por defecto la más reciente
+
+    Returns:
+        list: Productos extraídos de las páginas archivadas
+    """
+    crear_tabla()
+
+    paginas = archivo_html.paginas(corrida)
+    if not paginas:
+        print(f"⚠️ No hay páginas archivadas{' para la corrida ' + corrida if corrida else ''}.")
+        return []
+
+    print(f"🗄️ Reproduciendo {len(paginas)} páginas de la corrida {paginas[0]['corrida']}")
+    todos_productos = []
+    for pagina in paginas:
+        if pagina['sitio'] not in SCRAPERS:
+            print(f"⚠️ Sitio {pagina['sitio']} no implementado. Omitiendo...")
+            continue
+
+        busqueda = {
+            'sitio': pagina['sitio'],
+            'modelo': pagina['modelo'],
+            'url': pagina['url'],
+            'parser': SCRAPERS[pagina['sitio']]['func']
+        }
+        try:
+            todos_productos.extend(procesar_pagina(busqueda, archivo_html.leer(pagina['hash']),
+                                                   fecha=datetime.fromisoformat(pagina['fecha'])))
+        except Exception as e:
+            print(f"❌ Error procesando {pagina['url']}: {e}")
+
+    print("✅ Reproducción completada y datos almacenados en la base de datos.")
+    return todos_productos
+
 # Si se ejecuta directamente este archivo, correrá el scraper
+# (python main.py --reproducir [corrida] re-procesa una corrida archivada sin red)
 if __name__ == "__main__":
-    ejecutar_scraper()
+    if len(sys.argv) > 1 and sys.argv[1] == "--reproducir":
+        reproducir_corrida(sys.argv[2] if len(sys.argv) > 2 else None)
+    else:
+        ejecutar_scraper()
@@ -3,8 +3,18 @@ import sqlite3
 import psycopg2
 import pymongo
 from datetime import datetime
+import numpy as np
 from src.config.config import DATABASE_TYPE, DATABASE_NAME, POSTGRES_CONFIG, MONGODB_CONFIG, PALABRAS_PROHIBIDAS
 import os
+from src.utils.filters import DetectorPalabras
+from src.utils.product import fila_producto
+from src.utils.batch import LoteProductos
+
+# Palabras prohibidas de la configuración, compiladas una sola vez
+detector_prohibidas = DetectorPalabras({'prohibidas': PALABRAS_PROHIBIDAS})
+
+# Máximo de ids por consulta IN (SQLite admite 999 parámetros en versiones antiguas)
+MAX_PARAMETROS_CONSULTA = 900
 
 def get_db_connection():
     """
@@ -125,7 +135,7 @@ def crear_tabla():
     if db_type != "mongodb":
         conn.close()
 
-def guardar_en_db(productos):
+def guardar_en_db(productos, fecha=None):
     """
     Guarda productos en la base de datos, evitando duplicados.
     Si un producto ya existe:
@@ -133,10 +143,12 @@ def guardar_en_db(productos):
       - Añade un nuevo registro en la tabla 'historial_precios'
     
     Args:
-        productos (list): Lista de diccionarios con información de productos
+        productos (list): Lista de productos (Producto o diccionarios con los mismos campos)
+        fecha (datetime, opcional): Fecha en que se capturaron los precios; por defecto, la
+            actual (al reproducir una corrida archivada, la de la descarga de la página)
     """
     conn, db_type = get_db_connection()
-    fecha_actual = datetime.now()
+    fecha_actual = fecha or datetime.now()
     
     if db_type == "mongodb":
         # MongoDB
@@ -172,8 +184,7 @@ def guardar_en_db(productos):
                     historial_collection.insert_one(historial)
             else:
                 # Insertar nuevo producto
-                producto["fecha"] = fecha_actual
-                productos_collection.insert_one(producto)
+                productos_collection.insert_one(dict(producto, fecha=fecha_actual))
                 
                 # Guardar primer registro en historial
                 historial_collection.insert_one(historial)
@@ -208,11 +219,7 @@ def guardar_en_db(productos):
                 cursor.execute('''
                     INSERT INTO productos (tienda, modelo, nombre, precio, fecha, vendedor, link, imagen, id_producto)
                     VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    producto["tienda"], producto["modelo"], producto["nombre"],
-                    producto["precio"], fecha_str, producto["vendedor"], 
-                    producto["link"], producto["imagen"], producto["id_producto"]
-                ))
+                ''', fila_producto(producto, fecha_str))
                 
                 # Obtener el ID del producto recién insertado
                 if db_type == "postgresql":
@@ -233,6 +240,100 @@ def guardar_en_db(productos):
     if db_type != "mongodb":
         conn.close()
 
+def _ids_existentes(cursor, ids):
+    """
+    Busca en bloques los productos ya guardados.
+    
+    Returns:
+        dict: id_producto → (id, precio)
+    """
+    existentes = {}
+    for inicio in range(0, len(ids), MAX_PARAMETROS_CONSULTA):
+        bloque = ids[inicio:inicio + MAX_PARAMETROS_CONSULTA]
+        cursor.execute(
+            f"SELECT id_producto, id, precio FROM productos WHERE id_producto IN ({', '.join('?' * len(bloque))})",
+            bloque
+        )
+        existentes.update((id_producto, (producto_id, precio)) for id_producto, producto_id, precio in cursor.fetchall())
+    return existentes
+
+def guardar_lote_en_db(lote, fecha=None):
+    """
+    Guarda un lote columnar de productos con el mismo resultado que guardar_en_db, pero con
+    una consulta por bloque de ids en lugar de una por producto e inserciones masivas
+    (executemany). Los productos nuevos y los que cambiaron de precio se separan con
+    máscaras sobre las columnas del lote.
+    
+    Args:
+        lote (LoteProductos | list): Lote de productos (una lista se convierte a lote)
+        fecha (datetime, opcional): Fecha en que se capturaron los precios; por defecto, la actual
+    """
+    if not isinstance(lote, LoteProductos):
+        lote = LoteProductos.desde_productos(lote)
+    if not len(lote):
+        return
+    
+    if DATABASE_TYPE == "mongodb":
+        # Sin inserción masiva en MongoDB: guardar_en_db abre su propia conexión
+        guardar_en_db(lote.productos(), fecha)
+        return
+    
+    # Un id repetido dentro del lote depende de la fila anterior (inserción y luego
+    # actualización); esas filas se guardan una por una, en su orden, con guardar_en_db
+    ids = lote.textos['id_producto']
+    _, inversos, conteos = np.unique(ids.astype(str), return_inverse=True, return_counts=True)
+    repetidos = conteos[inversos] > 1
+    unicos = lote.filtrar(~repetidos) if repetidos.any() else lote
+    
+    fecha_str = (fecha or datetime.now()).isoformat()
+    conn, _ = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        ids = unicos.textos['id_producto'].tolist()
+        existentes = _ids_existentes(cursor, ids)
+        
+        existe = np.fromiter((id_producto in existentes for id_producto in ids), dtype=bool, count=len(ids))
+        precio_guardado = np.fromiter(
+            (existentes[id_producto][1] if id_producto in existentes else np.nan for id_producto in ids),
+            dtype=np.float64, count=len(ids)
+        )
+        nuevos = unicos.filtrar(~existe)
+        cambiados = unicos.filtrar(existe & (precio_guardado != unicos.precio))
+        
+        # Productos nuevos
+        cursor.executemany('''
+            INSERT INTO productos (tienda, modelo, nombre, precio, fecha, vendedor, link, imagen, id_producto)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', nuevos.filas(fecha_str))
+        existentes.update(_ids_existentes(cursor, nuevos.textos['id_producto'].tolist()))
+        
+        # Productos con otro precio
+        ids_cambiados = [existentes[id_producto][0] for id_producto in cambiados.textos['id_producto'].tolist()]
+        precios_cambiados = cambiados.precio.tolist()
+        vendedores_cambiados = cambiados.columna('vendedor').tolist()
+        cursor.executemany(
+            "UPDATE productos SET precio = ?, fecha = ?, vendedor = ? WHERE id = ?",
+            [(precio, fecha_str, vendedor, producto_id)
+             for precio, vendedor, producto_id in zip(precios_cambiados, vendedores_cambiados, ids_cambiados)]
+        )
+        
+        # Historial: primer registro de los nuevos y nuevo precio de los cambiados
+        ids_nuevos = [existentes[id_producto][0] for id_producto in nuevos.textos['id_producto'].tolist()]
+        cursor.executemany(
+            "INSERT INTO historial_precios (producto_id, precio, fecha, vendedor) VALUES (?, ?, ?, ?)",
+            [(producto_id, precio, fecha_str, vendedor) for producto_id, precio, vendedor in zip(
+                ids_nuevos + ids_cambiados,
+                nuevos.precio.tolist() + precios_cambiados,
+                nuevos.columna('vendedor').tolist() + vendedores_cambiados
+            )]
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    
+    if repetidos.any():
+        guardar_en_db(lote.filtrar(repetidos).productos(), fecha)
+
 def obtener_historial_precios(id_producto, limite=30):
     """
     Obtiene el historial de precios de un producto específico.
@@ -376,8 +477,7 @@ def contiene_palabra_prohibida(nombre):
     Returns:
         bool: True si contiene alguna palabra prohibida, False en caso contrario
     """
-    nombre_lower = nombre.lower()
-    return any(palabra.lower() in nombre_lower for palabra in PALABRAS_PROHIBIDAS)
+    return bool(detector_prohibidas.encontrar(nombre.lower()))
 
 def limpiar_productos_prohibidos():
     """
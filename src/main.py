@@ -4,6 +4,7 @@ from config import MODELOS_BUSQUEDA, SITIOS_HABILITADOS
 from utils import fetch_page, get_headers
 from database import crear_tabla, guardar_en_db, obtener_historial_precios
 from alerts import enviar_alertas
+from filters import filtrar_pagina
 
 # Importación dinámica de scrapers según configuración
 from scrapers.amazon_scraper import scrape_amazon_page
@@ -45,7 +46,7 @@ def ejecutar_scraper():
 
             if html_content:
                 # Obtener productos del sitio
-                productos = scraper_info['func'](html_content)
+                productos = filtrar_pagina(scraper_info['func'](html_content), sitio)
                 
                 # Para cada producto, verificar si hay cambios de precio significativos
                 for producto in productos:
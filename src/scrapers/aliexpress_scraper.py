@@ -1,6 +1,97 @@
-from bs4 import BeautifulSoup
-from src.utils.filters import filtrar_productos_irrelevantes
-from src.scrapers.base_scraper import detectar_modelo, crear_producto_base, filtrar_productos_validos
+from src.config.config import USAR_JSON_EMBEBIDO, CAPTURA_JSON_POR_SITIO
+from src.scrapers.base_scraper import (
+    detectar_modelo,
+    crear_producto_base,
+    extraer_json_embebido,
+    buscar_clave,
+    decodificar_html,
+    crear_soup,
+    convertir_precio,
+    url_absoluta,
+    compilar_especificacion,
+    extraer_productos
+)
+
+TIPO_CAMBIO_USD_MXN = 17.5  # Factor de conversión aproximado USD a MXN
+
+def id_aliexpress(link):
+    """
+    Extrae el ID del producto de la URL de AliExpress (.../item/<id>.html).
+    """
+    return link.split("item/")[1].split(".")[0] if "item/" in link else ""
+
+# Selectores de la página de resultados renderizada (ver compilar_especificacion)
+ESPECIFICACION_ALIEXPRESS = {
+    'tienda': 'AliExpress',
+    'items': ['div._3t7zg'],  # Clase de los items de producto
+    'campos': {
+        'link': {'selectores': ['a@href'], 'transformar': url_absoluta("https:"), 'requerido': True},
+        'id_producto': {'desde': 'link', 'transformar': id_aliexpress, 'requerido': True},
+        'nombre': {'selectores': ['h1._18_85'], 'defecto': "Nombre no disponible"},
+        # Precio en USD convertido a MXN aproximadamente
+        'precio': {
+            'selectores': ['div._12A8D'],
+            'transformar': lambda texto: convertir_precio(texto) * TIPO_CAMBIO_USD_MXN,
+            'defecto': 0.0
+        },
+        'imagen': {'selectores': ['img@src', 'img@data-src'], 'transformar': url_absoluta("https:")},
+        'vendedor': {'selectores': ['a._3Yugq'], 'defecto': "Vendedor no disponible"}
+    }
+}
+ESPECIFICACION_ALIEXPRESS_COMPILADA = compilar_especificacion(ESPECIFICACION_ALIEXPRESS)
+
+def _precio_aliexpress_json(precios):
+    """
+    Obtiene el precio en MXN del bloque 'prices' de un resultado JSON de AliExpress.
+    """
+    precio_venta = precios.get('salePrice') or precios.get('originalPrice') or {}
+    precio = float(precio_venta.get('minPrice') or 0)
+    if precio_venta.get('currencyCode', 'USD') != 'MXN':
+        precio *= TIPO_CAMBIO_USD_MXN
+    return precio
+
+def extraer_productos_json(html_content):
+    """
+    Extrae los productos del JSON de resultados de AliExpress, ya sea el incrustado en la
+    página (_init_data_ / runParams) o el capturado de las respuestas XHR durante el renderizado.
+    
+    Returns:
+        list: Productos encontrados (vacía si la página no trae datos JSON)
+    """
+    productos = []
+    ids_vistos = set()
+    
+    for datos in extraer_json_embebido(html_content, CAPTURA_JSON_POR_SITIO['aliexpress']['marcadores']):
+        lista = buscar_clave(datos, 'itemList')
+        resultados = lista.get('content') if isinstance(lista, dict) else None
+        if not isinstance(resultados, list):
+            continue
+        
+        for resultado in resultados:
+            try:
+                producto_id = str(resultado.get('productId', ''))
+                if not producto_id or producto_id in ids_vistos:
+                    continue
+                ids_vistos.add(producto_id)
+                
+                imagen = resultado.get('image', {}).get('imgUrl', '')
+                if imagen and not imagen.startswith('http'):
+                    imagen = f"https:{imagen}"
+                
+                producto = crear_producto_base(
+                    tienda='AliExpress',
+                    nombre=resultado.get('title', {}).get('displayTitle', "Nombre no disponible").strip(),
+                    precio=_precio_aliexpress_json(resultado.get('prices', {})),
+                    link=f"https://es.aliexpress.com/item/{producto_id}.html",
+                    imagen=imagen,
+                    id_producto=producto_id,
+                    vendedor=resultado.get('store', {}).get('storeName', "Vendedor no disponible")
+                )
+                productos.append(producto)
+            except (AttributeError, TypeError, ValueError) as e:
+                print(f"Error procesando resultado JSON de AliExpress: {e}")
+    
+    return productos
 
 def scrape_aliexpress_page(html_content):
     """
@@ -11,90 +102,27 @@ def scrape_aliexpress_page(html_content):
       - Se detecta el modelo usando detectar_modelo.
       - Se asigna 'AliExpress' como tienda.
       
-    Solo se incluyen productos con precio mayor a 0 y cuyo modelo no sea 'Otro'.
-    Finalmente se filtran productos irrelevantes usando una lista de palabras prohibidas.
+    Devuelve todos los productos extraídos: los filtros de precio, modelo reconocido y
+    productos irrelevantes se aplican después, una sola vez sobre el lote columnar de la
+    página (ver filtrar_pagina).
     
     Nota: AliExpress utiliza JavaScript para cargar los productos, por lo que es posible
     que sea necesario utilizar Selenium o Playwright para obtener el HTML completo.
+    Si la página trae los resultados en JSON (incrustado o capturado del XHR) se usan
+    directamente, sin recorrer el DOM.
     """
-    soup = BeautifulSoup(html_content, 'html.parser')
-    productos = []
-    ids_vistos = set()  # Para evitar duplicados
-    
-    # Buscar los contenedores de productos
-    items = soup.find_all('div', class_='_3t7zg')  # Clase de los items de producto
+    html_content = decodificar_html(html_content)
+    productos = extraer_productos_json(html_content) if USAR_JSON_EMBEBIDO else []
+    if productos:
+        print(f"Productos obtenidos del JSON de AliExpress: {len(productos)}")
+    else:
+        productos = extraer_productos_dom(html_content)
     
-    for item in items:
-        try:
-            # Extraer el ID del producto (de la URL o del elemento)
-            link_tag = item.find('a')
-            if not link_tag or not link_tag.get('href'):
-                continue
-                
-            link = link_tag['href']
-            if not link.startswith('http'):
-                link = f"https:{link}"
-                
-            # Extraer ID del producto de la URL
-            producto_id = ""
-            if "item/" in link:
-                producto_id = link.split("item/")[1].split(".")[0]
-            
-            if not producto_id or producto_id in ids_vistos:
-                continue
-                
-            ids_vistos.add(producto_id)
-            
-            # Extraer nombre
-            nombre_tag = item.find('h1', class_='_18_85')  # Clase del título
-            nombre = nombre_tag.text.strip() if nombre_tag else "Nombre no disponible"
-            
-            # Extraer precio
-            precio_tag = item.find('div', class_='_12A8D')  # Clase del precio
-            precio_text = ""
-            if precio_tag:
-                precio_text = precio_tag.text.replace('US $', '').replace(',', '').strip()
-            
-            # Convertir a float (y convertir de USD a MXN aproximadamente)
-            try:
-                precio = float(precio_text) * 17.5  # Factor de conversión aproximado USD a MXN
-            except (ValueError, TypeError):
-                precio = 0.0
-            
-            # Extraer imagen
-            imagen = ""
-            img_tag = item.find('img')
-            if img_tag:
-                if img_tag.get('src'):
-                    imagen = img_tag['src']
-                elif img_tag.get('data-src'):
-                    imagen = img_tag['data-src']
-                
-                if imagen and not imagen.startswith('http'):
-                    imagen = f"https:{imagen}"
-            
-            # Extraer vendedor (si está disponible)
-            vendedor_tag = item.find('a', class_='_3Yugq')  # Clase del vendedor
-            vendedor = vendedor_tag.text.strip() if vendedor_tag else "Vendedor no disponible"
-            
-            # Crear producto usando la función base
-            producto = crear_producto_base(
-                tienda='AliExpress',
-                nombre=nombre,
-                precio=precio,
-                link=link,
-                imagen=imagen,
-                id_producto=producto_id,
-                vendedor=vendedor
-            )
-            
-            productos.append(producto)
-        except Exception as e:
-            print(f"Error procesando producto de AliExpress: {e}")
-    
-    # Filtrar productos con precio mayor a 0 y modelo reconocido
-    productos = filtrar_productos_validos(productos)
-    # Aplicar filtro para descartar productos irrelevantes
-    productos = filtrar_productos_irrelevantes(productos)
-    
-    return productos 
\ No newline at end of file
+    return productos
+
+def extraer_productos_dom(html_content):
+    """
+    Extrae los productos recorriendo el árbol HTML (ver crear_soup).
+    Se usa cuando la página no trae los resultados en JSON.
+    """
+    return extraer_productos(crear_soup(html_content, 'aliexpress', ESPECIFICACION_ALIEXPRESS_COMPILADA), ESPECIFICACION_ALIEXPRESS_COMPILADA)
@@ -1,6 +1,62 @@
 # scrapers/base_scraper.py
 import re
-from src.config.config import MODELOS_BUSQUEDA, PALABRAS_PROHIBIDAS
+import json
+from collections import deque
+from functools import lru_cache
+from bs4 import BeautifulSoup, FeatureNotFound, SoupStrainer
+from src.config.config import (
+    MODELOS_BUSQUEDA,
+    PALABRAS_PROHIBIDAS,
+    PARSER_HTML_POR_SITIO,
+    PARSEO_PARCIAL,
+    MAX_PRODUCTOS_POR_PAGINA,
+    MAX_NOMBRES_EN_CACHE
+)
+from src.utils.utils import codificacion_documento
+from src.utils.filters import filtrar_productos_irrelevantes
+from src.utils.product import Producto
+
+@lru_cache(maxsize=None)
+def _patron_modelos(modelos):
+    """
+    Compila una sola vez (por lista de modelos) la expresión que encuentra todos los modelos
+    y su variante en una pasada. La búsqueda va dentro de un lookahead para encontrar
+    también las coincidencias que se traslapan.
+    """
+    alternativas = "|".join(re.escape(modelo) for modelo in modelos)
+    return re.compile(rf'(?=({alternativas})(?:[\s-]*(ti(?:[\s-]*super)?|super)(?![a-z]))?)')
+
+@lru_cache(maxsize=MAX_NOMBRES_EN_CACHE)
+def _detectar(nombre_normalizado, modelos):
+    if "rtx" not in nombre_normalizado and "nvidia" not in nombre_normalizado:
+        return "Otro", ""
+    
+    # Gana el primer modelo de la lista que aparezca en el nombre (no el primero del texto)
+    encontrados = {}
+    for coincidencia in _patron_modelos(modelos).finditer(nombre_normalizado):
+        modelo, variante = coincidencia.groups()
+        if not encontrados.get(modelo):
+            encontrados[modelo] = variante
+    for modelo in modelos:
+        if modelo in encontrados:
+            variante = encontrados[modelo] or ""
+            return f"RTX {modelo}", " ".join(parte.capitalize() for parte in re.split(r'[\s-]+', variante) if parte)
+    return "Otro", ""
+
+def detectar_modelo_y_variante(nombre_producto):
+    """
+    Detecta el modelo de la GPU y su variante a partir del nombre del producto, con una
+    sola expresión compilada para todos los modelos de MODELOS_BUSQUEDA. Los resultados se
+    guardan por nombre normalizado (el mismo producto aparece en cada corrida y página).
+    
+    Args:
+        nombre_producto (str): Nombre del producto
+        
+    Returns:
+        tuple: ('RTX <modelo>', variante), con variante 'Ti', 'Super', 'Ti Super' o "";
+            ('Otro', "") si no se reconoce ningún modelo
+    """
+    return _detectar(" ".join(nombre_producto.lower().split()), tuple(MODELOS_BUSQUEDA))
 
 def detectar_modelo(nombre_producto):
     """
@@ -8,48 +64,11 @@ def detectar_modelo(nombre_producto):
     Retorna 'RTX <modelo>' si se encuentra alguno de los modelos en MODELOS_BUSQUEDA;
     de lo contrario retorna 'Otro'.
     """
-    nombre_lower = nombre_producto.lower()
-    
-    # Verificar si contiene "rtx" o "nvidia"
-    if "rtx" in nombre_lower or "nvidia" in nombre_lower:
-        # Buscar patrones como "rtx 4070", "rtx4070", "4070 ti", etc.
-        for modelo in MODELOS_BUSQUEDA:
-            # Patrones comunes
-            patrones = [
-                f"rtx{modelo}",
-                f"rtx {modelo}",
-                f"rtx-{modelo}",
-                f"{modelo}ti",
-                f"{modelo} ti",
-                f"{modelo}-ti",
-                f"{modelo}super",
-                f"{modelo} super",
-                f"{modelo}-super"
-            ]
-            
-            # Verificar cada patrón
-            for patron in patrones:
-                if patron in nombre_lower:
-                    return f"RTX {modelo}"
-            
-            # Verificar el modelo directamente
-            if modelo in nombre_lower:
-                return f"RTX {modelo}"
-    
-    # Si no se encontró ningún modelo, intentar con expresiones regulares
-    rtx_pattern = re.search(r'rtx\s*(\d{4})', nombre_lower)
-    if rtx_pattern:
-        modelo_encontrado = rtx_pattern.group(1)
-        # Verificar si el modelo encontrado está en la lista de modelos
-        for modelo in MODELOS_BUSQUEDA:
-            if modelo == modelo_encontrado:
-                return f"RTX {modelo}"
-    
-    return "Otro"
+    return detectar_modelo_y_variante(nombre_producto)[0]
 
 def crear_producto_base(tienda, nombre, precio, link, imagen, id_producto, vendedor=""):
     """
-    Crea un diccionario base para un producto con los campos comunes.
+    Crea el registro de un producto con los campos comunes.
     
     Args:
         tienda (str): Nombre de la tienda (Amazon, MercadoLibre, etc.)
@@ -61,18 +80,18 @@ def crear_producto_base(tienda, nombre, precio, link, imagen, id_producto, vende
         vendedor (str, opcional): Nombre del vendedor
         
     Returns:
-        dict: Diccionario con la información del producto
+        Producto: Información del producto (se lee igual que un diccionario)
     """
-    return {
-        'tienda': tienda,
-        'modelo': detectar_modelo(nombre),
-        'nombre': nombre,
-        'precio': precio,
-        'vendedor': vendedor,
-        'link': link,
-        'imagen': imagen,
-        'id_producto': id_producto  # Cambiado de 'asin' a 'id_producto' para mayor claridad
-    }
+    return Producto(
+        tienda=tienda,
+        modelo=detectar_modelo(nombre),
+        nombre=nombre,
+        precio=precio,
+        vendedor=vendedor,
+        link=link,
+        imagen=imagen,
+        id_producto=id_producto  # Cambiado de 'asin' a 'id_producto' para mayor claridad
+    )
 
 def filtrar_productos_validos(productos):
     """
@@ -85,4 +104,496 @@ def filtrar_productos_validos(productos):
     Returns:
         list: Lista filtrada de productos
     """
-    return [p for p in productos if p['precio'] > 0 and p['modelo'] != "Otro"] 
\ No newline at end of file
+    return [p for p in productos if p['precio'] > 0 and p['modelo'] != "Otro"] 
+
+def decodificar_html(html_content):
+    """
+    Decodifica el contenido que llega de la capa de descarga. Las páginas descargadas con
+    requests llegan como bytes sin decodificar: aquí se decodifican una sola vez con la
+    codificación que declara el documento (o UTF-8), sin detección de charset.
+    
+    Args:
+        html_content (str | bytes | memoryview): Contenido HTML de la página
+        
+    Returns:
+        str: Contenido HTML decodificado
+    """
+    if isinstance(html_content, str):
+        return html_content
+    codificacion = codificacion_documento(html_content) or 'utf-8'
+    # str() decodifica directamente desde el buffer, sin copiar antes un memoryview a bytes
+    return str(html_content, codificacion, errors='replace')
+
+# Backends de parser que no están instalados (se avisa una sola vez)
+_parsers_no_disponibles = set()
+
+class FiltroContenedores(SoupStrainer):
+    """
+    Filtro de parseo que solo deja construir los contenedores de productos (y todo su
+    contenido): el resto de la página (cabecera, pie, scripts...) se lee pero no se
+    convierte en objetos del árbol.
+    """
+    
+    def __init__(self, predicados):
+        super().__init__()
+        self.predicados = predicados
+    
+    @property
+    def includes_everything(self):
+        return False
+    
+    def allow_tag_creation(self, nsprefix, name, attrs):
+        atributos = attrs or {}
+        return any(predicado(name, atributos) for predicado in self.predicados)
+    
+    def allow_string_creation(self, string):
+        # Texto fuera de los contenedores
+        return False
+
+def crear_soup(html_content, sitio, especificacion=None):
+    """
+    Construye el árbol del documento con el backend configurado para el sitio en
+    PARSER_HTML_POR_SITIO. Todos los backends entregan un árbol de BeautifulSoup, así que
+    los scrapers no cambian según el backend.
+    
+    Si se indica la especificación del sitio y PARSEO_PARCIAL está activado, solo se
+    construyen los contenedores de productos; si ninguno coincide se parsea la página completa.
+    
+    Args:
+        html_content (str | bytes | memoryview): Contenido HTML de la página
+        sitio (str): Sitio de la página (ej: 'amazon')
+        especificacion (dict, opcional): Especificación compilada del sitio (ver compilar_especificacion)
+        
+    Returns:
+        BeautifulSoup: Árbol del documento (o solo de los contenedores de productos)
+    """
+    html_content = decodificar_html(html_content)
+    parser = PARSER_HTML_POR_SITIO.get(sitio, PARSER_HTML_POR_SITIO['default'])
+    if parser in _parsers_no_disponibles:
+        parser = 'html.parser'
+    
+    # html5lib no admite parseo parcial
+    if especificacion and PARSEO_PARCIAL and parser != 'html5lib':
+        filtro = FiltroContenedores([predicado for _, predicado in especificacion['items']])
+        soup = _parsear(html_content, parser, filtro)
+        if soup.contents:
+            return soup
+        print(f"⚠️ Ningún contenedor de productos de {sitio} coincidió, se parsea la página completa")
+    return _parsear(html_content, parser)
+
+def _parsear(html_content, parser, filtro=None):
+    """
+    Parsea con el backend indicado, o con html.parser si no está instalado.
+    """
+    if parser != 'html.parser':
+        try:
+            return BeautifulSoup(html_content, parser, parse_only=filtro)
+        except FeatureNotFound:
+            _parsers_no_disponibles.add(parser)
+            print(f"⚠️ El parser {parser} no está instalado, se usa html.parser")
+    return BeautifulSoup(html_content, 'html.parser', parse_only=filtro)
+
+def convertir_precio(texto, decimales=True):
+    """
+    Convierte el texto de un precio (ej: '$12,999.00') a número.
+    
+    Args:
+        texto (str): Texto del precio
+        decimales (bool): Si es False, el punto se toma como separador de miles
+            (ej: MercadoLibre muestra '19.999')
+        
+    Returns:
+        float: Precio, o 0.0 si el texto no tiene un número válido
+    """
+    limpio = re.sub(r'[^\d.]' if decimales else r'[^\d]', '', texto)
+    try:
+        return float(limpio) if limpio else 0.0
+    except ValueError:
+        return 0.0
+
+def url_absoluta(base):
+    """
+    Crea una transformación que completa los enlaces relativos con la base indicada.
+    
+    Args:
+        base (str): Prefijo de los enlaces relativos (ej: 'https://www.amazon.com.mx' o 'https:')
+        
+    Returns:
+        function: Transformación enlace -> enlace absoluto
+    """
+    return lambda enlace: enlace if enlace.startswith('http') else f"{base}{enlace}"
+
+# Lo que sigue a la lista de resultados en las páginas de todos los sitios
+FIN_RESULTADOS = ['[class*="pagination"]']
+
+# Selectores simples que se evalúan sin motor CSS: etiqueta, clases y atributos
+# ([atributo], [atributo="valor"] y [atributo*="valor"])
+PATRON_SELECTOR = re.compile(r'^([\w-]+)?((?:\.[\w-]+|\[[\w-]+(?:\*?="[^"]*")?\])*)$')
+PATRON_CLASE = re.compile(r'\.([\w-]+)')
+PATRON_ATRIBUTO = re.compile(r'\[([\w-]+)(?:(\*?=)"([^"]*)")?\]')
+
+def compilar_selector(selector):
+    """
+    Compila un selector simple (ej: 'span.a-price-whole' o 'div[data-asin]') en una función
+    que evalúa el nombre y los atributos de una etiqueta directamente, sin construir objetos
+    por cada búsqueda. Sirve tanto para elementos del árbol como para las etiquetas que va
+    leyendo el parser (donde 'class' todavía es una cadena).
+    
+    Args:
+        selector (str): Selector con etiqueta, clases y/o atributos (sin combinadores)
+        
+    Returns:
+        function: Función (nombre, atributos) -> bool
+        
+    Raises:
+        ValueError: Si el selector no es un selector simple
+    """
+    coincidencia = PATRON_SELECTOR.match(selector)
+    if not selector or not coincidencia:
+        raise ValueError(f"Selector no soportado: {selector!r}")
+    etiqueta = coincidencia.group(1)
+    clases = frozenset(PATRON_CLASE.findall(coincidencia.group(2)))
+    atributos = PATRON_ATRIBUTO.findall(coincidencia.group(2))
+    
+    def coincide(nombre_etiqueta, atributos_etiqueta):
+        if etiqueta is not None and nombre_etiqueta != etiqueta:
+            return False
+        if clases:
+            valor = atributos_etiqueta.get('class') or ()
+            if isinstance(valor, str):
+                valor = valor.split()
+            if not clases.issubset(valor):
+                return False
+        for nombre, operador, esperado in atributos:
+            valor = atributos_etiqueta.get(nombre)
+            if valor is None:
+                return False
+            if isinstance(valor, list):
+                # Atributos con varios valores (class, rel...)
+                valor = " ".join(valor)
+            if (operador == '=' and valor != esperado) or (operador == '*=' and esperado not in valor):
+                return False
+        return True
+    
+    return coincide
+
+def compilar_especificacion(especificacion):
+    """
+    Compila la especificación declarativa de selectores de un sitio. Los selectores se
+    compilan una sola vez (al importar el scraper) y luego se reutilizan en cada producto.
+    
+    La especificación es un diccionario con:
+      - 'tienda': Nombre de la tienda de los productos
+      - 'items': Selectores alternativos del contenedor de cada producto; se usa el primero
+        que encuentre algún elemento
+      - 'fin_resultados' (opcional): Selectores de lo que sigue a la lista de resultados (ej:
+        la paginación); el parser incremental deja de leer la página al encontrarlos
+      - 'campos': Campos del producto (en el orden en que se extraen) con su regla:
+          'selectores': Selectores que se prueban en orden hasta obtener un valor. Cada uno
+              es una cadena de selectores simples separados por espacios (descendientes);
+              con el sufijo '@atributo' se lee ese atributo en lugar del texto, y un selector
+              vacío ('@data-asin') se refiere al propio contenedor
+          'desde': Campo ya extraído del que se deriva el valor (en lugar de 'selectores')
+          'elemento': Si es True, 'transformar' recibe el elemento en lugar de su texto
+          'transformar': Función que convierte el valor leído; un resultado vacío (o 0)
+              pasa al siguiente selector
+          'requerido': Si es True, el producto se descarta cuando el campo queda vacío
+          'defecto': Valor si ningún selector da un valor (por defecto "")
+    
+    Args:
+        especificacion (dict): Especificación del sitio
+        
+    Returns:
+        dict: Especificación compilada (ver extraer_productos)
+        
+    Raises:
+        ValueError: Si algún selector no es un selector simple
+    """
+    # Primer paso de cada selector: se buscan todos en una sola pasada por el contenedor
+    primeros_pasos = []
+    campos = []
+    for nombre, regla in especificacion['campos'].items():
+        selectores = []
+        for selector in regla.get('selectores', []):
+            css, _, atributo = selector.partition('@')
+            pasos = [compilar_selector(paso) for paso in css.split()]
+            indice = None
+            if pasos:
+                indice = len(primeros_pasos)
+                primeros_pasos.append(pasos[0])
+            selectores.append((indice, [_en_elemento(paso) for paso in pasos[1:]], atributo or None))
+        campos.append((nombre, dict(regla, selectores=selectores)))
+    
+    return {
+        'tienda': especificacion['tienda'],
+        'items': [(selector, compilar_selector(selector)) for selector in especificacion['items']],
+        'fin_resultados': [compilar_selector(selector) for selector in especificacion.get('fin_resultados', FIN_RESULTADOS)],
+        'primeros_pasos': primeros_pasos,
+        'campos': campos
+    }
+
+def _en_elemento(predicado):
+    """
+    Adapta un selector compilado para las búsquedas de BeautifulSoup (find/find_all), que
+    entregan el elemento completo.
+    """
+    return lambda elemento: predicado(elemento.name, elemento.attrs)
+
+def _buscar_primeros(item, predicados):
+    """
+    Recorre una sola vez los descendientes del contenedor y devuelve, para cada predicado,
+    el primer elemento que lo cumple (None si ninguno).
+    """
+    encontrados = [None] * len(predicados)
+    pendientes = len(predicados)
+    for elemento in item.descendants:
+        nombre = elemento.name
+        if nombre is None:
+            # Texto o comentario
+            continue
+        atributos = elemento.attrs
+        for indice, predicado in enumerate(predicados):
+            if encontrados[indice] is None and predicado(nombre, atributos):
+                encontrados[indice] = elemento
+                pendientes -= 1
+        if not pendientes:
+            break
+    return encontrados
+
+def _leer_campo(item, regla, valores, encontrados):
+    """
+    Obtiene el valor de un campo para un contenedor, probando sus selectores en orden.
+    """
+    transformar = regla.get('transformar')
+    if 'desde' in regla:
+        valor = valores.get(regla['desde'])
+        return transformar(valor) if valor and transformar else valor
+    
+    for indice, pasos, atributo in regla['selectores']:
+        elemento = item if indice is None else encontrados[indice]
+        for paso in pasos:
+            if elemento is None:
+                break
+            elemento = elemento.find(paso)
+        if elemento is None:
+            continue
+        if regla.get('elemento'):
+            valor = elemento
+        elif atributo:
+            valor = elemento.get(atributo)
+        else:
+            valor = elemento.get_text().strip()
+        if valor and transformar:
+            valor = transformar(valor)
+        if valor:
+            return valor
+    return None
+
+def extraer_productos(soup, especificacion, ids_vistos=None):
+    """
+    Extrae los productos de una página de resultados ejecutando la especificación compilada
+    de su sitio (ver compilar_especificacion). Los productos repetidos (mismo id_producto)
+    se cuentan una sola vez.
+    
+    Args:
+        soup (BeautifulSoup): Árbol de la página (ver crear_soup)
+        especificacion (dict): Especificación compilada del sitio
+        ids_vistos (set, opcional): IDs ya extraídos (se actualiza); permite extraer una
+            página por partes sin repetir productos
+        
+    Returns:
+        list: Productos extraídos (sin filtrar)
+    """
+    tienda = especificacion['tienda']
+    items = []
+    for indice, (selector, predicado) in enumerate(especificacion['items']):
+        items = soup.find_all(_en_elemento(predicado))
+        if items:
+            if indice:
+                print(f"Usando selector alternativo ({selector}). Encontrados: {len(items)} items")
+            break
+    
+    productos = []
+    if ids_vistos is None:
+        ids_vistos = set()  # Para evitar duplicados
+    for item in items:
+        try:
+            encontrados = _buscar_primeros(item, especificacion['primeros_pasos'])
+            valores = {}
+            for nombre, regla in especificacion['campos']:
+                valor = _leer_campo(item, regla, valores, encontrados)
+                if not valor:
+                    if regla.get('requerido'):
+                        break
+                    valor = regla.get('defecto', "")
+                if nombre == 'id_producto':
+                    if valor in ids_vistos:
+                        break
+                    ids_vistos.add(valor)
+                valores[nombre] = valor
+            else:
+                productos.append(crear_producto_base(tienda=tienda, **valores))
+        except Exception as e:
+            print(f"Error procesando producto de {tienda}: {e}")
+    
+    return productos
+
+def extraer_productos_incremental(trozos, sitio, especificacion):
+    """
+    Extrae los productos mientras se descarga la página: el cuerpo se procesa por trozos y
+    cada producto se entrega en cuanto se cierra su contenedor, sin esperar ni guardar la
+    página completa (los elementos ya procesados se liberan). La lectura termina al llegar a
+    lo que sigue a la lista de resultados ('fin_resultados' de la especificación) o cuando
+    el consumidor cierra el generador; en ambos casos se cierra también el iterador de
+    trozos, lo que corta la descarga (ver fetch_por_trozos).
+    
+    Args:
+        trozos (iterable): Trozos del cuerpo de la respuesta (bytes o str)
+        sitio (str): Sitio de la página (ej: 'amazon')
+        especificacion (dict): Especificación compilada del sitio
+        
+    Yields:
+        dict: Producto extraído (sin filtrar)
+    """
+    try:
+        from lxml import etree
+    except ImportError:
+        etree = None
+    
+    try:
+        if etree is None:
+            print("⚠️ lxml no está instalado, se procesa la página completa")
+            html_content = "".join(decodificar_html(trozo) for trozo in trozos)
+            yield from extraer_productos(crear_soup(html_content, sitio, especificacion), especificacion)
+            return
+        
+        contenedores = [predicado for _, predicado in especificacion['items']]
+        fin_resultados = especificacion['fin_resultados']
+        ids_vistos = set()
+        parser = None
+        abierto = None  # Contenedor que se está leyendo
+        contenedores_leidos = 0
+        
+        for trozo in trozos:
+            if parser is None:
+                # La codificación la declara el propio documento al principio
+                codificacion = None if isinstance(trozo, str) else codificacion_documento(trozo) or 'utf-8'
+                parser = etree.HTMLPullParser(events=('start', 'end'), encoding=codificacion)
+            parser.feed(trozo)
+            
+            for evento, elemento in parser.read_events():
+                if abierto is None and evento == 'start':
+                    atributos = elemento.attrib
+                    if any(predicado(elemento.tag, atributos) for predicado in contenedores):
+                        abierto = elemento
+                    elif contenedores_leidos and any(predicado(elemento.tag, atributos) for predicado in fin_resultados):
+                        print(f"✂️ Fin de los resultados de {sitio} tras {contenedores_leidos} contenedores")
+                        return
+                elif evento == 'end' and (abierto is None or elemento is abierto):
+                    if elemento is abierto:
+                        fragmento = etree.tostring(elemento, method='html', encoding='unicode', with_tail=False)
+                        abierto = None
+                        contenedores_leidos += 1
+                        yield from extraer_productos(crear_soup(fragmento, sitio, especificacion), especificacion, ids_vistos)
+                    # Liberar lo ya leído (el elemento y sus hermanos anteriores)
+                    elemento.clear(keep_tail=False)
+                    while elemento.getprevious() is not None:
+                        del elemento.getparent()[0]
+        
+        if parser is not None:
+            parser.close()
+            for evento, elemento in parser.read_events():
+                if evento == 'end' and elemento is abierto:
+                    # Contenedor sin cerrar al final del documento
+                    fragmento = etree.tostring(elemento, method='html', encoding='unicode', with_tail=False)
+                    yield from extraer_productos(crear_soup(fragmento, sitio, especificacion), especificacion, ids_vistos)
+                    break
+    finally:
+        if hasattr(trozos, 'close'):
+            trozos.close()
+
+def scrape_incremental(trozos, sitio, especificacion, max_productos=MAX_PRODUCTOS_POR_PAGINA):
+    """
+    Versión incremental de los scrape_*_page: entrega los productos válidos y relevantes de
+    una página a medida que se descarga (ver extraer_productos_incremental). Los filtros que
+    filtrar_pagina aplica al lote de la página se aplican aquí producto por producto. Las páginas que
+    traen los resultados en JSON incrustado (MercadoLibre, AliExpress) se leen desde el DOM,
+    porque el JSON solo se puede usar con la página completa.
+    
+    Args:
+        trozos (iterable): Trozos del cuerpo de la respuesta (bytes o str)
+        sitio (str): Sitio de la página (ej: 'amazon')
+        especificacion (dict): Especificación compilada del sitio
+        max_productos (int, opcional): Deja de leer la página (y de descargarla) al
+            alcanzar este número de productos; None para leerla completa
+        
+    Yields:
+        dict: Producto filtrado
+    """
+    entregados = 0
+    productos = extraer_productos_incremental(trozos, sitio, especificacion)
+    try:
+        for producto in productos:
+            if not filtrar_productos_irrelevantes(filtrar_productos_validos([producto])):
+                continue
+            yield producto
+            entregados += 1
+            if max_productos and entregados >= max_productos:
+                print(f"✂️ Alcanzado el máximo de {max_productos} productos en {sitio}")
+                return
+    finally:
+        productos.close()
+
+def extraer_json_embebido(html_content, marcadores):
+    """
+    Extrae los objetos JSON que la página incrusta después de cada marcador, por ejemplo
+    el estado inicial (window.__PRELOADED_STATE__ = {...}) o las respuestas XHR capturadas
+    por el renderizador. No construye un árbol HTML: solo busca el marcador y decodifica
+    el JSON que le sigue.
+    
+    Args:
+        html_content (str): Contenido HTML de la página
+        marcadores (list): Cadenas que preceden al JSON (ej: '__PRELOADED_STATE__')
+        
+    Returns:
+        list: Objetos JSON decodificados (vacía si no se encontró ninguno)
+    """
+    decoder = json.JSONDecoder()
+    objetos = []
+    
+    for marcador in marcadores:
+        inicio = html_content.find(marcador)
+        while inicio != -1:
+            # El JSON empieza en la primera llave o corchete después del marcador
+            posicion = re.search(r'[{\[]', html_content[inicio + len(marcador):inicio + len(marcador) + 500])
+            if posicion:
+                try:
+                    objeto, _ = decoder.raw_decode(html_content, inicio + len(marcador) + posicion.start())
+                    objetos.append(objeto)
+                except ValueError:
+                    pass
+            inicio = html_content.find(marcador, inicio + len(marcador))
+    
+    return objetos
+
+def buscar_clave(datos, clave):
+    """
+    Busca recursivamente la primera aparición de una clave en un objeto JSON.
+    
+    Args:
+        datos (dict | list): Objeto JSON
+        clave (str): Clave a buscar
+        
+    Returns:
+        El valor de la clave, o None si no existe
+    """
+    pendientes = deque([datos])
+    while pendientes:
+        actual = pendientes.popleft()
+        if isinstance(actual, dict):
+            if clave in actual:
+                return actual[clave]
+            pendientes.extend(actual.values())
+        elif isinstance(actual, list):
+            pendientes.extend(actual)
+    return None
@@ -1,25 +1,15 @@
-from bs4 import BeautifulSoup
 import re
-from src.utils.filters import filtrar_productos_irrelevantes
-from src.scrapers.base_scraper import detectar_modelo, crear_producto_base, filtrar_productos_validos
-
-def extraer_precio_mercadolibre(precio_tag):
-    """
-    Extrae el precio de un elemento de MercadoLibre.
-    """
-    try:
-        if not precio_tag:
-            return 0.0
-            
-        precio_text = precio_tag.text.strip()
-        # Extraer solo números y punto decimal
-        precio_limpio = re.sub(r'[^\d]', '', precio_text)
-        if precio_limpio:
-            return float(precio_limpio)
-        return 0.0
-    except (ValueError, AttributeError) as e:
-        print(f"Error extrayendo precio de MercadoLibre: {e}")
-        return 0.0
+from src.config.config import USAR_JSON_EMBEBIDO, CAPTURA_JSON_POR_SITIO
+from src.scrapers.base_scraper import (
+    crear_producto_base,
+    extraer_json_embebido,
+    buscar_clave,
+    decodificar_html,
+    crear_soup,
+    convertir_precio,
+    compilar_especificacion,
+    extraer_productos
+)
 
 def transformar_url_imagen(url_original):
     """
@@ -52,6 +42,162 @@ def transformar_url_imagen(url_original):
     
     return url_transformada
 
+def extraer_id_mercadolibre(link):
+    """
+    Extrae el ID del producto de la URL de MercadoLibre.
+    Buscamos patrones como /p/MLM12345678, /MLM-12345678, etc.
+    """
+    mlm_pattern = re.search(r'\/(?:p\/|)(?:MLM|MLA|MCO|MEC)[-]?(\d+)', link)
+    
+    if mlm_pattern:
+        return f"MLM{mlm_pattern.group(1)}"
+    
+    # Si no se pudo extraer un ID, generamos uno a partir de la URL
+    # Usar los últimos 10 caracteres de la URL como ID
+    return f"ML-{link[-10:]}"
+
+# Selectores de la página de resultados: primero la estructura nueva (poly-card) y luego la
+# anterior como respaldo (ver compilar_especificacion)
+ESPECIFICACION_MERCADOLIBRE = {
+    'tienda': 'MercadoLibre',
+    'items': ['li[class*="ui-search-layout__item"]', 'div[class*="poly-card"]'],
+    'campos': {
+        'link': {
+            'selectores': ['a.poly-component__title@href', 'a.ui-search-item__group__element@href'],
+            'requerido': True
+        },
+        'id_producto': {'desde': 'link', 'transformar': extraer_id_mercadolibre},
+        'nombre': {
+            'selectores': ['a.poly-component__title', 'h2.ui-search-item__title'],
+            'defecto': "Nombre no disponible"
+        },
+        'precio': {
+            'selectores': ['span.andes-money-amount__fraction', 'span.price-tag-fraction'],
+            'transformar': lambda texto: convertir_precio(texto, decimales=False),
+            'requerido': True
+        },
+        'imagen': {
+            'selectores': [
+                'img.poly-component__picture@data-src',
+                'img.poly-component__picture@src',
+                'img.ui-search-result-image__element@data-src',
+                'img.ui-search-result-image__element@src'
+            ],
+            'transformar': transformar_url_imagen
+        },
+        'vendedor': {
+            'selectores': ['span.poly-component__seller', 'p.ui-search-official-store-label'],
+            'transformar': lambda texto: texto.replace('Por ', '')
+        }
+    }
+}
+ESPECIFICACION_MERCADOLIBRE_COMPILADA = compilar_especificacion(ESPECIFICACION_MERCADOLIBRE)
+
+def _producto_desde_polycard(polycard):
+    """
+    Convierte un resultado 'polycard' del estado embebido en un producto.
+    """
+    metadata = polycard.get('metadata', {})
+    link = metadata.get('url', '')
+    if not link:
+        return None
+    if not link.startswith('http'):
+        link = f"https://{link}"
+    
+    nombre, precio, vendedor = "Nombre no disponible", 0.0, ""
+    for componente in polycard.get('components', []):
+        tipo = componente.get('type')
+        if tipo == 'title':
+            nombre = componente.get('title', {}).get('text', nombre).strip()
+        elif tipo == 'price':
+            precio = float(componente.get('price', {}).get('current_price', {}).get('value') or 0)
+        elif tipo == 'seller':
+            vendedor = componente.get('seller', {}).get('text', '')
+            vendedor = re.sub(r'[{}]', '', vendedor).replace('Por ', '').strip()
+    
+    imagen = ""
+    imagenes = polycard.get('pictures', {}).get('pictures', [])
+    if imagenes and imagenes[0].get('id'):
+        imagen = f"https://http2.mlstatic.com/D_NQ_NP_{imagenes[0]['id']}-F.webp"
+    
+    return crear_producto_base(
+        tienda='MercadoLibre',
+        nombre=nombre,
+        precio=precio,
+        link=link,
+        imagen=imagen,
+        id_producto=extraer_id_mercadolibre(link),
+        vendedor=vendedor
+    )
+
+def _producto_desde_resultado(resultado):
+    """
+    Convierte un resultado con el formato clásico (title, price, permalink) en un producto.
+    """
+    link = resultado.get('permalink', '')
+    if not link:
+        return None
+    
+    precio = resultado.get('price', 0)
+    if isinstance(precio, dict):
+        precio = precio.get('amount', 0)
+    
+    vendedor = resultado.get('seller', {})
+    if isinstance(vendedor, dict):
+        vendedor = vendedor.get('nickname', '')
+    
+    return crear_producto_base(
+        tienda='MercadoLibre',
+        nombre=resultado.get('title', "Nombre no disponible").strip(),
+        precio=float(precio or 0),
+        link=link,
+        imagen=transformar_url_imagen(resultado.get('thumbnail', '')),
+        id_producto=extraer_id_mercadolibre(link),
+        vendedor=vendedor or ""
+    )
+
+def extraer_productos_json(html_content):
+    """
+    Extrae los productos del estado JSON que MercadoLibre incrusta en la página
+    (__PRELOADED_STATE__), sin construir el árbol HTML.
+    
+    Returns:
+        list: Productos encontrados (vacía si la página no trae el estado embebido)
+    """
+    productos = []
+    ids_vistos = set()
+    
+    for datos in extraer_json_embebido(html_content, CAPTURA_JSON_POR_SITIO['mercadolibre']['marcadores']):
+        resultados = buscar_clave(datos, 'results')
+        if not isinstance(resultados, list):
+            continue
+        
+        for resultado in resultados:
+            try:
+                if not isinstance(resultado, dict):
+                    continue
+                if 'polycard' in resultado:
+                    producto = _producto_desde_polycard(resultado['polycard'])
+                else:
+                    producto = _producto_desde_resultado(resultado)
+                
+                if not producto or producto['id_producto'] in ids_vistos or producto['precio'] <= 0:
+                    continue
+                ids_vistos.add(producto['id_producto'])
+                productos.append(producto)
+            except (AttributeError, TypeError, ValueError) as e:
+                print(f"Error procesando resultado JSON de MercadoLibre: {e}")
+    
+    return productos
+
+def extraer_productos_dom(html_content):
+    """
+    Extrae los productos recorriendo el árbol HTML (ver crear_soup).
+    Se usa cuando la página no trae el estado JSON embebido.
+    """
+    print(f"Analizando página de MercadoLibre. Longitud HTML: {len(html_content)}")
+    return extraer_productos(crear_soup(html_content, 'mercadolibre', ESPECIFICACION_MERCADOLIBRE_COMPILADA), ESPECIFICACION_MERCADOLIBRE_COMPILADA)
+
 def scrape_mercadolibre_page(html_content):
     """
     Extrae la información relevante de cada producto de una página de resultados de MercadoLibre.
@@ -60,137 +206,21 @@ def scrape_mercadolibre_page(html_content):
       - Nombre, precio, link, imagen, vendedor (opcional) y ID del producto.
       - Se detecta el modelo usando detectar_modelo.
       - Se asigna 'MercadoLibre' como tienda.
+    
+    Los productos se toman del JSON embebido en la página cuando está disponible
+    (mucho más barato que recorrer el HTML); si no, se usa el parser del DOM.
       
-    Solo se incluyen productos con precio mayor a 0 y cuyo modelo no sea 'Otro'.
-    Finalmente se filtran productos irrelevantes usando una lista de palabras prohibidas.
+    Devuelve todos los productos extraídos: los filtros de precio, modelo reconocido y
+    productos irrelevantes se aplican después, una sola vez sobre el lote columnar de la
+    página (ver filtrar_pagina).
     """
-    soup = BeautifulSoup(html_content, 'html.parser')
-    productos = []
-    ids_vistos = set()  # Para evitar duplicados
+    html_content = decodificar_html(html_content)
+    productos = extraer_productos_json(html_content) if USAR_JSON_EMBEBIDO else []
     
-    print(f"Analizando página de MercadoLibre. Longitud HTML: {len(html_content)}")
-    
-    # Buscar los contenedores de productos - actualizado para incluir la nueva clase
-    items = soup.find_all('li', class_=lambda c: c and ('ui-search-layout__item' in c))
-    
-    # Si no se encuentran con el selector anterior, probar con el nuevo formato
-    if not items:
-        items = soup.find_all('div', class_=lambda c: c and ('poly-card' in c))
-        print(f"Usando selector alternativo (poly-card). Encontrados: {len(items)} items")
-    
-    print(f"Total de items encontrados: {len(items)}")
-    
-    for item in items:
-        try:
-            # Buscar el enlace del producto - actualizado para la nueva estructura
-            link = ""
-            
-            # Buscar en la nueva estructura (poly-component__title)
-            titulo_tag = item.find('a', class_='poly-component__title')
-            if titulo_tag and titulo_tag.get('href'):
-                link = titulo_tag['href']
-                nombre = titulo_tag.text.strip()
-            else:
-                # Mantener la búsqueda anterior como fallback
-                link_tag = item.find('a', class_='ui-search-item__group__element')
-                if link_tag and link_tag.get('href'):
-                    link = link_tag['href']
-                    nombre_tag = item.find('h2', class_='ui-search-item__title')
-                    nombre = nombre_tag.text.strip() if nombre_tag else "Nombre no disponible"
-                else:
-                    continue
-            
-            # Extraer ID del producto de la URL con una expresión regular más robusta
-            # Buscamos patrones como /p/MLM12345678, /MLM-12345678, etc.
-            producto_id = ""
-            mlm_pattern = re.search(r'\/(?:p\/|)(?:MLM|MLA|MCO|MEC)[-]?(\d+)', link)
-            
-            if mlm_pattern:
-                producto_id = f"MLM{mlm_pattern.group(1)}"
-            
-            # Si no se pudo extraer un ID, generamos uno a partir de la URL
-            if not producto_id:
-                # Usar los últimos 10 caracteres de la URL como ID
-                producto_id = f"ML-{link[-10:]}"
-            
-            if producto_id in ids_vistos:
-                continue
-                
-            ids_vistos.add(producto_id)
-            
-            # Extraer precio - actualizado para la nueva estructura
-            precio = 0.0
-            
-            # Buscar el precio en el formato del nuevo HTML (poly-component)
-            precio_tag = item.find('span', class_='andes-money-amount__fraction')
-            if precio_tag:
-                precio = extraer_precio_mercadolibre(precio_tag)
-            else:
-                # Fallback al método anterior
-                precio_tag = item.find('span', class_='price-tag-fraction')
-                if precio_tag:
-                    precio = extraer_precio_mercadolibre(precio_tag)
-            
-            if precio <= 0:
-                continue
-            
-            # Extraer imagen - actualizado para la nueva estructura
-            imagen = ""
-            img_tag = item.find('img', class_='poly-component__picture')
-            if not img_tag:
-                img_tag = item.find('img', class_='ui-search-result-image__element')
-            
-            if img_tag:
-                # Intentar obtener la URL de la imagen
-                imagen = img_tag.get('data-src') or img_tag.get('src', '')
-                # Transformar la URL
-                imagen = transformar_url_imagen(imagen)
-            
-            # Imprimir la URL final de la imagen para depuración
-            print(f"URL final de imagen: {imagen}")
-            
-            # Extraer vendedor - actualizado para la nueva estructura
-            vendedor = ""
-            vendedor_tag = item.find('span', class_='poly-component__seller')
-            if vendedor_tag:
-                vendedor = vendedor_tag.text.strip().replace('Por ', '')
-            else:
-                # Fallback al método anterior
-                vendedor_tag = item.find('p', class_='ui-search-official-store-label')
-                if vendedor_tag:
-                    vendedor = vendedor_tag.text.strip()
-            
-            # Crear producto usando la función base
-            producto = crear_producto_base(
-                tienda='MercadoLibre',
-                nombre=nombre,
-                precio=precio,
-                link=link,
-                imagen=imagen,
-                id_producto=producto_id,
-                vendedor=vendedor
-            )
-            
-            print(f"Producto encontrado: {nombre[:50]}... - ${precio}")
-            productos.append(producto)
-        except Exception as e:
-            print(f"Error procesando producto de MercadoLibre: {e}")
-    
-    # Filtrar productos con precio mayor a 0 y modelo reconocido
-    productos_validos = filtrar_productos_validos(productos)
-    # Aplicar filtro para descartar productos irrelevantes
-    productos_filtrados = filtrar_productos_irrelevantes(productos_validos)
+    if productos:
+        print(f"Productos obtenidos del JSON embebido de MercadoLibre: {len(productos)}")
+    else:
+        productos = extraer_productos_dom(html_content)
     
     print(f"Total de productos encontrados: {len(productos)}")
-    print(f"Total de productos con modelo reconocido: {len(productos_validos)}")
-    print(f"Total de productos válidos después de filtrar: {len(productos_filtrados)}")
-    
-    # Si no hay productos válidos pero sí hay productos, incluir algunos aunque no tengan modelo reconocido
-    if len(productos_filtrados) == 0 and len(productos) > 0:
-        print("No se encontraron productos válidos, incluyendo algunos sin modelo reconocido...")
-        # Filtrar solo por precio y palabras prohibidas
-        productos_filtrados = [p for p in productos if p['precio'] > 0]
-        productos_filtrados = filtrar_productos_irrelevantes(productos_filtrados)
-        print(f"Total de productos incluidos sin filtro de modelo: {len(productos_filtrados)}")
-    
-    return productos_filtrados 
\ No newline at end of file
+    return productos
\ No newline at end of file
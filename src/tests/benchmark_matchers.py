@@ -0,0 +1,142 @@
+"""
+Compara la detección de modelo y de palabras clave compilada (detectar_modelo,
+DetectorPalabras) con los bucles de comparación de subcadenas que reemplazó: verifica que
+ambas den el mismo resultado sobre los nombres de producto de los archivos de prueba y mide
+el tiempo por nombre de cada una.
+
+Uso:
+    python src/tests/benchmark_matchers.py [repeticiones]
+"""
+
+import os
+import re
+import sys
+import glob
+import time
+from bs4 import BeautifulSoup
+
+# Permitir importar el paquete src al ejecutar el script directamente
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from src.config.config import MODELOS_BUSQUEDA, PALABRAS_PROHIBIDAS
+from src.scrapers.base_scraper import detectar_modelo
+from src.utils.filters import (
+    ACCESORIOS, SOPORTES, PROTECCIONES, REFRIGERACION, DECORATIVOS, OTROS, PALABRAS_GPU, MUY_ESPECIFICAS,
+    filtrar_productos_irrelevantes
+)
+from src.database.database import contiene_palabra_prohibida
+
+DIRECTORIO_PRUEBAS = os.path.dirname(os.path.abspath(__file__))
+
+# Nombres con variantes, separadores y palabras clave que no aparecen en los archivos de prueba
+NOMBRES_EXTRA = [
+    "GeForce RTX4070Ti Super", "RTX 4080 Super OC", "rtx 4060 ti-super", "RTX-4070 tienda",
+    "RTX 4080 vs 4060", "nvidia 40704080", "RTX 4090 OC", "GTX 1660", "4060 sin marca",
+    "Cable de poder 12VHPWR para RTX 4080", "Soporte para tarjeta de video GeForce",
+    "Pasta térmica para GPU", "Base elevadora con ventilador", "Tarjeta gráfica RTX 4070 GDDR6X 12GB",
+    "Funda para laptop", "Kit PC gamer rtx 4060 + monitor", "Adaptador pci-e 16 pines",
+    "Water block hybrid icue para RTX 4080", "Computadora de escritorio con RTX  4070",
+]
+
+def detectar_modelo_legado(nombre_producto, modelos=MODELOS_BUSQUEDA):
+    """
+    detectar_modelo antes de compilar los patrones: prueba cada patrón de cada modelo
+    como subcadena del nombre.
+    """
+    nombre_lower = nombre_producto.lower()
+    if "rtx" in nombre_lower or "nvidia" in nombre_lower:
+        for modelo in modelos:
+            patrones = [
+                f"rtx{modelo}", f"rtx {modelo}", f"rtx-{modelo}",
+                f"{modelo}ti", f"{modelo} ti", f"{modelo}-ti",
+                f"{modelo}super", f"{modelo} super", f"{modelo}-super"
+            ]
+            if any(patron in nombre_lower for patron in patrones) or modelo in nombre_lower:
+                return f"RTX {modelo}"
+    rtx_pattern = re.search(r'rtx\s*(\d{4})', nombre_lower)
+    if rtx_pattern and rtx_pattern.group(1) in modelos:
+        return f"RTX {rtx_pattern.group(1)}"
+    return "Otro"
+
+def contiene_palabra_prohibida_legado(nombre):
+    """
+    contiene_palabra_prohibida antes de DetectorPalabras: una comparación por palabra.
+    """
+    nombre_lower = nombre.lower()
+    return any(palabra.lower() in nombre_lower for palabra in PALABRAS_PROHIBIDAS)
+
+def filtrar_productos_irrelevantes_legado(productos):
+    """
+    filtrar_productos_irrelevantes antes de DetectorPalabras: recorre cada lista de
+    palabras clave por producto.
+    """
+    palabras_prohibidas = ACCESORIOS + SOPORTES + PROTECCIONES + REFRIGERACION + DECORATIVOS + OTROS
+    productos_filtrados = []
+    for producto in productos:
+        nombre = producto.get('nombre', '').lower()
+        es_relevante = producto.get('precio', 0) >= 2000
+        prohibidas = [palabra for palabra in palabras_prohibidas if palabra.lower() in nombre]
+        gpu = [palabra for palabra in PALABRAS_GPU if palabra.lower() in nombre]
+        if len(prohibidas) > len(gpu):
+            es_relevante = False
+        if any(palabra in nombre for palabra in MUY_ESPECIFICAS):
+            es_relevante = False
+        if ('rtx' in nombre or 'geforce' in nombre) and not any(palabra in nombre for palabra in MUY_ESPECIFICAS):
+            es_relevante = True
+        if es_relevante:
+            productos_filtrados.append(producto)
+    return productos_filtrados
+
+def nombres_corpus():
+    """
+    Líneas de texto de los HTML de prueba (nombres de producto y demás textos de las
+    páginas) más NOMBRES_EXTRA.
+
+    Returns:
+        list: Nombres a comparar
+    """
+    nombres = []
+    archivos = sorted(glob.glob(os.path.join(DIRECTORIO_PRUEBAS, '*.txt')) + glob.glob(os.path.join(DIRECTORIO_PRUEBAS, '*.html')))
+    for archivo in archivos:
+        with open(archivo, encoding='utf-8', errors='ignore') as f:
+            texto = BeautifulSoup(f.read(), 'html.parser').get_text('\n')
+        nombres.extend(linea.strip() for linea in texto.split('\n') if 5 < len(linea.strip()) < 200)
+    return nombres + NOMBRES_EXTRA
+
+def productos_corpus(nombres):
+    """
+    Productos de prueba para el filtro de irrelevantes: cada nombre con un precio bajo y uno alto.
+    """
+    return [{'nombre': nombre, 'precio': precio} for nombre in nombres for precio in (500.0, 9999.0)]
+
+def medir(funcion, elementos, repeticiones):
+    """
+    Returns:
+        float: Microsegundos por elemento
+    """
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        for elemento in elementos:
+            funcion(elemento)
+    return (time.perf_counter() - inicio) / repeticiones / len(elementos) * 1e6
+
+if __name__ == "__main__":
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    nombres = nombres_corpus()
+    productos = productos_corpus(nombres)
+
+    assert [detectar_modelo_legado(n) for n in nombres] == [detectar_modelo(n) for n in nombres]
+    assert [contiene_palabra_prohibida_legado(n) for n in nombres] == [contiene_palabra_prohibida(n) for n in nombres]
+    assert filtrar_productos_irrelevantes_legado(productos) == filtrar_productos_irrelevantes(productos)
+    print(f"✅ Mismos resultados en {len(nombres)} nombres")
+
+    comparaciones = [
+        ("detectar_modelo", detectar_modelo_legado, detectar_modelo, nombres),
+        ("contiene_palabra_prohibida", contiene_palabra_prohibida_legado, contiene_palabra_prohibida, nombres),
+        ("filtrar_productos_irrelevantes",
+         lambda producto: filtrar_productos_irrelevantes_legado([producto]),
+         lambda producto: filtrar_productos_irrelevantes([producto]), productos),
+    ]
+    for nombre, legado, compilado, elementos in comparaciones:
+        antes = medir(legado, elementos, repeticiones)
+        despues = medir(compilado, elementos, repeticiones)
+        print(f"⏱️ {nombre}: {antes:.2f} µs → {despues:.2f} µs por elemento ({antes / despues:.1f}x)")
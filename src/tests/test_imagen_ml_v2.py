@@ -1,11 +1,15 @@
 import re
 import os
-import requests
+import sys
 from bs4 import BeautifulSoup
 import time
 import webbrowser
 from urllib.parse import urlparse, parse_qs
 
+# Permitir importar el paquete src al ejecutar el script directamente
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from src.utils.utils import get_session
+
 # Ejemplo de HTML que no muestra la imagen correctamente (productosinimagen.txt)
 html_sin_imagen = """
 <li class="ui-search-layout__item shops__layout-item"><div class="ui-search-result__wrapper"><div class="poly-card poly-card--list"><div class="poly-card__portada"><img width="150" height="150" decoding="async" src="https://http2.mlstatic.com/D_Q_NP_2X_997944-MLM82618465249_022025-V.webp" class="poly-component__picture" alt=""></div><div class="poly-card__content"><span class="poly-component__brand">ASUS</span><h3 class="poly-component__title-wrapper"><a href="https://articulo.mercadolibre.com.mx/MLM-2242582947-tarjeta-de-video-nvidia-geforce-rtx-4060-asus-dual-oc-8gb-_JM#polycard_client=search-nordic&amp;position=27&amp;search_layout=stack&amp;type=item&amp;tracking_id=9bd0cc79-fa06-4951-83d2-68fa6556c143" target="_self" class="poly-component__title">Tarjeta De Video Nvidia Geforce Rtx 4060 Asus Dual Oc, 8gb</a></h3><span class="poly-component__seller">Por PCEL <svg aria-label="Tienda oficial" width="12" height="12" viewBox="0 0 12 12" role="img"><use href="#poly_cockade"></use></svg></span><div class="poly-component__price"><div class="poly-price__current"><span class="andes-money-amount andes-money-amount--cents-superscript" style="font-size:24px" role="img" aria-label="7399 pesos mexicanos" aria-roledescription="Monto"><span class="andes-money-amount__currency-symbol" aria-hidden="true">$</span><span class="andes-money-amount__fraction" aria-hidden="true">7,399</span></span></div><span style="color:#000000e6" class="poly-price__installments"><span class="poly-phrase-label">en</span> 24 meses de <span class="andes-money-amount poly-phrase-price andes-money-amount--cents-dot" style="font-size:inherit" role="img" aria-label="447 pesos mexicanos con 12 centavos" aria-roledescription="Monto"><span class="andes-money-amount__currency-symbol" aria-hidden="true">$</span><span class="andes-money-amount__fraction" aria-hidden="true">447</span><span aria-hidden="true">.</span><span class="andes-money-amount__cents" aria-hidden="true">12</span></span></span></div><div class="poly-component__shipping">Envío gratis</div></div><div class="poly-component__bookmark"><button type="button" class="poly-bookmark__btn" role="switch" aria-checked="false" aria-label="Favorito"><svg class="poly-bookmark__icon-full" width="20" height="20" viewBox="0 0 20 20"><use href="#poly_bookmark"></use></svg><svg class="poly-bookmark__icon-empty" width="20" height="20" viewBox="0 0 20 20"><use href="#poly_bookmark"></use></svg></button></div></div></div></li>
@@ -84,7 +88,7 @@ def verificar_url_imagen(url):
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
-        response = requests.head(url, headers=headers, timeout=5)
+        response = get_session(url).head(url, headers=headers, timeout=5)
         return response.status_code == 200
     except Exception as e:
         print(f"Error verificando URL {url}: {e}")
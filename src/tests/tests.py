@@ -1,17 +1,52 @@
 import unittest
 import os
 import json
+import pickle
+import time
+import asyncio
+import tempfile
+import shutil
+import threading
+import importlib.util
+from datetime import datetime
+from http.server import HTTPServer, BaseHTTPRequestHandler
 from bs4 import BeautifulSoup
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 
 # Importar funciones a probar
 from scrapers.amazon_scraper import scrape_amazon_page
 from scrapers.mercadolibre_scraper import scrape_mercadolibre_page
 from scrapers.newegg_scraper import scrape_newegg_page
-from scrapers.base_scraper import detectar_modelo, crear_producto_base, filtrar_productos_validos
-from filters import filtrar_productos_irrelevantes, filtrar_productos_por_busqueda
-from database import crear_tabla, guardar_en_db, obtener_historial_precios
-from utils import get_random_user_agent, get_headers
+from scrapers.mercadolibre_scraper import extraer_productos_json as extraer_json_mercadolibre
+from scrapers.mercadolibre_scraper import extraer_productos_dom as extraer_dom_mercadolibre
+from scrapers.mercadolibre_scraper import ESPECIFICACION_MERCADOLIBRE_COMPILADA
+from scrapers.aliexpress_scraper import scrape_aliexpress_page
+from scrapers.base_scraper import detectar_modelo, crear_producto_base, filtrar_productos_validos, extraer_json_embebido, decodificar_html, crear_soup
+from scrapers.base_scraper import compilar_selector, compilar_especificacion, extraer_productos, convertir_precio
+from scrapers.base_scraper import extraer_productos_incremental, scrape_incremental, detectar_modelo_y_variante
+from filters import filtrar_productos_irrelevantes, filtrar_productos_por_busqueda, filtrar_pagina, DetectorPalabras
+from database import crear_tabla, guardar_en_db, guardar_lote_en_db, obtener_historial_precios, contiene_palabra_prohibida
+from utils import get_random_user_agent, get_headers, get_session, identificar_sitio, cerrar_sesiones, requiere_navegador, fetch_with_requests, cuerpo_html, fetch_por_trozos
+from pipeline import ejecutar_pipeline
+from engine import fetch_page_async
+from dedupe import IndiceProductos
+from parse_pool import PoolParseo
+from product import Producto
+from batch import LoteProductos
+import sqlite3
+from pagination import url_siguiente_pagina
+from rate_limit import LimitadorHosts, interpretar_retry_after, es_error_conexion
+from proxy_pool import PoolProxies
+from strategy import SelectorEstrategias, pagina_sin_resultados
+from utils import fetch_page
+import block_detection
+from block_detection import clasificar_pagina, revisar_pagina, RegistroBloqueos
+from browser_pool import PoolSelenium
+from playwright_renderer import RenderizadorPlaywright
+from http_cache import CacheHTTP
+from archive import ArchivoHTML
+from resource_blocking import debe_bloquear, patrones_bloqueo_selenium, estadisticas_selenium, instalar_bloqueo_playwright
+from benchmark_matchers import nombres_corpus, productos_corpus, detectar_modelo_legado, contiene_palabra_prohibida_legado, filtrar_productos_irrelevantes_legado
 
 # Directorio para almacenar archivos HTML de prueba
 TEST_DATA_DIR = "test_data"
@@ -147,6 +182,243 @@ class TestScrapers(unittest.TestCase):
             self.assertIn('MSI', producto['vendedor'])
             self.assertIn('N82E16814137771', producto['id_producto'])
 
+class TestJsonEmbebido(unittest.TestCase):
+    """Pruebas para la extracción de productos desde JSON embebido o capturado"""
+    
+    def test_extraer_json_embebido(self):
+        """Prueba que se decodifica el JSON que sigue a cada marcador"""
+        html = '<script>window.__PRELOADED_STATE__ = {"a": [1, 2]};</script><script>var x = 1;</script>'
+        self.assertEqual(extraer_json_embebido(html, ['__PRELOADED_STATE__']), [{"a": [1, 2]}])
+        self.assertEqual(extraer_json_embebido(html, ['runParams']), [])
+    
+    def test_mercadolibre_polycard(self):
+        """Prueba la conversión de resultados polycard de MercadoLibre"""
+        estado = {"pageState": {"initialState": {"results": [{"id": "POLYCARD", "polycard": {
+            "metadata": {"id": "MLM2242582947", "url": "articulo.mercadolibre.com.mx/MLM-2242582947-tarjeta-rtx-4060-_JM"},
+            "pictures": {"pictures": [{"id": "997944-MLM82618465249_022025"}]},
+            "components": [
+                {"type": "title", "title": {"text": "Tarjeta De Video Nvidia Geforce Rtx 4060 Asus Dual Oc, 8gb"}},
+                {"type": "price", "price": {"current_price": {"value": 7399, "currency": "MXN"}}},
+                {"type": "seller", "seller": {"text": "Por {PCEL}"}}
+            ]
+        }}]}}}
+        html = f'<script id="__PRELOADED_STATE__" type="application/json">{json.dumps(estado)}</script>'
+        
+        productos = extraer_json_mercadolibre(html)
+        
+        self.assertEqual(len(productos), 1)
+        producto = productos[0]
+        self.assertEqual(producto['id_producto'], 'MLM2242582947')
+        self.assertEqual(producto['modelo'], 'RTX 4060')
+        self.assertEqual(producto['precio'], 7399.0)
+        self.assertEqual(producto['vendedor'], 'PCEL')
+        self.assertTrue(producto['link'].startswith('https://articulo.mercadolibre.com.mx/'))
+        
+        # El scraper acepta la página sin decodificar (bytes o memoryview)
+        self.assertEqual(scrape_mercadolibre_page(memoryview(html.encode('utf-8'))), scrape_mercadolibre_page(html))
+        self.assertIn('D_NQ_NP_997944-MLM82618465249_022025-F.webp', producto['imagen'])
+    
+    def test_aliexpress_xhr_capturado(self):
+        """Prueba que AliExpress usa el JSON capturado del XHR sin recorrer el DOM"""
+        respuesta = {"data": {"result": {"mods": {"itemList": {"content": [{
+            "productId": "1005006",
+            "title": {"displayTitle": "Tarjeta gráfica NVIDIA GeForce RTX 4070 12GB GDDR6X"},
+            "prices": {"salePrice": {"minPrice": 650.0, "currencyCode": "USD"}},
+            "image": {"imgUrl": "//ae01.alicdn.com/kf/a.jpg"},
+            "store": {"storeName": "GPU Store"}
+        }]}}}}}
+        html = f'<html></html>\n<script type="application/json" data-xhr-capturado="https://es.aliexpress.com/fn/search-pc/index">{json.dumps(respuesta)}</script>'
+        
+        productos = scrape_aliexpress_page(html)
+        
+        self.assertEqual(len(productos), 1)
+        self.assertEqual(productos[0]['id_producto'], '1005006')
+        self.assertEqual(productos[0]['link'], 'https://es.aliexpress.com/item/1005006.html')
+        self.assertEqual(productos[0]['imagen'], 'https://ae01.alicdn.com/kf/a.jpg')
+        self.assertAlmostEqual(productos[0]['precio'], 650.0 * 17.5)
+
+class TestParserHTML(unittest.TestCase):
+    """Pruebas para el backend de parser HTML configurable por sitio"""
+    
+    @unittest.skipUnless(importlib.util.find_spec('lxml'), "lxml no está instalado")
+    def test_paridad_backends(self):
+        """Prueba que lxml extrae los mismos productos que html.parser de una página real de MercadoLibre"""
+        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "html.txt"), encoding="utf-8") as f:
+            html = f.read()
+        
+        resultados = {}
+        for parser in ('html.parser', 'lxml'):
+            with patch.dict('src.config.config.PARSER_HTML_POR_SITIO', {'mercadolibre': parser}):
+                self.assertEqual(crear_soup(html, 'mercadolibre').builder.NAME, parser)
+                resultados[parser] = extraer_dom_mercadolibre(html)
+        
+        self.assertEqual(len(resultados['html.parser']), 50)
+        self.assertEqual(resultados['lxml'], resultados['html.parser'])
+    
+    def test_parser_no_instalado(self):
+        """Prueba que si el backend configurado no está instalado se usa html.parser"""
+        with patch.dict('src.config.config.PARSER_HTML_POR_SITIO', {'newegg': 'parser-inexistente'}), \
+             patch('scrapers.base_scraper._parsers_no_disponibles', set()) as no_disponibles:
+            soup = crear_soup(b'<div class="item-cell">ok</div>', 'newegg')
+            self.assertEqual(no_disponibles, {'parser-inexistente'})
+        
+        self.assertEqual(soup.builder.NAME, 'html.parser')
+        self.assertEqual(soup.find('div', class_='item-cell').text, 'ok')
+    
+    def test_parseo_parcial(self):
+        """Prueba que el parseo parcial solo construya los contenedores y extraiga los mismos productos"""
+        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "html.txt"), encoding="utf-8") as f:
+            html = f.read()
+        html = '<header><a href="/">Inicio</a></header><script>var x = 1;</script>' + html
+        
+        soup = crear_soup(html, 'mercadolibre', ESPECIFICACION_MERCADOLIBRE_COMPILADA)
+        self.assertIsNone(soup.find('header'))
+        self.assertTrue(all('ui-search-layout__item' in hijo.get('class', []) for hijo in soup.contents))
+        
+        parcial = extraer_dom_mercadolibre(html)
+        with patch('src.scrapers.base_scraper.PARSEO_PARCIAL', False):
+            completo = extraer_dom_mercadolibre(html)
+        self.assertEqual(len(parcial), 50)
+        self.assertEqual(parcial, completo)
+    
+    def test_parseo_parcial_sin_contenedores(self):
+        """Prueba que si ningún contenedor coincide se parsee la página completa"""
+        soup = crear_soup('<html><body><div class="otro">x</div></body></html>', 'mercadolibre', ESPECIFICACION_MERCADOLIBRE_COMPILADA)
+        self.assertEqual(soup.find('div', class_='otro').text, 'x')
+
+class TestEspecificacionSelectores(unittest.TestCase):
+    """Pruebas para las especificaciones declarativas de selectores por sitio"""
+    
+    def test_compilar_selector(self):
+        """Prueba que los selectores simples se evalúen igual que en CSS"""
+        atributos = {'class': 'a b', 'data-sku': '1', 'data-tipo': 'poly-card'}
+        self.assertTrue(compilar_selector('div')('div', atributos))
+        self.assertTrue(compilar_selector('div.a.b')('div', atributos))
+        self.assertTrue(compilar_selector('div.a.b')('div', dict(atributos, **{'class': ['a', 'b']})))
+        self.assertTrue(compilar_selector('[data-sku]')('div', atributos))
+        self.assertTrue(compilar_selector('div[data-sku="1"]')('div', atributos))
+        self.assertTrue(compilar_selector('div[data-tipo*="card"]')('div', atributos))
+        self.assertFalse(compilar_selector('span.a')('div', atributos))
+        self.assertFalse(compilar_selector('div.c')('div', atributos))
+        self.assertFalse(compilar_selector('div[data-sku="2"]')('div', atributos))
+        with self.assertRaises(ValueError):
+            compilar_selector('div > a')
+    
+    def test_extraer_productos(self):
+        """Prueba la extracción con alternativas, campos requeridos, valores por defecto y duplicados"""
+        especificacion = compilar_especificacion({
+            'tienda': 'Prueba',
+            'items': ['li.producto', 'div.producto'],
+            'campos': {
+                'id_producto': {'selectores': ['@data-id'], 'requerido': True},
+                'nombre': {'selectores': ['h2 span', 'h2'], 'defecto': "Nombre no disponible"},
+                'precio': {'selectores': ['span.precio'], 'transformar': convertir_precio, 'defecto': 0.0},
+                'link': {'selectores': ['a@href']},
+                'imagen': {'selectores': ['img@src']},
+                'vendedor': {'selectores': ['span.vendedor'], 'defecto': "Tienda"}
+            }
+        })
+        html = """
+            <div class="producto" data-id="1"><h2><span>RTX 4070</span></h2>
+                <span class="precio">$12,999.00</span><a href="/p/1">ver</a><span class="vendedor">Juan</span></div>
+            <div class="producto" data-id="1"><h2>RTX 4070 repetida</h2></div>
+            <div class="producto"><h2>Sin ID</h2></div>
+            <div class="producto" data-id="2"><h2>RTX 4080</h2></div>
+        """
+        productos = extraer_productos(BeautifulSoup(html, 'html.parser'), especificacion)
+        
+        self.assertEqual([p['id_producto'] for p in productos], ['1', '2'])
+        self.assertEqual(productos[0]['nombre'], 'RTX 4070')
+        self.assertEqual(productos[0]['precio'], 12999.0)
+        self.assertEqual(productos[0]['link'], '/p/1')
+        self.assertEqual(productos[0]['vendedor'], 'Juan')
+        self.assertEqual(productos[1]['nombre'], 'RTX 4080')
+        self.assertEqual(productos[1]['precio'], 0.0)
+        self.assertEqual(productos[1]['vendedor'], 'Tienda')
+        self.assertEqual(productos[0]['tienda'], 'Prueba')
+
+class TestParserIncremental(unittest.TestCase):
+    """Pruebas para la descarga y el parseo incremental de páginas"""
+    
+    ESPECIFICACION = compilar_especificacion({
+        'tienda': 'Prueba',
+        'items': ['div.producto'],
+        'campos': {
+            'id_producto': {'selectores': ['@data-id'], 'requerido': True},
+            'nombre': {'selectores': ['h2']},
+            'precio': {'selectores': ['span.precio'], 'transformar': convertir_precio, 'defecto': 0.0},
+            'link': {'selectores': ['a@href']},
+            'imagen': {'selectores': ['img@src']}
+        }
+    })
+    
+    def trozos(self, html, tamano, leidos):
+        """Entrega el HTML por trozos y anota cuántos se leyeron y si se cerró el generador"""
+        try:
+            for inicio in range(0, len(html), tamano):
+                leidos['trozos'] += 1
+                yield html[inicio:inicio + tamano]
+        finally:
+            leidos['cerrado'] = True
+    
+    def producto(self, indice):
+        return (f'<div class="producto" data-id="{indice}"><h2>Tarjeta NVIDIA RTX 4070 #{indice}</h2>'
+                f'<span class="precio">$12,{indice:03d}.00</span><a href="/p/{indice}">ver</a></div>')
+    
+    def test_paridad_pagina_completa(self):
+        """Prueba que el parseo incremental extraiga los mismos productos que el parseo completo"""
+        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "html.txt"), encoding="utf-8") as f:
+            html = f.read().encode('utf-8')
+        leidos = {'trozos': 0}
+        
+        productos = list(extraer_productos_incremental(self.trozos(html, 1000, leidos), 'mercadolibre', ESPECIFICACION_MERCADOLIBRE_COMPILADA))
+        
+        self.assertEqual(len(productos), 50)
+        self.assertEqual(productos, extraer_dom_mercadolibre(html))
+        self.assertTrue(leidos['cerrado'])
+    
+    def test_corta_al_terminar_resultados(self):
+        """Prueba que la lectura se detenga en la paginación sin descargar el resto de la página"""
+        html = ('<html><body><div class="pagination">arriba</div>' + self.producto(1) + self.producto(2) +
+                '<nav class="ui-pagination">siguiente</nav>' + self.producto(3) + '<footer>' + 'x' * 5000 + '</footer>')
+        leidos = {'trozos': 0}
+        
+        productos = list(extraer_productos_incremental(self.trozos(html.encode('utf-8'), 100, leidos), 'prueba', self.ESPECIFICACION))
+        
+        self.assertEqual([p['id_producto'] for p in productos], ['1', '2'])
+        self.assertTrue(leidos['cerrado'])
+        self.assertLess(leidos['trozos'], len(html) // 100)
+    
+    def test_maximo_de_productos(self):
+        """Prueba que scrape_incremental entregue cada producto filtrado y deje de leer al llegar al máximo"""
+        html = '<html><body>' + ''.join(self.producto(i) for i in range(1, 30)) + '</body></html>'
+        leidos = {'trozos': 0}
+        
+        productos = scrape_incremental(self.trozos(html.encode('utf-8'), 200, leidos), 'prueba', self.ESPECIFICACION, max_productos=3)
+        primero = next(productos)
+        self.assertEqual(primero['id_producto'], '1')
+        self.assertEqual(primero['modelo'], 'RTX 4070')
+        self.assertLessEqual(leidos['trozos'], 2)
+        
+        self.assertEqual(len(list(productos)), 2)
+        self.assertTrue(leidos['cerrado'])
+        self.assertLess(leidos['trozos'], len(html) // 200)
+    
+    @patch('utils.get_session')
+    def test_fetch_por_trozos(self, mock_get_session):
+        """Prueba que la descarga por trozos respete la codificación de la cabecera y se corte al cerrar el generador"""
+        respuesta = MagicMock(status_code=200, headers={'Content-Type': 'text/html; charset=ISO-8859-1'})
+        respuesta.iter_content.return_value = iter([b'<p>Gr\xe1fica</p>', b'<p>otra</p>', b'<p>fin</p>'])
+        mock_get_session.return_value.get.return_value = respuesta
+        
+        with patch('src.utils.rate_limit.limitador_hosts.esperar', return_value=True):
+            trozos = fetch_por_trozos("https://www.newegg.com/p/pl?d=rtx+4070", usar_cache=False)
+            self.assertEqual(next(trozos), '<p>Gráfica</p>')
+            trozos.close()
+        
+        self.assertTrue(mock_get_session.return_value.get.call_args.kwargs['stream'])
+        respuesta.__exit__.assert_called_once()
+
 class TestFuncionesBase(unittest.TestCase):
     """Pruebas para las funciones base del scraper"""
     
@@ -157,6 +429,29 @@ class TestFuncionesBase(unittest.TestCase):
         self.assertEqual(detectar_modelo("ASUS ROG Strix GeForce RTX 4090 OC"), "RTX 4090")
         self.assertEqual(detectar_modelo("Tarjeta de video GTX 1660"), "Otro")
     
+    def test_detectar_modelo_y_variante(self):
+        """Prueba que el modelo y la variante se detecten en una sola pasada"""
+        self.assertEqual(detectar_modelo_y_variante("GeForce RTX4070Ti  Super"), ("RTX 4070", "Ti Super"))
+        self.assertEqual(detectar_modelo_y_variante("MSI RTX 4080-Super OC"), ("RTX 4080", "Super"))
+        self.assertEqual(detectar_modelo_y_variante("RTX 4060 tienda oficial"), ("RTX 4060", ""))
+        # Gana el primer modelo de la lista, no el primero que aparece en el nombre
+        self.assertEqual(detectar_modelo_y_variante("RTX 4080 vs 4060 Ti"), ("RTX 4060", "Ti"))
+        self.assertEqual(detectar_modelo_y_variante("Tarjeta 4070 sin marca"), ("Otro", ""))
+    
+    def test_detectar_modelo_cambio_de_lista(self):
+        """Prueba que la expresión se vuelva a compilar cuando cambia la lista de modelos"""
+        self.assertEqual(detectar_modelo("NVIDIA RTX 4090 OC"), "Otro")
+        with patch('scrapers.base_scraper.MODELOS_BUSQUEDA', ['4090', '4070']):
+            self.assertEqual(detectar_modelo("NVIDIA RTX 4090 OC"), "RTX 4090")
+        self.assertEqual(detectar_modelo("NVIDIA RTX 4090 OC"), "Otro")
+    
+    def test_decodificar_html(self):
+        """Prueba que los bytes se decodifican con la codificación que declara el documento (o UTF-8)"""
+        latin = '<html><head><meta charset="windows-1252"></head><p>Tarjeta de vídeo</p></html>'
+        self.assertEqual(decodificar_html(memoryview(latin.encode('cp1252'))), latin)
+        self.assertEqual(decodificar_html("<p>ñ</p>".encode('utf-8')), "<p>ñ</p>")
+        self.assertEqual(decodificar_html("<p>ñ</p>"), "<p>ñ</p>")
+    
     def test_crear_producto_base(self):
         """Prueba la creación de un producto base"""
         producto = crear_producto_base(
@@ -178,6 +473,29 @@ class TestFuncionesBase(unittest.TestCase):
         self.assertEqual(producto['id_producto'], "B0BHJJ2NHT")
         self.assertEqual(producto['vendedor'], "ASUS Store")
     
+    def test_producto_compacto(self):
+        """Prueba que el registro compacto se lea como diccionario y se convierta para la base de datos"""
+        datos = {
+            'tienda': "Amazon", 'modelo': "RTX 4070", 'nombre': "ASUS TUF RTX 4070", 'precio': 12999.0,
+            'vendedor': "".join(["ASUS ", "Store"]), 'link': "https://example.com/p", 'imagen': "https://example.com/i.jpg",
+            'id_producto': "B0BHJJ2NHT"
+        }
+        producto = Producto.desde_dict(dict(datos, fecha="2024-01-01"))
+        
+        self.assertFalse(hasattr(producto, '__dict__'))
+        self.assertEqual(producto, datos)
+        self.assertEqual(dict(producto), datos)
+        self.assertEqual(producto.precio, producto['precio'])
+        self.assertIsNone(producto.get('fecha'))
+        self.assertNotIn('keys', producto)
+        with self.assertRaises(KeyError):
+            producto['a_dict']
+        # Los textos repetidos entre productos se comparten
+        self.assertIs(producto['vendedor'], Producto.desde_dict(datos)['vendedor'])
+        self.assertEqual(producto.a_dict(fecha="2024-01-01")['fecha'], "2024-01-01")
+        self.assertEqual(pickle.loads(pickle.dumps(producto)), producto)
+        self.assertEqual(json.loads(json.dumps(producto.a_dict())), datos)
+    
     def test_filtrar_productos_validos(self):
         """Prueba el filtrado de productos válidos"""
         productos = [
@@ -208,6 +526,27 @@ class TestFuncionesBase(unittest.TestCase):
         self.assertIn('ASUS TUF Gaming', filtrados[0]['nombre'])
         self.assertIn('MSI Gaming X Trio', filtrados[1]['nombre'])
     
+    def test_detector_palabras(self):
+        """Prueba que el detector encuentre en una pasada lo mismo que buscar cada palabra"""
+        categorias = {'prohibidas': ['pin', 'pines', 'thermal', 'thermal paste', 'art', 'PC', 'pin'], 'gpu': ['rtx', 'gpu']}
+        detector = DetectorPalabras(categorias)
+        for nombre in ['cable de pines rtx', 'thermal paste para gpu', 'smartphone', 'pc gamer rtx 4070', '']:
+            esperadas = {palabra.lower() for palabras in categorias.values() for palabra in palabras if palabra.lower() in nombre}
+            conteo, encontradas = detector.contar(nombre)
+            self.assertEqual(encontradas, esperadas)
+            # Las palabras repetidas en la lista cuentan cada vez, como en el filtro original
+            self.assertEqual(conteo['prohibidas'], sum(palabra.lower() in nombre for palabra in categorias['prohibidas']))
+    
+    def test_equivalencia_con_bucles_originales(self):
+        """Prueba que la detección compilada dé lo mismo que los bucles de subcadenas que reemplazó"""
+        nombres = nombres_corpus()
+        self.assertEqual([detectar_modelo(n) for n in nombres], [detectar_modelo_legado(n) for n in nombres])
+        with patch('scrapers.base_scraper.MODELOS_BUSQUEDA', ['4090', '4070']):
+            self.assertEqual([detectar_modelo(n) for n in nombres], [detectar_modelo_legado(n, ['4090', '4070']) for n in nombres])
+        self.assertEqual([contiene_palabra_prohibida(n) for n in nombres], [contiene_palabra_prohibida_legado(n) for n in nombres])
+        productos = productos_corpus(nombres)
+        self.assertEqual(filtrar_productos_irrelevantes(productos), filtrar_productos_irrelevantes_legado(productos))
+    
     def test_filtrar_productos_por_busqueda(self):
         """Prueba el filtrado de productos por búsqueda"""
         productos = [
@@ -245,6 +584,1066 @@ class TestUtils(unittest.TestCase):
         self.assertIsNotNone(headers)
         self.assertIn('User-Agent', headers)
         self.assertIn('Accept-Language', headers)
+    
+    def test_get_session_por_host(self):
+        """Prueba que las sesiones se reutilizan por host y comparten cookies por sitio"""
+        try:
+            sesion_busqueda = get_session("https://www.amazon.com.mx/s?k=rtx+4070")
+            self.assertIs(sesion_busqueda, get_session("https://www.amazon.com.mx/dp/B0BHJJ2NHT"))
+            
+            sesion_imagenes = get_session("https://m.media-amazon.com/images/I/abc.jpg")
+            self.assertIsNot(sesion_busqueda, sesion_imagenes)
+            self.assertIs(sesion_busqueda.cookies, sesion_imagenes.cookies)
+            
+            sesion_ml = get_session("https://listado.mercadolibre.com.mx/rtx-4070")
+            self.assertIsNot(sesion_busqueda.cookies, sesion_ml.cookies)
+            self.assertEqual(identificar_sitio("https://articulo.mercadolibre.com.mx/MLM-1"), 'mercadolibre')
+        finally:
+            cerrar_sesiones()
+
+    def test_cuerpo_html(self):
+        """Prueba que el cuerpo se entrega sin decodificar salvo que la cabecera contradiga al documento"""
+        cuerpo = '<meta charset="utf-8"><p>ñ</p>'.encode('utf-8')
+        self.assertIs(cuerpo_html(cuerpo, 'text/html; charset=UTF-8'), cuerpo)
+        self.assertIs(cuerpo_html(cuerpo, 'text/html'), cuerpo)
+        self.assertIs(cuerpo_html(cuerpo), cuerpo)
+        
+        latin = '<p>ñ</p>'.encode('latin-1')
+        self.assertEqual(cuerpo_html(latin, 'text/html; charset=ISO-8859-1'), '<p>ñ</p>')
+
+class TestEngine(unittest.TestCase):
+    """Pruebas para el motor asíncrono de scraping"""
+    
+    def setUp(self):
+        # Turno inmediato del host y sin caché HTTP
+        for objetivo, valor in (('src.utils.rate_limit.limitador_hosts._reservar', (0.0, None)), ('pipeline.pagina_en_cache', None)):
+            parche = patch(objetivo, return_value=valor)
+            parche.start()
+            self.addCleanup(parche.stop)
+    
+    @patch('pipeline.fetch_page_async')
+    def test_busquedas_concurrentes(self, mock_fetch):
+        """Prueba que las búsquedas se descargan en paralelo y cada página llega a su parser"""
+        async def fetch_lento(session, url, **kwargs):
+            await asyncio.sleep(0.2)
+            return f"<html>{url}</html>"
+        mock_fetch.side_effect = fetch_lento
+        
+        busquedas = [
+            {'sitio': sitio, 'modelo': modelo, 'url': f"https://{sitio}.com/{modelo}", 'parser': None}
+            for sitio in ('amazon', 'newegg') for modelo in ('4060', '4070')
+        ]
+        procesadas = []
+        
+        def extraer(busqueda, html, productos):
+            procesadas.append(busqueda['url'])
+            return [{'id_producto': busqueda['url'], 'html': html}]
+        
+        inicio = time.monotonic()
+        productos = asyncio.run(ejecutar_pipeline(busquedas, extraer, lambda productos: None, lambda productos: None, max_paginas=1))
+        duracion = time.monotonic() - inicio
+        
+        self.assertEqual(len(productos), 4)
+        self.assertEqual(sorted(procesadas), sorted(b['url'] for b in busquedas))
+        self.assertLess(duracion, 0.6)
+    
+    @patch('pipeline.fetch_page_async')
+    def test_paginacion_con_prefetch(self, mock_fetch):
+        """Prueba que la página siguiente se descarga mientras se procesa la actual y que la búsqueda se detiene sin ids nuevos"""
+        eventos = []
+        paginas = {
+            "https://www.amazon.com.mx/s?k=rtx+4070": '<a class="s-pagination-next" href="/s?k=rtx+4070&amp;page=2">',
+            "https://www.amazon.com.mx/s?k=rtx+4070&page=2": '<a class="s-pagination-next" href="/s?k=rtx+4070&amp;page=3">',
+            "https://www.amazon.com.mx/s?k=rtx+4070&page=3": '<a class="s-pagination-next" href="/s?k=rtx+4070&amp;page=4">'
+        }
+        
+        async def fetch(session, url, **kwargs):
+            eventos.append(('descarga', url))
+            return paginas[url]
+        mock_fetch.side_effect = fetch
+        
+        def extraer(busqueda, html, productos):
+            time.sleep(0.05)
+            eventos.append(('procesada', busqueda['url']))
+            # Las páginas 2 y 3 repiten los mismos productos
+            return [{'id_producto': 'A1' if busqueda['pagina'] > 1 else 'A0'}, {'id_producto': 'A1'}]
+        
+        busqueda = {'sitio': 'amazon', 'modelo': '4070', 'url': "https://www.amazon.com.mx/s?k=rtx+4070", 'parser': None}
+        productos = asyncio.run(ejecutar_pipeline([busqueda], extraer, lambda productos: None, lambda productos: None,
+                                                  max_paginas=5, deduplicar=False))
+        
+        self.assertEqual(len(productos), 4)
+        self.assertLess(
+            eventos.index(('descarga', "https://www.amazon.com.mx/s?k=rtx+4070&page=2")),
+            eventos.index(('procesada', "https://www.amazon.com.mx/s?k=rtx+4070"))
+        )
+        self.assertNotIn(('procesada', "https://www.amazon.com.mx/s?k=rtx+4070&page=3"), eventos)
+    
+    @patch('engine.descartar_de_cache')
+    @patch('engine.revisar_pagina', return_value=None)
+    @patch('engine.selector_estrategias')
+    @patch('engine.fetch_con_estrategia_async')
+    def test_pagina_siguiente_sin_resultados(self, mock_fetch, mock_selector, mock_revisar, mock_descartar):
+        """Prueba que una página siguiente vacía termine la búsqueda sin contar como fallo de la estrategia"""
+        mock_fetch.return_value = "<html>No hay publicaciones que coincidan</html>"
+        mock_selector.plan.return_value = ['requests', 'playwright', 'selenium']
+        mock_selector.registrar.return_value = False
+        url = "https://www.newegg.com/p/pl?d=rtx+4070&page=3"
+        
+        self.assertIsNone(asyncio.run(fetch_page_async(None, url, continuacion=True)))
+        mock_fetch.assert_awaited_once()
+        mock_selector.registrar.assert_not_called()
+        
+        # En la primera página sí es un fallo de la estrategia y se prueban las demás
+        asyncio.run(fetch_page_async(None, url.replace("&page=3", "")))
+        self.assertEqual(mock_fetch.await_count, 4)
+        self.assertEqual(mock_selector.registrar.call_count, 3)
+    
+    def test_url_siguiente_pagina(self):
+        """Prueba la detección del enlace siguiente y las plantillas por número de página y desplazamiento"""
+        ml = "https://listado.mercadolibre.com.mx/rtx-4070"
+        siguiente_ml = '<li class="andes-pagination__button andes-pagination__button--next">'
+        self.assertEqual(url_siguiente_pagina(ml, ml, siguiente_ml, 1), ml + "_Desde_51")
+        self.assertEqual(url_siguiente_pagina(ml, ml + "_Desde_51", siguiente_ml.encode('utf-8'), 2), ml + "_Desde_101")
+        newegg = "https://www.newegg.com/p/pl?d=rtx+4070"
+        self.assertEqual(url_siguiente_pagina(newegg, newegg, '<div class="item-cell">' * 36, 1), newegg + "&page=2")
+        # Sin control de página siguiente y con menos de una página completa, la búsqueda termina
+        self.assertIsNone(url_siguiente_pagina(newegg, newegg, '<div class="item-cell">' * 5, 1))
+        self.assertIsNone(url_siguiente_pagina(ml, ml, "", 1))
+        amazon = "https://www.amazon.com.mx/s?k=rtx+4070"
+        self.assertIsNone(url_siguiente_pagina(amazon, amazon, '<span class="s-pagination-next s-pagination-disabled">', 3))
+        enlace = b'<a href="/s?k=rtx+4070&amp;page=2" class="s-pagination-item s-pagination-next">Siguiente</a>'
+        self.assertEqual(url_siguiente_pagina(amazon, amazon, enlace, 1), "https://www.amazon.com.mx/s?k=rtx+4070&page=2")
+
+class TestPoolParseo(unittest.TestCase):
+    """Pruebas para el parseo de páginas en un pool de procesos"""
+    
+    @classmethod
+    def setUpClass(cls):
+        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "html.txt"), encoding="utf-8") as f:
+            cls.html = f.read().encode('utf-8')
+        cls.pool = PoolParseo(procesos=2, max_pendientes=1)
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.cerrar()
+    
+    def test_parseo_igual_que_en_proceso(self):
+        """Prueba que el pool devuelva los mismos productos que scrape_mercadolibre_page"""
+        self.assertEqual(self.pool.parsear('mercadolibre', self.html), scrape_mercadolibre_page(self.html))
+    
+    @patch('pipeline.pagina_en_cache', return_value=None)
+    @patch('src.utils.rate_limit.limitador_hosts._reservar', return_value=(0.0, None))
+    @patch('pipeline.fetch_page_async')
+    def test_pipeline_con_pool(self, mock_fetch, mock_reservar, mock_cache):
+        """Prueba que el pipeline parsee en el pool y la extracción reciba los productos ya parseados"""
+        async def fetch(session, url, **kwargs):
+            return self.html
+        mock_fetch.side_effect = fetch
+        recibidos = []
+        
+        def extraer(busqueda, html, productos):
+            recibidos.append((busqueda['modelo'], len(productos)))
+            return productos
+        
+        busquedas = [
+            {'sitio': 'mercadolibre', 'modelo': modelo, 'url': f"https://listado.mercadolibre.com.mx/rtx-{modelo}", 'parser': None}
+            for modelo in ('4060', '4070', '4080')
+        ]
+        esperados = scrape_mercadolibre_page(self.html)
+        productos = asyncio.run(ejecutar_pipeline(busquedas, extraer, lambda productos: None, lambda productos: None,
+                                                  max_paginas=1, pool_parseo=self.pool, deduplicar=False))
+        
+        self.assertEqual(sorted(recibidos), [(modelo, len(esperados)) for modelo in ('4060', '4070', '4080')])
+        self.assertEqual(productos, esperados * 3)
+        self.assertTrue(self.pool._cupos.acquire(blocking=False))
+        self.pool._cupos.release()
+    
+    def test_cancelacion_no_pierde_cupos(self):
+        """Prueba que cancelar una página que espera lugar en la cola no deje el lugar ocupado"""
+        pool = PoolParseo(procesos=1, max_pendientes=1)
+        
+        async def cancelar():
+            pool._cupos.acquire()
+            tarea = asyncio.create_task(pool.parsear_async('mercadolibre', self.html))
+            await asyncio.sleep(0.05)
+            tarea.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await tarea
+            # El hilo que esperaba toma el lugar al liberarse y lo devuelve
+            pool._cupos.release()
+            await asyncio.sleep(0.1)
+        asyncio.run(cancelar())
+        
+        self.assertTrue(pool._cupos.acquire(blocking=False))
+        pool._cupos.release()
+        pool.cerrar()
+
+class TestPipeline(unittest.TestCase):
+    """Pruebas para la corrida por etapas con colas acotadas"""
+    
+    def setUp(self):
+        self.busquedas = [
+            {'sitio': 'newegg', 'modelo': modelo, 'url': f"https://www.newegg.com/p/pl?d=rtx+{modelo}", 'parser': None}
+            for modelo in ('4060', '4070', '4080')
+        ]
+        # Turno inmediato y sin prueba de circuito para cada descarga
+        reservar = patch('src.utils.rate_limit.limitador_hosts._reservar', return_value=(0.0, None))
+        self.reservar = reservar.start()
+        self.addCleanup(reservar.stop)
+        cache = patch('pipeline.pagina_en_cache', return_value=None)
+        self.pagina_en_cache = cache.start()
+        self.addCleanup(cache.stop)
+    
+    @patch('pipeline.fetch_page_async')
+    def test_etapas_en_orden(self, mock_fetch):
+        """Prueba que cada página pase por extracción, alertas y guardado, y que se puedan no retener los productos"""
+        async def fetch(session, url, **kwargs):
+            return f'<html>{url}<a title="Next"></a></html>'
+        mock_fetch.side_effect = fetch
+        eventos = []
+        
+        def extraer(busqueda, html, productos):
+            self.assertIsNone(productos)
+            # Las páginas 2 repiten el producto: la búsqueda no pasa a la página 3
+            return [{'id_producto': busqueda['modelo']}, {'id_producto': f"{busqueda['modelo']}-{busqueda['pagina']}"}][:3 - busqueda['pagina']]
+        
+        def alertar(productos):
+            eventos.append(('alertas', productos[0]['id_producto'], len(productos)))
+        
+        def guardar(productos):
+            eventos.append(('guardado', productos[0]['id_producto'], len(productos)))
+        
+        productos = asyncio.run(ejecutar_pipeline(self.busquedas, extraer, alertar, guardar, max_paginas=3, deduplicar=False))
+        
+        self.assertEqual([p['id_producto'] for p in productos], ['4060', '4060-1', '4060', '4070', '4070-1', '4070', '4080', '4080-1', '4080'])
+        for evento in [e for e in eventos if e[0] == 'alertas']:
+            self.assertLess(eventos.index(evento), eventos.index(('guardado',) + evento[1:]))
+        self.assertEqual(len(eventos), 12)
+        
+        total = asyncio.run(ejecutar_pipeline(self.busquedas, extraer, alertar, guardar, max_paginas=3, retener=False,
+                                              deduplicar=False))
+        self.assertEqual(total, 9)
+    
+    @patch('pipeline.fetch_page_async')
+    def test_deduplicacion_entre_busquedas(self, mock_fetch):
+        """Prueba que un producto repetido en otra búsqueda sin cambios no pase a alertas ni guardado"""
+        async def fetch(session, url, **kwargs):
+            return f"<html>{url}</html>"
+        mock_fetch.side_effect = fetch
+        guardados = []
+        
+        def extraer(busqueda, html, productos):
+            # La tarjeta X aparece en las tres búsquedas; en la de 4080 con otro precio
+            precio = 9999.0 if busqueda['modelo'] == '4080' else 10999.0
+            return [{'tienda': 'Newegg', 'id_producto': 'X', 'precio': precio}, {'tienda': 'Newegg', 'id_producto': busqueda['modelo'], 'precio': 1.0}]
+        
+        indice = IndiceProductos()
+        productos = asyncio.run(ejecutar_pipeline(
+            self.busquedas, extraer, lambda productos: None, guardados.extend, max_paginas=1, indice_productos=indice
+        ))
+        
+        self.assertEqual([(p['id_producto'], p['precio']) for p in productos],
+                         [('X', 10999.0), ('4060', 1.0), ('4070', 1.0), ('X', 9999.0), ('4080', 1.0)])
+        self.assertEqual(len(guardados), 5)
+        self.assertEqual(indice.resumen(), {'distintos': 4, 'nuevos': 4, 'actualizados': 1, 'omitidos': 1})
+        self.assertEqual(indice.observacion('Newegg', 'X')['precio'], 9999.0)
+    
+    @patch('pipeline.fetch_page_async')
+    def test_tareas_de_parseo_con_pool(self, mock_fetch):
+        """Prueba que con pool_parseo haya una tarea de parseo por lugar de la cola del pool"""
+        async def fetch(session, url, **kwargs):
+            return f"<html>{url}</html>"
+        mock_fetch.side_effect = fetch
+        estado = {'actuales': 0, 'maximo': 0}
+        
+        class PoolLento:
+            max_pendientes = 3
+            
+            async def parsear_async(self, sitio, html):
+                estado['actuales'] += 1
+                estado['maximo'] = max(estado['maximo'], estado['actuales'])
+                await asyncio.sleep(0.05)
+                estado['actuales'] -= 1
+                return [{'id_producto': html}]
+        
+        def extraer(busqueda, html, productos):
+            return productos
+        
+        busquedas = [dict(self.busquedas[0], url=f"https://www.newegg.com/p/pl?d=rtx+{i}") for i in range(6)]
+        asyncio.run(ejecutar_pipeline(busquedas, extraer, lambda productos: None, lambda productos: None,
+                                      max_paginas=1, pool_parseo=PoolLento()))
+        self.assertEqual(estado['maximo'], 3)
+        
+        estado['maximo'] = 0
+        asyncio.run(ejecutar_pipeline(busquedas, extraer, lambda productos: None, lambda productos: None,
+                                      max_paginas=1, pool_parseo=PoolLento(), concurrencia={'parseo': 1}))
+        self.assertEqual(estado['maximo'], 1)
+    
+    @patch('pipeline.fetch_page_async')
+    def test_cache_antes_del_turno(self, mock_fetch):
+        """Prueba que una página fresca en caché no reserve turno del host ni se descargue"""
+        async def fetch(session, url, **kwargs):
+            return f"<html>{url}</html>"
+        mock_fetch.side_effect = fetch
+        en_cache = self.busquedas[0]['url']
+        hilos = set()
+        
+        def pagina_en_cache(url, usar_cache):
+            hilos.add(threading.get_ident())
+            return "<html>cache</html>" if url == en_cache else None
+        self.pagina_en_cache.side_effect = pagina_en_cache
+        
+        def extraer(busqueda, html, productos):
+            return [{'id_producto': busqueda['modelo'], 'html': html}]
+        
+        productos = asyncio.run(ejecutar_pipeline(self.busquedas, extraer, lambda productos: None, lambda productos: None,
+                                                  max_paginas=1))
+        
+        self.assertEqual(productos[0]['html'], "<html>cache</html>")
+        self.assertNotIn(en_cache, [llamada.args[1] for llamada in mock_fetch.call_args_list])
+        reservadas = [llamada.args[0] for llamada in self.reservar.call_args_list]
+        self.assertEqual(sorted(reservadas), sorted(b['url'] for b in self.busquedas[1:]))
+        # La consulta de la caché no corre en el hilo del event loop
+        self.assertNotIn(threading.get_ident(), hilos)
+    
+    def test_indice_productos(self):
+        """Prueba que el índice distinga tiendas, deje pasar productos sin id y guarde la observación más reciente"""
+        indice = IndiceProductos()
+        producto = {'tienda': 'Amazon', 'id_producto': 'A1', 'precio': 100.0}
+        
+        self.assertTrue(indice.registrar(producto))
+        self.assertFalse(indice.registrar(dict(producto)))
+        self.assertTrue(indice.registrar(dict(producto, tienda='Newegg')))
+        self.assertTrue(indice.registrar({'tienda': 'Amazon', 'precio': 1.0}))
+        self.assertTrue(indice.registrar({'tienda': 'Amazon', 'precio': 1.0}))
+        self.assertEqual(indice.filtrar([dict(producto, precio=90.0), producto]), [dict(producto, precio=90.0), producto])
+        self.assertEqual(indice.observacion('Amazon', 'A1'), producto)
+        self.assertEqual(len(indice), 2)
+        self.assertEqual(indice.resumen()['omitidos'], 1)
+        
+        # Una observación que no se guardó se olvida; la siguiente aparición se procesa
+        nuevo = {'tienda': 'Amazon', 'id_producto': 'A9', 'precio': 1.0}
+        self.assertEqual(indice.filtrar([nuevo]), [nuevo])
+        indice.olvidar([nuevo, dict(producto)])
+        self.assertIsNone(indice.observacion('Amazon', 'A9'))
+        self.assertIsNotNone(indice.observacion('Amazon', 'A1'))
+        self.assertTrue(indice.registrar(dict(nuevo)))
+        
+        # Con límite se olvida el primer producto que se vio
+        limitado = IndiceProductos(max_observaciones=2)
+        for id_producto in ('A', 'B', 'C'):
+            limitado.registrar({'tienda': 'Amazon', 'id_producto': id_producto})
+        self.assertEqual(len(limitado), 2)
+        self.assertIsNone(limitado.observacion('Amazon', 'A'))
+    
+    @patch('pipeline.fetch_page_async')
+    def test_fallo_al_guardar_no_cuenta_como_visto(self, mock_fetch):
+        """Prueba que los productos de una página que no se pudo guardar no queden en el índice"""
+        async def fetch(session, url, **kwargs):
+            return f"<html>{url}</html>"
+        mock_fetch.side_effect = fetch
+        
+        def extraer(busqueda, html, productos):
+            return [{'tienda': 'Newegg', 'id_producto': busqueda['modelo'], 'precio': 1.0}]
+        
+        def guardar(productos):
+            if productos[0]['id_producto'] == '4070':
+                raise sqlite3.OperationalError("database is locked")
+        
+        indice = IndiceProductos()
+        productos = asyncio.run(ejecutar_pipeline(self.busquedas, extraer, lambda productos: None, guardar,
+                                                  max_paginas=1, indice_productos=indice))
+        
+        self.assertEqual([p['id_producto'] for p in productos], ['4060', '4080'])
+        self.assertIsNone(indice.observacion('Newegg', '4070'))
+        self.assertEqual(len(indice), 2)
+    
+    @patch('pipeline.fetch_page_async')
+    def test_contrapresion(self, mock_fetch):
+        """Prueba que las descargas se detengan cuando el guardado se atrasa"""
+        estado = {'descargadas': 0, 'extraidas': 0, 'maximo': 0}
+        
+        async def fetch(session, url, **kwargs):
+            estado['descargadas'] += 1
+            estado['maximo'] = max(estado['maximo'], estado['descargadas'] - estado['extraidas'])
+            return f"<html>{url}</html>"
+        mock_fetch.side_effect = fetch
+        
+        def extraer(busqueda, html, productos):
+            estado['extraidas'] += 1
+            return [{'id_producto': busqueda['url']}]
+        
+        busquedas = [dict(self.busquedas[0], url=f"https://www.newegg.com/p/pl?d=rtx+{i}") for i in range(20)]
+        total = asyncio.run(ejecutar_pipeline(
+            busquedas, extraer, lambda productos: None, lambda productos: time.sleep(0.01), max_paginas=1,
+            concurrencia={'descarga': 2, 'parseo': 1, 'alertas': 1}, tamano_colas=1, retener=False
+        ))
+        
+        self.assertEqual(total, 20)
+        # Páginas descargadas sin extraer: descargas simultáneas + cola de parseo
+        self.assertLessEqual(estado['maximo'], 3)
+
+class TestLimitadorHosts(unittest.TestCase):
+    """Pruebas para el límite de peticiones y el circuit breaker por host"""
+    
+    def setUp(self):
+        self.limitador = LimitadorHosts(
+            limites={'default': {'tasa': 5, 'rafaga': 2}},
+            umbral_fallos=2, enfriamiento=0.2, enfriamiento_max=1, espera_max=10
+        )
+    
+    def test_cubeta_por_host(self):
+        """Prueba que la ráfaga pasa sin esperar, luego se aplica la tasa y los hosts son independientes"""
+        self.assertEqual(self.limitador.reservar("https://a.com/1"), 0)
+        self.assertEqual(self.limitador.reservar("https://a.com/2"), 0)
+        self.assertAlmostEqual(self.limitador.reservar("https://a.com/3"), 0.2, places=2)
+        self.assertEqual(self.limitador.reservar("https://b.com/1"), 0)
+    
+    def test_retry_after(self):
+        """Prueba que se respeta Retry-After y que una espera mayor al máximo omite la petición"""
+        self.assertEqual(interpretar_retry_after("120"), 120)
+        self.assertIsNone(interpretar_retry_after(None))
+        self.assertEqual(interpretar_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0)
+        
+        self.limitador.registrar_respuesta("https://a.com/1", 429, {'Retry-After': '3'})
+        self.assertGreater(self.limitador.reservar("https://a.com/1"), 2.9)
+        self.limitador.registrar_respuesta("https://b.com/1", 503, {'retry-after': '30'})
+        self.assertIsNone(self.limitador.reservar("https://b.com/1"))
+    
+    def test_errores_servidor(self):
+        """Prueba que todo 5xx y los errores de conexión cuenten como fallos del circuito, y un 4xx como respuesta del host"""
+        url = "https://www.newegg.com/p/pl?d=rtx+4070"
+        self.limitador.registrar_respuesta(url, 500)
+        self.limitador.registrar_respuesta(url, 502)
+        self.assertEqual(self.limitador.estado(url), 'abierto')
+        
+        otra = "https://www.bestbuy.com.mx/c/videocards/buscar/rtx+4070"
+        self.limitador.registrar_respuesta(otra, 504)
+        self.limitador.registrar_respuesta(otra, 404)
+        self.limitador.registrar_respuesta(otra, 500)
+        self.assertEqual(self.limitador.estado(otra), 'cerrado')
+        
+        self.assertTrue(es_error_conexion(asyncio.TimeoutError()))
+        self.assertTrue(es_error_conexion(ConnectionResetError()))
+        self.assertTrue(es_error_conexion(Exception("Page.goto: net::ERR_CONNECTION_REFUSED at https://a.com")))
+        self.assertFalse(es_error_conexion(ValueError("selector no encontrado")))
+    
+    def test_circuito(self):
+        """Prueba que el circuito se abre tras fallos seguidos, deja pasar una prueba y se cierra con un éxito"""
+        url = "https://www.amazon.com.mx/s?k=rtx+4070"
+        self.limitador.registrar_fallo(url, retry_after=0)
+        self.assertEqual(self.limitador.estado(url), 'cerrado')
+        self.limitador.registrar_fallo(url, retry_after=0)
+        self.assertEqual(self.limitador.estado(url), 'abierto')
+        self.assertIsNone(self.limitador.reservar(url))
+        
+        time.sleep(0.25)
+        self.assertIsNotNone(self.limitador.reservar(url))
+        self.assertEqual(self.limitador.estado(url), 'semiabierto')
+        self.assertIsNone(self.limitador.reservar(url))
+        
+        # Un 200 no cierra el circuito hasta revisar el contenido (puede ser una página de bloqueo)
+        self.limitador.registrar_respuesta(url, 200)
+        self.assertEqual(self.limitador.estado(url), 'semiabierto')
+        self.limitador.registrar_exito(url)
+        self.assertEqual(self.limitador.estado(url), 'cerrado')
+        self.assertIsNotNone(self.limitador.reservar(url))
+    
+    def test_prueba_sin_resultado(self):
+        """Prueba que la petición de prueba se libere si termina sin resultado o se cancela, y que su plazo reabra el circuito"""
+        url = "https://www.amazon.com.mx/s?k=rtx+4070"
+        self.limitador.plazo_prueba = 0.2
+        for _ in range(2):
+            self.limitador.registrar_fallo(url, retry_after=0)
+        time.sleep(0.25)
+        
+        async def sin_resultado():
+            async with self.limitador.turno_async(url) as permitido:
+                self.assertTrue(permitido)
+                self.assertEqual(self.limitador.estado(url), 'semiabierto')
+                self.assertIsNone(self.limitador.reservar(url))
+        asyncio.run(sin_resultado())
+        
+        async def cancelada():
+            async def peticion():
+                async with self.limitador.turno_async(url):
+                    await asyncio.sleep(10)
+            tarea = asyncio.create_task(peticion())
+            await asyncio.sleep(0.01)
+            tarea.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await tarea
+        asyncio.run(cancelada())
+        
+        # La prueba quedó libre: esta petición la toma y no informa nada antes del plazo
+        self.assertIsNotNone(self.limitador.reservar(url))
+        self.assertIsNone(self.limitador.reservar(url))
+        # Plazo: espera de la cubeta (0.2s tras tres turnos seguidos) + plazo_prueba
+        time.sleep(0.45)
+        self.assertIsNone(self.limitador.reservar(url))
+        self.assertEqual(self.limitador.estado(url), 'abierto')
+
+class ProxyLocal(BaseHTTPRequestHandler):
+    """Proxy HTTP de prueba: responde él mismo a las peticiones que recibe"""
+    
+    def do_GET(self):
+        cuerpo = f"<html>via proxy {self.path}</html>".encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+    
+    def log_message(self, *args):
+        pass
+
+class TestPoolProxies(unittest.TestCase):
+    """Pruebas para el pool de proxies con puntaje de salud"""
+    
+    def test_expulsion_y_reprueba(self):
+        """Prueba que un proxy que falla se expulsa, se vuelve a probar una sola vez y se readmite con un éxito"""
+        pool = PoolProxies(["http://malo:8080", "http://bueno:8080"], activado=True,
+                           fallos_expulsion=2, espera_reprueba=0.1)
+        malo = pool._proxies[0]
+        for _ in range(2):
+            malo.en_uso += 1
+            pool.liberar(malo, False)
+        
+        for _ in range(5):
+            estado = pool.adquirir("https://a.com/1")
+            self.assertEqual(estado.url, "http://bueno:8080")
+            pool.liberar(estado, True, 0.5)
+        
+        time.sleep(0.15)
+        pool._proxies[1].en_uso = pool.max_concurrentes  # El bueno sin cupo
+        prueba = pool.adquirir("https://a.com/1", bloquear=False)
+        self.assertIs(prueba, malo)
+        self.assertIsNone(pool.adquirir("https://a.com/1", bloquear=False))
+        pool.liberar(prueba, True, 0.2)
+        self.assertFalse(pool.resumen()[0]['expulsado'])
+    
+    def test_limite_concurrencia_y_rotacion_por_host(self):
+        """Prueba el límite de peticiones por proxy y que la rotación por host conserva el proxy"""
+        pool = PoolProxies(["http://p1:8080", "http://p2:8080"], activado=True, rotacion='host', max_concurrentes=1)
+        primero = pool.adquirir("https://a.com/1")
+        segundo = pool.adquirir("https://a.com/2")
+        self.assertIsNot(primero, segundo)
+        self.assertIsNone(pool.adquirir("https://a.com/3", bloquear=False))
+        
+        pool.liberar(primero, True, 0.1)
+        pool.liberar(segundo, True, 0.1)
+        asignado = pool._por_host["a.com"]
+        for _ in range(3):
+            estado = pool.adquirir("https://a.com/4")
+            self.assertIs(estado, asignado)
+            pool.liberar(estado, True, 0.1)
+    
+    def test_peticion_por_proxy_local(self):
+        """Prueba que fetch_with_requests sale por el proxy del pool y mide su latencia"""
+        servidor = HTTPServer(('127.0.0.1', 0), ProxyLocal)
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        try:
+            pool = PoolProxies([f"http://127.0.0.1:{servidor.server_port}"], activado=True)
+            with patch('src.utils.proxy_pool.pool_proxies', pool):
+                html = fetch_with_requests("http://tienda.test/s?k=rtx+4070", usar_cache=False)
+        finally:
+            servidor.shutdown()
+            servidor.server_close()
+        
+        self.assertEqual(html, b"<html>via proxy http://tienda.test/s?k=rtx+4070</html>")
+        self.assertEqual(pool.resumen()[0]['en_uso'], 0)
+        self.assertLess(pool.resumen()[0]['latencia'], 1.0)
+
+class TestSelectorEstrategias(unittest.TestCase):
+    """Pruebas para el selector de estrategia de descarga por sitio"""
+    
+    AMAZON = "https://www.amazon.com.mx/s?k=rtx+4070"
+    
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.ruta = os.path.join(self.directorio, "estrategias.json")
+        self.selector = SelectorEstrategias(ruta=self.ruta, reprueba_segundos=1e12)
+    
+    def tearDown(self):
+        shutil.rmtree(self.directorio)
+    
+    def test_estrategia_inicial(self):
+        """Prueba que sin historial se usa la estrategia configurada y las más caras quedan de respaldo"""
+        self.assertEqual(self.selector.plan(self.AMAZON), ['requests', 'playwright', 'selenium'])
+        self.assertEqual(self.selector.plan("https://listado.mercadolibre.com.mx/rtx-4070"), ['selenium'])
+        self.assertTrue(pagina_sin_resultados(self.AMAZON, "<html>captcha</html>"))
+        self.assertFalse(pagina_sin_resultados(self.AMAZON, '<div data-component-type="s-search-result">'))
+    
+    def test_aprende_persiste_y_reprueba(self):
+        """Prueba que se recuerda la estrategia que funcionó entre corridas y que se reprueban las más baratas"""
+        self.assertFalse(self.selector.registrar(self.AMAZON, 'requests', "<html>sin resultados</html>", 0.5))
+        self.assertTrue(self.selector.registrar(self.AMAZON, 'playwright', '<div class="s-result-item">', 2.0))
+        self.assertEqual(self.selector.plan(self.AMAZON), ['playwright', 'selenium'])
+        
+        otra_corrida = SelectorEstrategias(ruta=self.ruta, reprueba_segundos=1e12)
+        self.assertEqual(otra_corrida.plan(self.AMAZON), ['playwright', 'selenium'])
+        estadistica = otra_corrida.resumen()['amazon']['requests']
+        self.assertEqual(estadistica['tasa_bloqueo'], 1.0)
+        
+        otra_corrida.reprueba_segundos = 0
+        self.assertEqual(otra_corrida.plan(self.AMAZON), ['requests', 'playwright', 'selenium'])
+    
+    @patch('utils.fetch_con_estrategia')
+    def test_fetch_page_usa_respaldo(self, mock_fetch):
+        """Prueba que fetch_page pasa a la siguiente estrategia si la página llega sin resultados"""
+        paginas = {'requests': "<html>sin resultados</html>" + " " * 20000, 'playwright': '<div class="s-result-item">' + "x" * 20000 + '</div>'}
+        mock_fetch.side_effect = lambda url, estrategia, usar_cache=True: paginas.get(estrategia)
+        
+        with patch('src.utils.strategy.selector_estrategias', self.selector), \
+             patch('src.utils.rate_limit.limitador_hosts.esperar', return_value=True):
+            html = fetch_page(self.AMAZON, usar_cache=False)
+        
+        self.assertEqual(html, paginas['playwright'])
+        self.assertEqual([c.args[1] for c in mock_fetch.call_args_list], ['requests', 'playwright'])
+
+class TestDeteccionBloqueos(unittest.TestCase):
+    """Pruebas para la detección de páginas de bloqueo antes de parsear"""
+    
+    AMAZON = "https://www.amazon.com.mx/s?k=rtx+4070"
+    
+    def test_clasificar_pagina(self):
+        """Prueba la detección por título, marcador y tamaño, y que las páginas grandes no se revisan"""
+        relleno = "<div>" + "x" * 20000 + "</div>"
+        self.assertEqual(clasificar_pagina(self.AMAZON, "<html><title>Robot Check</title>" + relleno), 'titulo')
+        self.assertEqual(clasificar_pagina(self.AMAZON, '<form action="/errors/validateCaptcha">' + relleno), 'marcador')
+        self.assertEqual(clasificar_pagina(self.AMAZON, "<html><title>Amazon.com.mx</title></html>"), 'pagina_reducida')
+        # Las páginas de requests llegan sin decodificar
+        self.assertEqual(clasificar_pagina(self.AMAZON, ("<html><title>Robot Check</title>" + relleno).encode('utf-8')), 'titulo')
+        self.assertEqual(clasificar_pagina(self.AMAZON, ('<form action="/errors/validateCaptcha">' + relleno).encode('utf-8')), 'marcador')
+        self.assertIsNone(clasificar_pagina(self.AMAZON, "<title>Amazon.com.mx : rtx 4070</title>" + relleno))
+        self.assertIsNone(clasificar_pagina(self.AMAZON, "g-recaptcha" + "x" * 200000))
+    
+    def test_bloqueos_alimentan_circuito(self):
+        """Prueba que las páginas de bloqueo abren el circuito del host y se registran por sitio"""
+        limitador = LimitadorHosts(umbral_fallos=2, enfriamiento=60)
+        registro = RegistroBloqueos(ruta=None)
+        captcha = "<html><title>Robot Check</title></html>"
+        
+        with patch.object(block_detection, 'limitador_hosts', limitador), \
+             patch.object(block_detection, 'registro_bloqueos', registro):
+            self.assertEqual(revisar_pagina(self.AMAZON, captcha, 'requests'), 'titulo')
+            self.assertEqual(limitador.estado(self.AMAZON), 'cerrado')
+            revisar_pagina(self.AMAZON, captcha, 'requests')
+            self.assertIsNone(revisar_pagina("https://www.newegg.com/p/pl?d=rtx+4070", "<div>" + "x" * 5000 + "</div>", 'requests'))
+        
+        self.assertEqual(limitador.estado(self.AMAZON), 'abierto')
+        self.assertEqual(registro.resumen(), {'amazon': {'titulo': 2}})
+
+class TestPoolSelenium(unittest.TestCase):
+    """Pruebas para el pool de navegadores Selenium"""
+    
+    def setUp(self):
+        """Sustituir el lanzamiento de Chrome por navegadores simulados"""
+        self.pool = PoolSelenium(max_navegadores=2, paginas_por_navegador=2)
+        self.pool._crear_navegador = MagicMock(side_effect=lambda proxy=None: MagicMock())
+    
+    def test_reutiliza_navegador(self):
+        """Prueba que el navegador se devuelve al pool y se reutiliza"""
+        with self.pool.navegador() as primero:
+            pass
+        with self.pool.navegador() as segundo:
+            pass
+        self.assertIs(primero, segundo)
+        self.assertEqual(self.pool._crear_navegador.call_count, 1)
+    
+    def test_recicla_tras_n_paginas(self):
+        """Prueba que el navegador se cierra al alcanzar el límite de páginas"""
+        for _ in range(2):
+            with self.pool.navegador() as driver:
+                pass
+        driver.quit.assert_called_once()
+        with self.pool.navegador() as nuevo:
+            pass
+        self.assertIsNot(driver, nuevo)
+    
+    def test_descarta_navegador_con_error(self):
+        """Prueba que un navegador que falla no vuelve al pool"""
+        with self.assertRaises(RuntimeError):
+            with self.pool.navegador() as driver:
+                raise RuntimeError("chrome no responde")
+        driver.quit.assert_called_once()
+        self.assertEqual(self.pool._disponibles, [])
+    
+    def test_navegador_por_proxy(self):
+        """Prueba que solo se reutilizan navegadores lanzados con el mismo proxy"""
+        with self.pool.navegador("http://p1:8080") as con_proxy:
+            pass
+        with self.pool.navegador() as directo:
+            pass
+        self.assertIsNot(con_proxy, directo)
+        con_proxy.quit.assert_called_once()
+        self.pool._crear_navegador.assert_called_with(None)
+    
+    def test_calentar_solo_lo_necesario(self):
+        """Prueba que el calentamiento lance solo los navegadores que usará la corrida"""
+        with patch('browser_pool.SITIOS_HABILITADOS', ['amazon', 'mercadolibre']):
+            self.pool.calentar()
+        self.assertEqual(self.pool._crear_navegador.call_count, 1)
+        self.pool.calentar(5)
+        self.assertEqual(self.pool._crear_navegador.call_count, 2)
+    
+    def test_corrida_calienta_navegadores(self):
+        """Prueba que la corrida lance los navegadores antes del pipeline solo si un sitio habilitado empieza con Selenium"""
+        import main
+        for sitios, llamadas in ((['amazon', 'mercadolibre'], 1), (['amazon'], 0)):
+            with patch.object(main, 'SITIOS_HABILITADOS', sitios), \
+                 patch.object(main, 'ARCHIVAR_HTML', False), \
+                 patch.object(main, 'crear_tabla'), \
+                 patch.object(main, 'construir_busquedas', return_value=[]), \
+                 patch.object(main, 'pool_selenium') as mock_pool, \
+                 patch.object(main, 'ejecutar_pipeline', new_callable=AsyncMock, return_value=[]) as mock_pipeline:
+                mock_pool.calentar.side_effect = lambda: self.assertFalse(mock_pipeline.called)
+                main.ejecutar_scraper()
+            self.assertEqual(mock_pool.calentar.call_count, llamadas)
+            mock_pipeline.assert_awaited_once()
+    
+    def test_driver_se_resuelve_fuera_del_lock(self):
+        """Prueba que mientras se resuelve el driver se pueda tomar un navegador libre del pool"""
+        with self.pool.navegador() as libre:
+            pass
+        descargando, terminar = threading.Event(), threading.Event()
+        
+        def instalar():
+            descargando.set()
+            terminar.wait(2)
+            return "/tmp/chromedriver"
+        
+        modulo = MagicMock()
+        modulo.ChromeDriverManager.return_value.install.side_effect = instalar
+        with patch.dict('sys.modules', {'webdriver_manager': MagicMock(), 'webdriver_manager.chrome': modulo}):
+            hilo = threading.Thread(target=self.pool._resolver_driver)
+            hilo.start()
+            self.assertTrue(descargando.wait(2))
+            inicio = time.monotonic()
+            with self.pool.navegador() as prestado:
+                pass
+            self.assertLess(time.monotonic() - inicio, 0.5)
+            terminar.set()
+            hilo.join()
+        self.assertIs(prestado, libre)
+        self.assertEqual(self.pool._resolver_driver(), "/tmp/chromedriver")
+
+class TestRenderizadorPlaywright(unittest.TestCase):
+    """Pruebas para el renderizador asíncrono de Playwright"""
+    
+    def setUp(self):
+        """Sustituir Chromium por un navegador y contexto simulados"""
+        self.pagina = AsyncMock()
+        self.pagina.content.return_value = "<html>renderizado</html>"
+        self.pagina.on = MagicMock()
+        self.pagina.goto.return_value = MagicMock(status=200, headers={})
+        contexto = AsyncMock()
+        contexto.new_page.return_value = self.pagina
+        
+        self.renderizador = RenderizadorPlaywright(contextos=1, max_pestanas=2)
+        self.renderizador._browser = AsyncMock()
+        self.renderizador._browser.is_connected = MagicMock(return_value=True)
+        self.renderizador._contextos = [contexto]
+    
+    def tearDown(self):
+        self.renderizador.cerrar()
+    
+    def test_espera_selector_del_sitio(self):
+        """Prueba que se espera el selector del sitio en lugar de networkidle"""
+        html = self.renderizador.renderizar("https://es.aliexpress.com/wholesale?SearchText=rtx+4070")
+        
+        self.assertEqual(html, "<html>renderizado</html>")
+        self.pagina.goto.assert_awaited_once()
+        self.assertEqual(self.pagina.goto.await_args.kwargs['wait_until'], "domcontentloaded")
+        self.assertEqual(self.pagina.wait_for_selector.await_args.args[0], "div._3t7zg")
+        self.pagina.close.assert_awaited_once()
+    
+    def test_renderizar_varias(self):
+        """Prueba que varias URLs se renderizan en pestañas y devuelven su HTML en orden"""
+        urls = [f"https://es.aliexpress.com/wholesale?SearchText=rtx+{m}" for m in ('4060', '4070', '4080')]
+        self.assertEqual(self.renderizador.renderizar_varias(urls), ["<html>renderizado</html>"] * 3)
+        self.assertEqual(self.pagina.close.await_count, 3)
+    
+    def test_relanzar_navegador_desconectado(self):
+        """Prueba que un navegador desconectado se descarta y se vuelve a lanzar antes de renderizar"""
+        desconectado = self.renderizador._browser
+        desconectado.is_connected.return_value = False
+        playwright_anterior = AsyncMock()
+        self.renderizador._playwright = playwright_anterior
+        
+        nuevo = AsyncMock()
+        nuevo.is_connected = MagicMock(return_value=True)
+        nuevo.new_context.return_value.new_page.return_value = self.pagina
+        playwright_nuevo = AsyncMock()
+        playwright_nuevo.chromium.launch.return_value = nuevo
+        iniciador = MagicMock()
+        iniciador.return_value.start = AsyncMock(return_value=playwright_nuevo)
+        
+        with patch('playwright.async_api.async_playwright', iniciador):
+            html = self.renderizador.renderizar("https://es.aliexpress.com/wholesale?SearchText=rtx+4070")
+        
+        self.assertEqual(html, "<html>renderizado</html>")
+        playwright_anterior.stop.assert_awaited_once()
+        playwright_nuevo.chromium.launch.assert_awaited_once()
+        self.assertIs(self.renderizador._browser, nuevo)
+        self.assertEqual(len(self.renderizador._contextos), 1)
+    
+    def test_navegador_por_sitio(self):
+        """Prueba la selección de navegador según el sitio"""
+        self.assertEqual(requiere_navegador("https://listado.mercadolibre.com.mx/rtx-4070"), 'selenium')
+        self.assertEqual(requiere_navegador("https://es.aliexpress.com/wholesale?SearchText=rtx+4070"), 'playwright')
+        self.assertIsNone(requiere_navegador("https://www.amazon.com.mx/s?k=rtx+4070"))
+
+class TestBloqueoRecursos(unittest.TestCase):
+    """Pruebas para el bloqueo de recursos al renderizar"""
+    
+    def test_debe_bloquear(self):
+        """Prueba la decisión de bloqueo por tipo de recurso y dominio"""
+        permitidos = {'document', 'script', 'xhr', 'fetch'}
+        self.assertTrue(debe_bloquear("https://m.media-amazon.com/images/I/a.jpg", 'image', permitidos))
+        self.assertTrue(debe_bloquear("https://www.googletagmanager.com/gtm.js", 'script', permitidos))
+        self.assertFalse(debe_bloquear("https://www.amazon.com.mx/s?k=rtx+4070", 'document', permitidos))
+        self.assertFalse(debe_bloquear("https://www.amazon.com.mx/app.js", 'Script', permitidos))
+    
+    def test_patrones_selenium(self):
+        """Prueba que los patrones de Selenium cubren imágenes, fuentes y rastreadores"""
+        patrones = patrones_bloqueo_selenium("https://listado.mercadolibre.com.mx/rtx-4070")
+        self.assertIn('*.jpg*', patrones)
+        self.assertIn('*.woff*', patrones)
+        self.assertIn('*google-analytics.com*', patrones)
+    
+    def test_estadisticas_selenium(self):
+        """Prueba el conteo de recursos bloqueados a partir del log de rendimiento"""
+        def evento(metodo, **params):
+            return {'message': json.dumps({'message': {'method': metodo, 'params': params}})}
+        
+        driver = MagicMock()
+        driver.get_log.return_value = [
+            evento('Network.requestWillBeSent', requestId='1', type='Image'),
+            evento('Network.loadingFailed', requestId='1', blockedReason='inspector'),
+            evento('Network.requestWillBeSent', requestId='2', type='Font'),
+            evento('Network.loadingFailed', requestId='2', errorText='net::ERR_BLOCKED_BY_CLIENT'),
+            evento('Network.requestWillBeSent', requestId='3', type='Document'),
+            evento('Network.loadingFailed', requestId='3', errorText='net::ERR_TIMED_OUT'),
+        ]
+        estadisticas = estadisticas_selenium(driver)
+        self.assertEqual(estadisticas.bloqueados_por_tipo, {'image': 1, 'font': 1})
+        self.assertGreater(estadisticas.bytes_ahorrados, 0)
+    
+    def test_intercepcion_playwright(self):
+        """Prueba que la intercepción de Playwright aborta imágenes y deja pasar el documento"""
+        page = AsyncMock()
+        
+        def ruta(url, tipo):
+            route = AsyncMock()
+            route.request = MagicMock(url=url, resource_type=tipo)
+            return route
+        
+        async def cargar():
+            estadisticas = await instalar_bloqueo_playwright(page, "https://es.aliexpress.com/wholesale")
+            interceptar = page.route.await_args.args[1]
+            imagen = ruta("https://ae01.alicdn.com/kf/a.jpg", 'image')
+            documento = ruta("https://es.aliexpress.com/wholesale", 'document')
+            await interceptar(imagen)
+            await interceptar(documento)
+            return estadisticas, imagen, documento
+        
+        estadisticas, imagen, documento = asyncio.run(cargar())
+        imagen.abort.assert_awaited_once()
+        documento.continue_.assert_awaited_once()
+        self.assertEqual(estadisticas.total_bloqueados, 1)
+
+class TestCacheHTTP(unittest.TestCase):
+    """Pruebas para la caché de respuestas HTTP en disco"""
+    
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.cache = CacheHTTP(ruta=os.path.join(self.directorio, "cache.db"), ttl=60)
+    
+    def tearDown(self):
+        shutil.rmtree(self.directorio)
+    
+    def test_guardar_y_obtener(self):
+        """Prueba que una respuesta guardada se recupera fresca y expira según el TTL"""
+        url = "https://www.amazon.com.mx/s?k=rtx+4070"
+        self.cache.guardar(url, {'User-Agent': 'a'}, "<html>4070</html>", etag='"v1"')
+        
+        # El User-Agent aleatorio no forma parte de la clave
+        entrada = self.cache.obtener(url, {'User-Agent': 'b'})
+        self.assertEqual(entrada['cuerpo'], b"<html>4070</html>")
+        self.assertEqual(entrada['etag'], '"v1"')
+        self.assertTrue(entrada['fresca'])
+        
+        self.cache.ttl = 0
+        self.assertFalse(self.cache.obtener(url)['fresca'])
+        self.assertIsNone(self.cache.obtener("https://www.amazon.com.mx/s?k=rtx+4080"))
+    
+    def test_expulsion_lru(self):
+        """Prueba que al superar el tamaño máximo se expulsa la entrada menos usada"""
+        contenido = os.urandom(3000).hex()
+        self.cache.max_bytes = 7000
+        self.cache.guardar("https://a.com/1", {}, contenido)
+        self.cache.guardar("https://a.com/2", {}, contenido)
+        time.sleep(0.01)
+        self.cache.obtener("https://a.com/1")
+        self.cache.guardar("https://a.com/3", {}, contenido)
+        
+        self.assertIsNotNone(self.cache.obtener("https://a.com/1"))
+        self.assertIsNone(self.cache.obtener("https://a.com/2"))
+        self.assertIsNotNone(self.cache.obtener("https://a.com/3"))
+    
+    @patch('utils.get_session')
+    def test_revalidacion_304(self, mock_get_session):
+        """Prueba que una entrada expirada se revalida con If-None-Match y un 304 reutiliza el contenido"""
+        url = "https://www.newegg.com/p/pl?d=rtx+4070"
+        self.cache.ttl = 0
+        self.cache.guardar(url, get_headers(), "<html>guardado</html>", etag='"v1"')
+        mock_get_session.return_value.get.return_value = MagicMock(status_code=304)
+        
+        with patch('src.utils.http_cache.cache_http', self.cache):
+            html = fetch_with_requests(url)
+        
+        self.assertEqual(html, b"<html>guardado</html>")
+        headers = mock_get_session.return_value.get.call_args.kwargs['headers']
+        self.assertEqual(headers['If-None-Match'], '"v1"')
+
+class TestArchivoHTML(unittest.TestCase):
+    """Pruebas para el archivo de páginas HTML y la reproducción sin red"""
+    
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.archivo = ArchivoHTML(directorio=self.directorio)
+    
+    def tearDown(self):
+        shutil.rmtree(self.directorio)
+    
+    def test_guardar_y_leer(self):
+        """Prueba que el contenido se guarda una sola vez y el índice registra cada página"""
+        corrida = self.archivo.nueva_corrida()
+        hash_1 = self.archivo.guardar(corrida, 'amazon', '4070', "https://a.com/1", "<html>ñ</html>")
+        hash_2 = self.archivo.guardar(corrida, 'newegg', '4070', "https://b.com/1", "<html>ñ</html>")
+        
+        self.assertEqual(hash_1, hash_2)
+        self.assertEqual(self.archivo.leer(hash_1), "<html>ñ</html>".encode('utf-8'))
+        objetos = [f for _, _, archivos in os.walk(os.path.join(self.directorio, "objetos")) for f in archivos]
+        self.assertEqual(len(objetos), 1)
+        
+        paginas = self.archivo.paginas()
+        self.assertEqual([p['sitio'] for p in paginas], ['amazon', 'newegg'])
+        self.assertEqual(paginas[0]['corrida'], corrida)
+        self.assertEqual(self.archivo.paginas("otra"), [])
+    
+    def test_reproducir_corrida(self):
+        """Prueba que la reproducción pasa las páginas archivadas por el parser y el procesamiento sin archivarlas de nuevo"""
+        import main
+        corrida = self.archivo.nueva_corrida()
+        html = "<html><div data-component-type='s-search-result'></div></html>"
+        self.archivo.guardar(corrida, 'amazon', '4070', "https://www.amazon.com.mx/s?k=rtx+4070", html)
+        
+        producto = {'tienda': 'Amazon', 'modelo': 'RTX 4070', 'nombre': 'ASUS RTX 4070', 'precio': 12999.0,
+                    'vendedor': 'ASUS', 'link': 'https://a.com/1', 'imagen': '', 'id_producto': 'A1'}
+        # El producto sin modelo reconocido no pasa los filtros posteriores al parseo
+        parser = MagicMock(return_value=[producto, dict(producto, modelo='Otro', id_producto='A2')])
+        with patch.object(main, 'archivo_html', self.archivo), \
+             patch.dict(main.SCRAPERS, {'amazon': {'func': parser, 'url_template': ''}}), \
+             patch.object(main, 'crear_tabla'), \
+             patch.object(main, 'procesar_productos') as mock_procesar:
+            productos = main.reproducir_corrida()
+        
+        parser.assert_called_once_with(html.encode('utf-8'))
+        # Los precios se guardan con la fecha de la descarga archivada, no con la de la reproducción
+        fecha = datetime.fromisoformat(self.archivo.paginas(corrida)[0]['fecha'])
+        mock_procesar.assert_called_once_with([producto], fecha)
+        self.assertEqual(productos, [producto])
+        self.assertEqual(len(self.archivo.paginas(corrida)), 1)
+
+class TestLoteProductos(unittest.TestCase):
+    """Pruebas para el lote columnar de productos"""
+    
+    def setUp(self):
+        self.productos = [
+            {'tienda': 'Amazon', 'modelo': 'RTX 4070', 'nombre': 'ASUS RTX 4070', 'precio': 12999.0, 'vendedor': 'ASUS',
+             'link': 'https://a.com/1', 'imagen': 'https://a.com/1.jpg', 'id_producto': 'A1'},
+            {'tienda': 'Amazon', 'modelo': 'Otro', 'nombre': 'Cable', 'precio': 199.0, 'vendedor': 'ASUS',
+             'link': 'https://a.com/2', 'imagen': 'https://a.com/2.jpg', 'id_producto': 'A2'},
+            {'tienda': 'Newegg', 'modelo': 'RTX 4080', 'nombre': 'MSI RTX 4080', 'precio': 0, 'vendedor': '',
+             'link': 'https://b.com/3', 'imagen': 'https://b.com/3.jpg', 'id_producto': 'N3'},
+            {'tienda': 'Newegg', 'modelo': 'RTX 4060', 'nombre': 'Zotac RTX 4060', 'precio': 1500.0, 'vendedor': '',
+             'link': 'https://b.com/4', 'imagen': 'https://b.com/4.jpg', 'id_producto': 'N4'}
+        ]
+    
+    def test_filtros_vectorizados(self):
+        """Prueba que las máscaras sobre las columnas filtren igual que las funciones por producto"""
+        lote = LoteProductos.desde_productos(self.productos)
+        
+        self.assertEqual(lote.validos().productos(), filtrar_productos_validos(self.productos))
+        self.assertEqual(list(lote.filtrar(lote.mascara_precio_minimo(2000)).textos['id_producto']), ['A1'])
+        self.assertEqual(len(LoteProductos.desde_productos([]).validos()), 0)
+    
+    def test_filtrar_pagina(self):
+        """Prueba que los filtros sobre el lote de la página den lo mismo que los filtros por producto de los scrapers"""
+        productos = [
+            {'tienda': 'Amazon', 'modelo': detectar_modelo(p['nombre']), 'nombre': p['nombre'], 'precio': p['precio'],
+             'vendedor': '', 'link': '', 'imagen': '', 'id_producto': str(i)}
+            for i, p in enumerate(productos_corpus(nombres_corpus()) + [{'nombre': 'RTX 4070', 'precio': 0}])
+        ]
+        self.assertEqual(filtrar_pagina(productos, 'newegg'), filtrar_productos_irrelevantes(filtrar_productos_validos(productos)))
+        
+        # Sin modelos reconocidos, solo algunos sitios conservan los productos con precio y relevantes
+        otros = [dict(producto, modelo='Otro') for producto in productos]
+        self.assertEqual(filtrar_pagina(otros, 'amazon'), filtrar_productos_irrelevantes([p for p in otros if p['precio'] > 0]))
+        self.assertGreater(len(filtrar_pagina(otros, 'amazon')), 0)
+        self.assertEqual(filtrar_pagina(otros, 'newegg'), [])
+        self.assertEqual(filtrar_pagina([], 'amazon'), [])
+    
+    def test_columnas(self):
+        """Prueba la codificación por columnas y que filtrar con una máscara conserve los productos en orden"""
+        lote = LoteProductos.desde_productos(self.productos)
+        
+        self.assertEqual(len(lote), 4)
+        self.assertEqual(list(lote.categoricas['tienda'].categorias), ['Amazon', 'Newegg'])
+        self.assertEqual(lote.productos(), self.productos)
+        self.assertEqual(lote.filtrar(lote.precio >= 1500).productos(), [self.productos[0], self.productos[3]])
+        self.assertEqual(len(LoteProductos.desde_productos([])), 0)
+    
+    def test_guardar_lote_igual_que_por_producto(self):
+        """Prueba que la inserción masiva deje la base de datos igual que guardar_en_db"""
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio)
+        cambio = [dict(self.productos[0], precio=11999.0), dict(self.productos[2], precio=100.0), self.productos[3],
+                  dict(self.productos[1], id_producto='A5'), dict(self.productos[1], id_producto='A5', precio=99.0)]
+        
+        # Fechas de captura explícitas, como al reproducir una corrida archivada
+        fechas = (datetime(2025, 3, 1, 12, 0), datetime(2025, 3, 2, 12, 0))
+        
+        tablas = []
+        for guardar in (guardar_en_db, guardar_lote_en_db):
+            ruta = os.path.join(directorio, f"{guardar.__name__}.db")
+            with patch('database.get_db_connection', side_effect=lambda: (sqlite3.connect(ruta), "sqlite")):
+                crear_tabla()
+                guardar(self.productos, fechas[0])
+                guardar(cambio, fechas[1])
+            conn = sqlite3.connect(ruta)
+            tablas.append((
+                sorted(conn.execute("SELECT tienda, modelo, nombre, precio, fecha, vendedor, link, imagen, id_producto FROM productos")),
+                sorted(conn.execute("SELECT p.id_producto, h.precio, h.fecha, h.vendedor FROM historial_precios h JOIN productos p ON p.id = h.producto_id"))
+            ))
+            conn.close()
+        
+        self.assertEqual(tablas[0], tablas[1])
+        self.assertEqual(len(tablas[1][1]), 8)
+        self.assertEqual({fila[2] for fila in tablas[1][1]}, {fecha.isoformat() for fecha in fechas})
+    
+    def test_guardar_lote_mongodb(self):
+        """Prueba que con MongoDB el lote se guarde con guardar_en_db sin abrir otra conexión"""
+        with patch('database.DATABASE_TYPE', "mongodb"), \
+             patch('database.get_db_connection') as mock_conexion, \
+             patch('database.guardar_en_db') as mock_guardar:
+            guardar_lote_en_db(self.productos)
+        
+        mock_conexion.assert_not_called()
+        self.assertEqual(mock_guardar.call_args.args[0], self.productos)
 
 @patch('database.get_db_connection')
 class TestDatabase(unittest.TestCase):
@@ -1,6 +1,5 @@
 # alerts.py
 import smtplib
-import requests
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import telegram
@@ -14,9 +13,11 @@ from src.config.config import (
     TELEGRAM_CHAT_ID,
     DISCORD_ACTIVADO,
     DISCORD_WEBHOOK_URL,
-    UMBRAL_PRECIO_PORCENTAJE
+    UMBRAL_PRECIO_PORCENTAJE,
+    TIMEOUT_PETICIONES
 )
 from src.database.database import obtener_historial_precios
+from src.utils.utils import get_session
 
 def calcular_porcentaje_cambio(precio_actual, precio_anterior):
     """
@@ -165,7 +166,7 @@ def enviar_alerta_telegram(producto, precio_anterior):
             "parse_mode": "Markdown"
         }
         
-        response = requests.post(url, data=data)
+        response = get_session(url).post(url, data=data, timeout=TIMEOUT_PETICIONES)
         
         if response.status_code == 200:
             print("✅ Alerta enviada por Telegram")
@@ -218,7 +219,7 @@ def enviar_alerta_discord(producto, precio_anterior):
         }
         
         # Enviar mensaje
-        response = requests.post(DISCORD_WEBHOOK_URL, json=data)
+        response = get_session(DISCORD_WEBHOOK_URL).post(DISCORD_WEBHOOK_URL, json=data, timeout=TIMEOUT_PETICIONES)
         
         if response.status_code == 204:
             print("✅ Alerta enviada por Discord")
@@ -0,0 +1,141 @@
+# archive.py
+"""
+Archivo de las páginas HTML descargadas. Cada página se guarda comprimida una sola vez
+(direccionada por el hash de su contenido) y un índice en SQLite registra a qué corrida,
+sitio, modelo y URL corresponde. Permite volver a ejecutar el pipeline completo sin red.
+"""
+
+import gzip
+import hashlib
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime
+
+from src.config.config import ARCHIVO_HTML_DIR
+from src.utils.utils import codificar_html
+
+class ArchivoHTML:
+    """
+    Almacén de páginas HTML direccionado por contenido.
+    """
+
+    def __init__(self, directorio=ARCHIVO_HTML_DIR):
+        self.directorio = directorio
+        self._lock = threading.Lock()
+
+    def _conectar(self):
+        os.makedirs(self.directorio, exist_ok=True)
+        conn = sqlite3.connect(os.path.join(self.directorio, "indice.db"), timeout=30)
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS paginas (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                corrida TEXT,
+                fecha TEXT,
+                sitio TEXT,
+                modelo TEXT,
+                url TEXT,
+                hash TEXT
+            )
+        ''')
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_paginas_corrida ON paginas (corrida)")
+        return conn
+
+    def _ruta_objeto(self, hash_contenido):
+        return os.path.join(self.directorio, "objetos", hash_contenido[:2], f"{hash_contenido}.html.gz")
+
+    def nueva_corrida(self):
+        """
+        Genera el identificador de una nueva corrida (fecha y sufijo aleatorio).
+
+        Returns:
+            str: Identificador de la corrida (ej: 20250301T120000-1a2b3c)
+        """
+        return f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+    def guardar(self, corrida, sitio, modelo, url, html_content):
+        """
+        Guarda una página en el archivo. Si el mismo contenido ya existe solo se registra
+        la referencia en el índice.
+
+        Returns:
+            str: Hash SHA-256 del contenido
+        """
+        datos = codificar_html(html_content)
+        hash_contenido = hashlib.sha256(datos).hexdigest()
+        ruta = self._ruta_objeto(hash_contenido)
+
+        with self._lock:
+            if not os.path.exists(ruta):
+                os.makedirs(os.path.dirname(ruta), exist_ok=True)
+                temporal = f"{ruta}.tmp"
+                with gzip.open(temporal, 'wb') as f:
+                    f.write(datos)
+                os.replace(temporal, ruta)
+
+            conn = self._conectar()
+            try:
+                conn.execute(
+                    "INSERT INTO paginas (corrida, fecha, sitio, modelo, url, hash) VALUES (?, ?, ?, ?, ?, ?)",
+                    (corrida, datetime.now().isoformat(), sitio, modelo, url, hash_contenido)
+                )
+                conn.commit()
+            finally:
+                conn.close()
+
+        return hash_contenido
+
+    def leer(self, hash_contenido):
+        """
+        Lee el contenido de una página archivada.
+
+        Returns:
+            bytes: Contenido HTML sin decodificar (lo decodifica el parser)
+        """
+        with gzip.open(self._ruta_objeto(hash_contenido), 'rb') as f:
+            return f.read()
+
+    def corridas(self):
+        """
+        Lista las corridas archivadas, de la más reciente a la más antigua.
+
+        Returns:
+            list: Diccionarios con 'corrida', 'fecha' y 'paginas'
+        """
+        conn = self._conectar()
+        try:
+            filas = conn.execute('''
+                SELECT corrida, MIN(fecha), COUNT(*) FROM paginas
+                GROUP BY corrida ORDER BY MIN(fecha) DESC
+            ''').fetchall()
+        finally:
+            conn.close()
+        return [{'corrida': c, 'fecha': f, 'paginas': n} for c, f, n in filas]
+
+    def paginas(self, corrida=None):
+        """
+        Obtiene las páginas de una corrida (por defecto, la más reciente).
+
+        Returns:
+            list: Diccionarios con 'corrida', 'fecha' (de la descarga, en formato ISO), 'sitio',
+                'modelo', 'url' y 'hash'
+        """
+        if corrida is None:
+            corridas = self.corridas()
+            if not corridas:
+                return []
+            corrida = corridas[0]['corrida']
+
+        conn = self._conectar()
+        try:
+            filas = conn.execute(
+                "SELECT corrida, fecha, sitio, modelo, url, hash FROM paginas WHERE corrida = ? ORDER BY id",
+                (corrida,)
+            ).fetchall()
+        finally:
+            conn.close()
+        return [dict(zip(('corrida', 'fecha', 'sitio', 'modelo', 'url', 'hash'), fila)) for fila in filas]
+
+# Archivo compartido por todo el proceso
+archivo_html = ArchivoHTML()
@@ -0,0 +1,188 @@
+# batch.py
+"""
+Lote columnar de productos. En lugar de una lista de productos que cada paso recorre
+uno por uno, el lote guarda una columna por campo: el precio como arreglo de NumPy, tienda,
+modelo y vendedor codificados como diccionario (un código entero por producto y la lista
+de valores distintos) y los textos (nombre, link, imagen, id_producto) como arreglos de
+objetos. Los filtros posteriores al parseo se calculan como máscaras sobre las columnas
+(ver filtrar_pagina) y el lote se escribe en la base de datos con inserciones masivas: los
+productos nuevos y los que cambiaron de precio también se separan con máscaras (ver
+guardar_lote_en_db).
+"""
+
+import numpy as np
+
+from src.utils.product import Producto, CAMPOS_PRODUCTO
+
+# Columnas con pocos valores distintos, codificadas como diccionario
+CAMPOS_CATEGORICOS = ('tienda', 'modelo', 'vendedor')
+
+# Columnas de texto libre
+CAMPOS_TEXTO = ('nombre', 'link', 'imagen', 'id_producto')
+
+class ColumnaCategorica:
+    """
+    Columna codificada como diccionario: códigos enteros que indexan la lista de valores distintos.
+    """
+
+    __slots__ = ('codigos', 'categorias')
+
+    def __init__(self, codigos, categorias):
+        self.codigos = codigos
+        self.categorias = categorias
+
+    @classmethod
+    def desde_valores(cls, valores, total):
+        indices = {}
+        codigos = np.fromiter((indices.setdefault(valor, len(indices)) for valor in valores), dtype=np.int32, count=total)
+        categorias = np.empty(len(indices), dtype=object)
+        categorias[:] = list(indices)
+        return cls(codigos, categorias)
+
+    def __len__(self):
+        return len(self.codigos)
+
+    def codigo(self, valor):
+        """
+        Returns:
+            int: Código del valor, o -1 si no aparece en la columna
+        """
+        for codigo, categoria in enumerate(self.categorias):
+            if categoria == valor:
+                return codigo
+        return -1
+
+    def valores(self):
+        """
+        Returns:
+            np.ndarray: Valores decodificados (arreglo de objetos)
+        """
+        return self.categorias[self.codigos]
+
+    def tomar(self, seleccion):
+        # Las categorías se comparten entre el lote original y el filtrado
+        return ColumnaCategorica(self.codigos[seleccion], self.categorias)
+
+def _columna_texto(valores, total):
+    columna = np.empty(total, dtype=object)
+    columna[:] = list(valores)
+    return columna
+
+class LoteProductos:
+    """
+    Productos de una o varias páginas en formato columnar.
+    """
+
+    def __init__(self, precio, categoricas, textos):
+        """
+        Args:
+            precio (np.ndarray): Precios (float64; NaN si el producto no tiene precio)
+            categoricas (dict): Campo de CAMPOS_CATEGORICOS → ColumnaCategorica
+            textos (dict): Campo de CAMPOS_TEXTO → arreglo de objetos
+        """
+        self.precio = precio
+        self.categoricas = categoricas
+        self.textos = textos
+
+    @classmethod
+    def desde_productos(cls, productos):
+        """
+        Construye el lote a partir de productos (Producto o diccionarios con los mismos campos).
+
+        Args:
+            productos (list): Productos extraídos
+
+        Returns:
+            LoteProductos: Lote con una columna por campo
+        """
+        registros = [
+            producto.a_tupla() if isinstance(producto, Producto) else tuple(producto.get(campo) for campo in CAMPOS_PRODUCTO)
+            for producto in productos
+        ]
+        total = len(registros)
+        # Transpuesta: una tupla de valores por campo
+        columnas = dict(zip(CAMPOS_PRODUCTO, zip(*registros))) if registros else dict.fromkeys(CAMPOS_PRODUCTO, ())
+        precio = np.array([np.nan if valor is None else valor for valor in columnas['precio']], dtype=np.float64)
+        categoricas = {campo: ColumnaCategorica.desde_valores(columnas[campo], total) for campo in CAMPOS_CATEGORICOS}
+        textos = {campo: _columna_texto(columnas[campo], total) for campo in CAMPOS_TEXTO}
+        return cls(precio, categoricas, textos)
+
+    def __len__(self):
+        return len(self.precio)
+
+    def columna(self, campo):
+        """
+        Args:
+            campo (str): Campo de CAMPOS_PRODUCTO
+
+        Returns:
+            np.ndarray: Valores de la columna (las categóricas ya decodificadas)
+        """
+        if campo == 'precio':
+            return self.precio
+        if campo in self.categoricas:
+            return self.categoricas[campo].valores()
+        return self.textos[campo]
+
+    def mascara_validos(self):
+        """
+        Equivalente vectorizado de filtrar_productos_validos: precio mayor a 0 y modelo
+        reconocido (diferente de 'Otro').
+
+        Returns:
+            np.ndarray: Máscara booleana
+        """
+        modelo = self.categoricas['modelo']
+        return (self.precio > 0) & (modelo.codigos != modelo.codigo("Otro"))
+
+    def mascara_precio_minimo(self, minimo):
+        """
+        Returns:
+            np.ndarray: Máscara booleana de los productos con precio mayor o igual a minimo
+        """
+        return self.precio >= minimo
+
+    def filtrar(self, mascara):
+        """
+        Args:
+            mascara (np.ndarray): Máscara booleana (o índices) de los productos a conservar
+
+        Returns:
+            LoteProductos: Nuevo lote con los productos seleccionados, en el mismo orden
+        """
+        return LoteProductos(
+            self.precio[mascara],
+            {campo: columna.tomar(mascara) for campo, columna in self.categoricas.items()},
+            {campo: columna[mascara] for campo, columna in self.textos.items()}
+        )
+
+    def validos(self):
+        """
+        Returns:
+            LoteProductos: Productos con precio y modelo reconocido
+        """
+        return self.filtrar(self.mascara_validos())
+
+    def _columnas_python(self, campos):
+        # Columnas como listas de objetos de Python (float y str, no tipos de NumPy)
+        return [self.precio.tolist() if campo == 'precio' else self.columna(campo).tolist() for campo in campos]
+
+    def productos(self):
+        """
+        Returns:
+            list: Productos del lote como registros Producto
+        """
+        return [Producto(*valores) for valores in zip(*self._columnas_python(CAMPOS_PRODUCTO))]
+
+    def filas(self, fecha):
+        """
+        Valores para insertar el lote en la tabla productos (mismo orden que fila_producto).
+
+        Args:
+            fecha (str): Fecha de la captura en formato ISO
+
+        Returns:
+            list: Tuplas (tienda, modelo, nombre, precio, fecha, vendedor, link, imagen, id_producto)
+        """
+        tienda, modelo, nombre, precio, vendedor, link, imagen, id_producto = self._columnas_python(CAMPOS_PRODUCTO)
+        return list(zip(tienda, modelo, nombre, precio, [fecha] * len(self), vendedor, link, imagen, id_producto))
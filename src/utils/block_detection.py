@@ -0,0 +1,134 @@
+# block_detection.py
+"""
+Detección de páginas de bloqueo (CAPTCHA, inicio de sesión obligatorio, "acceso denegado")
+que los sitios devuelven con código 200. La revisión se hace sobre el texto crudo, antes
+de parsear: una página de bloqueo no pasa por BeautifulSoup, cuenta como fallo para el
+backoff y el circuit breaker del host y queda registrada como incidente del sitio.
+"""
+
+import json
+import re
+import threading
+from datetime import datetime
+
+from src.config.config import (
+    MARCADORES_BLOQUEO_POR_SITIO,
+    TITULOS_BLOQUEO,
+    TAMANO_MINIMO_PAGINA,
+    TAMANO_MAXIMO_BLOQUEO,
+    BLOQUEOS_RUTA
+)
+from src.utils.utils import identificar_sitio
+from src.utils.rate_limit import limitador_hosts
+
+PATRON_TITULO = re.compile(r'<title[^>]*>(.*?)</title>', re.IGNORECASE | re.DOTALL)
+PATRON_TITULO_BYTES = re.compile(PATRON_TITULO.pattern.encode('ascii'), re.IGNORECASE | re.DOTALL)
+
+# El <title> siempre está al inicio del documento
+BYTES_CABECERA = 20000
+
+def clasificar_pagina(url, html_content):
+    """
+    Clasifica una página descargada sin construir el árbol del documento.
+
+    Args:
+        url (str): URL de la página
+        html_content (bytes | str): Contenido HTML descargado
+
+    Returns:
+        str: Motivo del bloqueo ('titulo', 'marcador' o 'pagina_reducida'), o None si la
+            página parece normal
+    """
+    if not html_content or len(html_content) >= TAMANO_MAXIMO_BLOQUEO:
+        # Las páginas de bloqueo son pequeñas: una página grande no se revisa
+        return None
+
+    # Las páginas descargadas con requests llegan como bytes: se revisan sin decodificarlas
+    binario = not isinstance(html_content, str)
+    titulo = (PATRON_TITULO_BYTES if binario else PATRON_TITULO).search(html_content, 0, BYTES_CABECERA)
+    if titulo:
+        texto_titulo = titulo.group(1)
+        if binario:
+            texto_titulo = texto_titulo.decode('utf-8', errors='replace')
+        texto_titulo = texto_titulo.strip().lower()
+        if any(bloqueo in texto_titulo for bloqueo in TITULOS_BLOQUEO):
+            return 'titulo'
+
+    contenido = html_content.lower()
+    sitio = identificar_sitio(url)
+    marcadores = MARCADORES_BLOQUEO_POR_SITIO['default'] + MARCADORES_BLOQUEO_POR_SITIO.get(sitio, [])
+    if binario:
+        marcadores = [marcador.encode('utf-8') for marcador in marcadores]
+    if any(marcador in contenido for marcador in marcadores):
+        return 'marcador'
+
+    if len(html_content) < TAMANO_MINIMO_PAGINA.get(sitio, TAMANO_MINIMO_PAGINA['default']):
+        return 'pagina_reducida'
+    return None
+
+class RegistroBloqueos:
+    """
+    Incidentes de bloqueo por sitio: contadores en memoria y un archivo JSON Lines con
+    cada incidente (fecha, sitio, URL, estrategia y motivo).
+    """
+
+    def __init__(self, ruta=BLOQUEOS_RUTA):
+        self.ruta = ruta
+        self.por_sitio = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, url, estrategia, motivo):
+        sitio = identificar_sitio(url)
+        incidente = {
+            'fecha': datetime.now().isoformat(),
+            'sitio': sitio,
+            'url': url,
+            'estrategia': estrategia,
+            'motivo': motivo
+        }
+        with self._lock:
+            contadores = self.por_sitio.setdefault(sitio, {})
+            contadores[motivo] = contadores.get(motivo, 0) + 1
+            if self.ruta:
+                try:
+                    with open(self.ruta, 'a', encoding='utf-8') as f:
+                        f.write(json.dumps(incidente, ensure_ascii=False) + "\n")
+                except OSError as e:
+                    print(f"⚠️ No se pudo registrar el bloqueo: {e}")
+
+    def resumen(self):
+        """
+        Devuelve los incidentes de la corrida por sitio y motivo.
+
+        Returns:
+            dict: {sitio: {motivo: cantidad}}
+        """
+        with self._lock:
+            return {sitio: dict(contadores) for sitio, contadores in self.por_sitio.items()}
+
+def revisar_pagina(url, html_content, estrategia):
+    """
+    Revisa una página recién descargada e informa al limitador del host: una página de
+    bloqueo cuenta como fallo (backoff y circuit breaker) y una página normal como éxito.
+
+    Args:
+        url (str): URL de la página
+        html_content (bytes | str): Contenido HTML descargado (None si la descarga falló)
+        estrategia (str): Estrategia con la que se descargó
+
+    Returns:
+        str: Motivo del bloqueo, o None si la página no es de bloqueo (o no hay página)
+    """
+    if not html_content:
+        return None
+    motivo = clasificar_pagina(url, html_content)
+    if motivo:
+        print(f"🛑 Página de bloqueo ({motivo}) en {url} con {estrategia}")
+        registro_bloqueos.registrar(url, estrategia, motivo)
+        limitador_hosts.registrar_fallo(url)
+    else:
+        limitador_hosts.registrar_exito(url)
+    return motivo
+
+# Registro compartido por todo el proceso
+registro_bloqueos = RegistroBloqueos()
@@ -0,0 +1,172 @@
+# browser_pool.py
+"""
+Pool de navegadores Selenium reutilizables. Evita lanzar (y resolver el driver de)
+un Chrome nuevo por cada URL: los navegadores se piden prestados, se devuelven al
+pool y se reciclan tras un número de páginas o si fallan.
+"""
+
+import atexit
+import threading
+from contextlib import contextmanager
+
+from src.config.config import (
+    MAX_NAVEGADORES,
+    PAGINAS_POR_NAVEGADOR,
+    ESPERA_MAX_NAVEGADOR,
+    SITIOS_HABILITADOS,
+    NAVEGADOR_POR_SITIO
+)
+from src.utils.utils import get_random_user_agent
+from src.utils.proxy_pool import partes_proxy
+
+class PoolSelenium:
+    """
+    Pool de instancias de Chrome headless con un máximo de navegadores simultáneos.
+    """
+
+    def __init__(self, max_navegadores=MAX_NAVEGADORES, paginas_por_navegador=PAGINAS_POR_NAVEGADOR):
+        self.max_navegadores = max_navegadores
+        self.paginas_por_navegador = paginas_por_navegador
+        self._disponibles = []  # Navegadores libres: {'driver': ..., 'paginas': int, 'proxy': str}
+        self._lock = threading.Lock()
+        # Lock aparte para resolver el driver: la descarga de chromedriver no debe bloquear
+        # a quienes solo toman o devuelven un navegador del pool
+        self._lock_driver = threading.Lock()
+        self._cupos = threading.BoundedSemaphore(max_navegadores)
+        self._ruta_driver = None
+        self._driver_resuelto = False
+
+    def _resolver_driver(self):
+        """
+        Resuelve la ruta del binario de chromedriver una sola vez por proceso.
+        Si webdriver_manager no está instalado se deja que Selenium Manager lo resuelva.
+        """
+        if self._driver_resuelto:
+            return self._ruta_driver
+        with self._lock_driver:
+            if self._driver_resuelto:
+                return self._ruta_driver
+            try:
+                from webdriver_manager.chrome import ChromeDriverManager
+                self._ruta_driver = ChromeDriverManager().install()
+            except ImportError:
+                self._ruta_driver = None
+            self._driver_resuelto = True
+            return self._ruta_driver
+
+    def _crear_navegador(self, proxy=None):
+        """
+        Lanza una nueva instancia de Chrome headless.
+        Chrome no acepta credenciales en --proxy-server: los proxies con usuario y
+        contraseña deben autorizar la IP del equipo para usarse con Selenium.
+
+        Args:
+            proxy (str, opcional): URL del proxy por el que sale el navegador
+
+        Returns:
+            WebDriver: Navegador listo para usarse
+        """
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+        from selenium.webdriver.chrome.service import Service
+
+        # Configurar opciones de Chrome
+        chrome_options = Options()
+        chrome_options.add_argument("--headless")
+        chrome_options.add_argument("--no-sandbox")
+        chrome_options.add_argument("--disable-dev-shm-usage")
+        chrome_options.add_argument(f"user-agent={get_random_user_agent()}")
+        if proxy:
+            chrome_options.add_argument(f"--proxy-server={partes_proxy(proxy)['server']}")
+        # Log de red para contar los recursos bloqueados en cada página
+        chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+
+        ruta_driver = self._resolver_driver()
+        service = Service(ruta_driver) if ruta_driver else Service()
+        driver = webdriver.Chrome(service=service, options=chrome_options)
+        driver.set_page_load_timeout(ESPERA_MAX_NAVEGADOR * 3)
+        return driver
+
+    def _descartar(self, entrada):
+        """
+        Cierra un navegador que ya no debe volver al pool.
+        """
+        try:
+            entrada['driver'].quit()
+        except Exception as e:
+            print(f"⚠️ Error al cerrar navegador Selenium: {e}")
+
+    def calentar(self, cantidad=None):
+        """
+        Lanza navegadores por adelantado para que la primera página no pague el arranque.
+        Solo se lanzan los que la corrida va a usar: por defecto uno por sitio habilitado
+        que empieza con Selenium (ninguno si no hay), nunca más que max_navegadores.
+
+        Args:
+            cantidad (int, opcional): Número de navegadores que necesita la corrida
+        """
+        if cantidad is None:
+            cantidad = sum(1 for sitio in SITIOS_HABILITADOS if NAVEGADOR_POR_SITIO.get(sitio) == 'selenium')
+        cantidad = min(cantidad, self.max_navegadores)
+        with self._lock:
+            faltantes = cantidad - len(self._disponibles)
+        for _ in range(max(faltantes, 0)):
+            entrada = {'driver': self._crear_navegador(), 'paginas': 0, 'proxy': None}
+            with self._lock:
+                self._disponibles.append(entrada)
+
+    @contextmanager
+    def navegador(self, proxy=None):
+        """
+        Presta un navegador del pool. Bloquea si ya hay max_navegadores en uso.
+        Si ocurre un error durante su uso el navegador se descarta en vez de devolverse.
+
+        Args:
+            proxy (str, opcional): Proxy por el que debe salir el navegador (el proxy se
+                fija al lanzar Chrome, así que solo se reutilizan navegadores del mismo proxy)
+
+        Yields:
+            WebDriver: Navegador prestado
+        """
+        self._cupos.acquire()
+        try:
+            sobrante = None
+            with self._lock:
+                entrada = next((e for e in self._disponibles if e.get('proxy') == proxy), None)
+                if entrada is not None:
+                    self._disponibles.remove(entrada)
+                elif self._disponibles:
+                    # Se reemplaza un navegador libre de otro proxy para no superar el máximo
+                    sobrante = self._disponibles.pop(0)
+            if sobrante is not None:
+                self._descartar(sobrante)
+            if entrada is None:
+                entrada = {'driver': self._crear_navegador(proxy), 'paginas': 0, 'proxy': proxy}
+
+            try:
+                yield entrada['driver']
+            except Exception:
+                self._descartar(entrada)
+                raise
+
+            entrada['paginas'] += 1
+            if entrada['paginas'] >= self.paginas_por_navegador:
+                self._descartar(entrada)
+            else:
+                with self._lock:
+                    self._disponibles.append(entrada)
+        finally:
+            self._cupos.release()
+
+    def cerrar(self):
+        """
+        Cierra todos los navegadores libres del pool.
+        """
+        with self._lock:
+            disponibles, self._disponibles = self._disponibles, []
+        for entrada in disponibles:
+            self._descartar(entrada)
+
+# Pool compartido por todo el proceso
+pool_selenium = PoolSelenium()
+atexit.register(pool_selenium.cerrar)
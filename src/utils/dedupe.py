@@ -0,0 +1,118 @@
+# dedupe.py
+"""
+Índice de productos de una corrida. La misma publicación suele aparecer en varias
+búsquedas (los resultados de "rtx 4070" incluyen tarjetas 4060 y 4080), y cada aparición
+costaba una consulta de historial, una revisión de alertas y una escritura en la base de
+datos. El índice guarda la observación más reciente de cada (tienda, id_producto) y solo
+deja pasar los productos nuevos en la corrida o los que cambiaron desde la última vez que
+se vieron.
+
+El índice ocupa una observación por producto distinto de la corrida (a lo sumo búsquedas ×
+páginas × productos por página) y ejecutar_pipeline crea uno nuevo en cada corrida; un
+índice que se reutiliza entre corridas se limita a MAX_PRODUCTOS_EN_INDICE observaciones.
+"""
+
+import threading
+
+from src.config.config import MAX_PRODUCTOS_EN_INDICE
+
+class IndiceProductos:
+    """
+    Observaciones de la corrida por (tienda, id_producto), compartidas por todas las
+    etapas y búsquedas.
+    """
+
+    def __init__(self, max_observaciones=MAX_PRODUCTOS_EN_INDICE):
+        """
+        Args:
+            max_observaciones (int): Productos distintos que se recuerdan; al pasarlo se
+                olvida el primero que se vio (None = sin límite)
+        """
+        self.max_observaciones = max_observaciones
+        self._observaciones = {}
+        self._lock = threading.Lock()
+        self.nuevos = 0
+        self.actualizados = 0
+        self.omitidos = 0
+
+    def registrar(self, producto):
+        """
+        Registra una observación y decide si hay que procesarla.
+
+        Args:
+            producto (Producto | dict): Producto extraído
+
+        Returns:
+            bool: True si el producto es nuevo en la corrida o cambió (precio, vendedor, etc.)
+                desde la última observación; False si es una repetición idéntica
+        """
+        id_producto = producto.get('id_producto')
+        if not id_producto:
+            # Sin id no se puede saber si es el mismo producto
+            return True
+        clave = (producto.get('tienda'), id_producto)
+        with self._lock:
+            anterior = self._observaciones.get(clave)
+            self._observaciones[clave] = producto
+            if anterior is None:
+                self.nuevos += 1
+                if self.max_observaciones and len(self._observaciones) > self.max_observaciones:
+                    del self._observaciones[next(iter(self._observaciones))]
+                return True
+            if anterior == producto:
+                self.omitidos += 1
+                return False
+            self.actualizados += 1
+            return True
+
+    def filtrar(self, productos):
+        """
+        Args:
+            productos (list): Productos de una página
+
+        Returns:
+            list: Productos que hay que procesar (ver registrar), en el mismo orden
+        """
+        return [producto for producto in productos if self.registrar(producto)]
+
+    def olvidar(self, productos):
+        """
+        Quita las observaciones de productos que dejó pasar registrar pero no se llegaron a
+        guardar (fallaron las alertas o el guardado), para que su siguiente aparición en la
+        corrida se procese de nuevo en lugar de omitirse.
+
+        Args:
+            productos (list): Productos devueltos por filtrar
+        """
+        with self._lock:
+            for producto in productos:
+                clave = (producto.get('tienda'), producto.get('id_producto'))
+                # Solo si nadie registró después otra observación del mismo producto
+                if self._observaciones.get(clave) is producto:
+                    del self._observaciones[clave]
+
+    def observacion(self, tienda, id_producto):
+        """
+        Returns:
+            Producto | dict: Observación más reciente del producto en la corrida, o None
+        """
+        with self._lock:
+            return self._observaciones.get((tienda, id_producto))
+
+    def __len__(self):
+        with self._lock:
+            return len(self._observaciones)
+
+    def resumen(self):
+        """
+        Returns:
+            dict: Productos distintos, nuevos, actualizados y omitidos (cada omitido es una
+                consulta de historial, una revisión de alertas y una escritura evitadas)
+        """
+        with self._lock:
+            return {
+                'distintos': len(self._observaciones),
+                'nuevos': self.nuevos,
+                'actualizados': self.actualizados,
+                'omitidos': self.omitidos
+            }
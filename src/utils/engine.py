@@ -0,0 +1,147 @@
+# engine.py
+"""
+Descarga asíncrona de páginas para el motor de scraping (la corrida por etapas está en
+pipeline.py): prueba las estrategias de cada sitio sin bloquear el event loop y respeta el
+límite de peticiones y el circuit breaker de cada host (no globales).
+"""
+
+import asyncio
+import time
+
+import aiohttp
+
+from src.config.config import (
+    REINTENTOS_PETICIONES,
+    CACHE_ACTIVADO
+)
+from src.utils.utils import (
+    get_headers,
+    fetch_con_estrategia,
+    descartar_de_cache,
+    cuerpo_html
+)
+from src.utils.playwright_renderer import renderizador_playwright
+from src.utils.http_cache import cache_http, cabeceras_revalidacion
+from src.utils.rate_limit import limitador_hosts
+from src.utils.proxy_pool import pool_proxies, ESTADOS_FALLO_PROXY
+from src.utils.strategy import selector_estrategias, pagina_sin_resultados
+from src.utils.block_detection import revisar_pagina
+
+def pagina_en_cache(url, usar_cache=True):
+    """
+    Busca la página en la caché de respuestas HTTP. Se consulta antes de reservar el turno
+    del host: una página que no se descarga no gasta un token de la cubeta ni la prueba del
+    circuit breaker.
+
+    Args:
+        url (str): URL de la página
+        usar_cache (bool): Si es False, no se consulta la caché
+
+    Returns:
+        bytes | str: Contenido guardado si la entrada sigue fresca, o None
+    """
+    if not (usar_cache and CACHE_ACTIVADO):
+        return None
+    entrada = cache_http.obtener(url, get_headers())
+    if entrada and entrada['fresca']:
+        print(f"📦 Usando respuesta en caché para {url}")
+        return entrada['cuerpo']
+    return None
+
+async def fetch_page_async(session, url, usar_cache=True, continuacion=False):
+    """
+    Versión asíncrona de fetch_page: prueba las estrategias en el orden que indica el
+    selector de estrategias y se queda con la primera página que traiga resultados (las
+    páginas de bloqueo se descartan sin parsearlas).
+
+    Args:
+        session (aiohttp.ClientSession): Sesión HTTP compartida
+        url (str): URL a la que se realizará la petición
+        usar_cache (bool): Si es False, ignora la caché de respuestas
+        continuacion (bool): True si es una página siguiente (2 en adelante) de una búsqueda:
+            una página sin resultados significa que la búsqueda terminó, no que la estrategia
+            falló, así que no se registra ni se prueban otras estrategias
+
+    Returns:
+        bytes | str: Contenido HTML de la página, o None si hubo un error
+    """
+    html = None
+    for indice, estrategia in enumerate(selector_estrategias.plan(url)):
+        # Antes de pasar a otra estrategia se respeta el backoff del host
+        if indice and not await limitador_hosts.esperar_async(url):
+            break
+        inicio = time.monotonic()
+        try:
+            html = await fetch_con_estrategia_async(session, url, estrategia, usar_cache)
+        except Exception as e:
+            print(f"⚠️ Error al obtener la página {url} con {estrategia}: {e}")
+            html = None
+        # Las páginas de bloqueo se detectan antes de parsear y no llegan al scraper
+        bloqueo = revisar_pagina(url, html, estrategia)
+        if continuacion and html and not bloqueo and pagina_sin_resultados(url, html):
+            print(f"🏁 {url} no tiene resultados: fin de la búsqueda")
+            await asyncio.to_thread(descartar_de_cache, url, html, usar_cache)
+            return None
+        if selector_estrategias.registrar(url, estrategia, html, time.monotonic() - inicio, bloqueada=bool(bloqueo)):
+            return html
+        await asyncio.to_thread(descartar_de_cache, url, html, usar_cache)
+        if bloqueo:
+            html = None
+    return html
+
+async def fetch_con_estrategia_async(session, url, estrategia, usar_cache=True):
+    """
+    Descarga una página con una estrategia concreta sin bloquear el event loop: las páginas
+    de Playwright se renderizan como pestañas del renderizador compartido, las de Selenium
+    se cargan en un hilo aparte y las lecturas y escrituras de la caché (sqlite y zlib)
+    también corren en hilos.
+
+    Returns:
+        bytes | str: Contenido HTML de la página, o None si hubo un error
+    """
+    if estrategia == 'selenium':
+        return await asyncio.to_thread(fetch_con_estrategia, url, estrategia, usar_cache)
+
+    headers = get_headers()
+    usar_cache = usar_cache and CACHE_ACTIVADO
+    entrada = await asyncio.to_thread(cache_http.obtener, url, headers) if usar_cache else None
+    if entrada and entrada['fresca']:
+        print(f"📦 Usando respuesta en caché para {url}")
+        return entrada['cuerpo']
+
+    if estrategia == 'playwright':
+        # El renderizador tiene su propio event loop; se espera sin ocupar un hilo
+        html = await renderizador_playwright.renderizar_async(url)
+        if html and usar_cache:
+            await asyncio.to_thread(cache_http.guardar, url, headers, html)
+        return html
+
+    html = None
+    headers.update(cabeceras_revalidacion(entrada))
+    for intento in range(REINTENTOS_PETICIONES):
+        # El primer turno lo reserva ejecutar_pipeline; los reintentos esperan aquí
+        if intento and not await limitador_hosts.esperar_async(url):
+            break
+        try:
+            async with pool_proxies.usar_async(url) as reserva:
+                async with session.get(url, headers=headers, proxy=reserva['proxy']) as response:
+                    limitador_hosts.registrar_respuesta(url, response.status, response.headers)
+                    reserva['exito'] = response.status not in ESTADOS_FALLO_PROXY
+                    if response.status == 304 and entrada:
+                        print(f"📦 Página sin cambios (304), usando caché para {url}")
+                        await asyncio.to_thread(cache_http.renovar, entrada)
+                        return entrada['cuerpo']
+                    if response.status == 200:
+                        html = cuerpo_html(await response.read(), response.headers.get('Content-Type'))
+                        if usar_cache:
+                            await asyncio.to_thread(
+                                cache_http.guardar, url, headers, html,
+                                response.headers.get('ETag'), response.headers.get('Last-Modified')
+                            )
+                        break
+                    print(f"⚠️ Error al obtener la página {url}: Código {response.status}")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            limitador_hosts.registrar_fallo(url)
+            print(f"⚠️ Error al realizar la petición a {url}: {e}")
+
+    return html
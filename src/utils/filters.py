@@ -3,6 +3,166 @@
 Módulo con funciones para filtrar productos según diferentes criterios.
 """
 
+import re
+
+import numpy as np
+
+from src.config.config import PRECIO_MINIMO_GPU, SITIOS_RESPALDO_SIN_MODELO
+from src.utils.batch import LoteProductos
+
+# Lista ampliada de palabras prohibidas organizadas por categorías
+ACCESORIOS = [
+    'cable', 'adaptador', 'conversor', 'connector', 'conector', 'extensor', 
+    'hub', 'splitter', 'extension', 'alargador', 'riser', 'switch', 'kvm'
+]
+
+SOPORTES = [
+    'soporte', 'base', 'stand', 'holder', 'bracket', 'mount', 'rack', 
+    'apoyo', 'patas', 'elevador', 'dock', 'docking'
+]
+
+PROTECCIONES = [
+    'funda', 'carcasa', 'case', 'cover', 'skin', 'protector', 'sleeve',
+    'bag', 'bolsa', 'estuche', 'maletin', 'protección', 'protection'
+]
+
+REFRIGERACION = [
+    'cooler', 'ventilador', 'fan', 'disipador', 'cooling', 'refrigeración',
+    'heatsink', 'radiador', 'thermal', 'térmico', 'pasta térmica', 'thermal paste',
+    'watercooling', 'water cooling', 'liquid cooling', 'enfriamiento'
+]
+
+DECORATIVOS = [
+    'poster', 'sticker', 'pegatina', 'llavero', 'keychain', 'figura', 'figure',
+    'adorno', 'decoración', 'decoration', 'art', 'arte', 'pin', 'pines', 'badge'
+]
+
+OTROS = [
+    'power supply', 'fuente de poder', 'psu', 'mouse pad', 'mousepad',
+    'alfombrilla', 'monitor', 'pantalla', 'screen', 'teclado', 'keyboard',
+    'mouse', 'ratón', 'headset', 'auriculares', 'audífonos', 'PC', 'desktop',
+    'portatil', 'laptop', 'notebook', 'cámara', 'camera', 'webcam', 'micrófono',
+    'microphone', 'parlante', 'speaker', 'escritorio', 'desk', 'silla', 'chair',
+    'ram', 'memory', 'memoria', 'ssd', 'hdd', 'disco', 'drive', 'motherboard',
+    'placa base', 'placa madre', 'tarjeta madre', 'mother board'
+]
+
+# Palabras que indican definitivamente que es una GPU
+PALABRAS_GPU = [
+    'geforce', 'rtx', 'nvidia', 'graphics card', 'tarjeta gráfica', 
+    'tarjeta de video', 'gpu', 'graphics processing unit', 'gddr', 'vram'
+]
+
+# Algunas palabras son muy indicativas de accesorios, incluso si menciona GPU
+MUY_ESPECIFICAS = ['cable', 'soporte', 'base', 'funda', 'adaptador', 'conversor', 'pasta']
+
+class DetectorPalabras:
+    """
+    Busca todas las palabras clave de varias categorías en una sola pasada por el texto.
+    Las palabras se compilan una vez en una expresión con forma de árbol de prefijos (en
+    cada posición solo se prueban las palabras que empiezan con ese carácter), y cada
+    palabra encontrada cuenta también las palabras más cortas que contiene ('pines' → 'pin').
+    El resultado es el mismo que comprobar `palabra in texto` para cada palabra.
+    """
+
+    def __init__(self, categorias):
+        """
+        Args:
+            categorias (dict): Nombre de la categoría → lista de palabras (se comparan en minúsculas)
+        """
+        self.categorias = tuple(categorias)
+        # Cada palabra suma a su categoría tantas veces como aparezca en la lista
+        self._pesos = {}
+        for categoria, palabras in categorias.items():
+            for palabra in palabras:
+                pesos = self._pesos.setdefault(palabra.lower(), {})
+                pesos[categoria] = pesos.get(categoria, 0) + 1
+
+        palabras = list(self._pesos)
+        self._contenidas = {palabra: [otra for otra in palabras if otra in palabra] for palabra in palabras}
+        self._patron = re.compile(f'(?=({self._expresion(self._arbol(palabras))}))') if palabras else None
+
+    @staticmethod
+    def _arbol(palabras):
+        arbol = {}
+        for palabra in palabras:
+            nodo = arbol
+            for caracter in palabra:
+                nodo = nodo.setdefault(caracter, {})
+            nodo[''] = True
+        return arbol
+
+    @classmethod
+    def _expresion(cls, nodo):
+        # Las ramas opcionales son voraces: en cada posición coincide la palabra más larga
+        ramas = [re.escape(caracter) + cls._expresion(hijo) for caracter, hijo in sorted(nodo.items()) if caracter]
+        if not ramas:
+            return ''
+        expresion = ramas[0] if len(ramas) == 1 else f"(?:{'|'.join(ramas)})"
+        return f'(?:{expresion})?' if '' in nodo else expresion
+
+    def encontrar(self, texto):
+        """
+        Args:
+            texto (str): Texto en minúsculas
+            
+        Returns:
+            set: Palabras clave que aparecen en el texto
+        """
+        encontradas = set()
+        if self._patron is not None:
+            for palabra in set(self._patron.findall(texto)):
+                encontradas.update(self._contenidas[palabra])
+        return encontradas
+
+    def contar(self, texto):
+        """
+        Args:
+            texto (str): Texto en minúsculas
+            
+        Returns:
+            tuple: (dict categoría → número de palabras de la lista encontradas, set de palabras encontradas)
+        """
+        conteo = dict.fromkeys(self.categorias, 0)
+        encontradas = self.encontrar(texto)
+        for palabra in encontradas:
+            for categoria, peso in self._pesos[palabra].items():
+                conteo[categoria] += peso
+        return conteo, encontradas
+
+# Todas las categorías compiladas una sola vez
+detector_irrelevantes = DetectorPalabras({
+    'prohibidas': ACCESORIOS + SOPORTES + PROTECCIONES + REFRIGERACION + DECORATIVOS + OTROS,
+    'gpu': PALABRAS_GPU,
+    'muy_especificas': MUY_ESPECIFICAS
+})
+
+def relevancia_nombre(nombre):
+    """
+    Aplica las reglas de decisión del filtro de irrelevantes que dependen solo del nombre.
+    Las palabras de todas las categorías se buscan en una sola pasada (ver DetectorPalabras).
+    
+    Args:
+        nombre (str): Nombre del producto en minúsculas
+        
+    Returns:
+        bool | None: True o False si el nombre decide solo, None si depende del precio
+    """
+    conteo, encontradas = detector_irrelevantes.contar(nombre)
+    
+    # Reglas de decisión mejoradas:
+    # 1. Si tiene palabras específicas que son muy indicativas de no ser una GPU, no es relevante
+    # 2. Si tiene "rtx" o "geforce" y no tiene palabras muy específicas de accesorios, es relevante
+    # 3. Si tiene más palabras prohibidas que palabras de GPU, probablemente no es relevante
+    # 4. Si no, es relevante solo si el precio alcanza el de una GPU (PRECIO_MINIMO_GPU)
+    if conteo['muy_especificas']:
+        return False
+    if 'rtx' in encontradas or 'geforce' in encontradas:
+        return True
+    if conteo['prohibidas'] > conteo['gpu']:
+        return False
+    return None
+
 def filtrar_productos_irrelevantes(productos):
     """
     Filtra productos irrelevantes como cables, soportes, fundas, etc.
@@ -14,98 +174,67 @@ def filtrar_productos_irrelevantes(productos):
     Returns:
         list: Lista filtrada de productos
     """
-    # Lista ampliada de palabras prohibidas organizadas por categorías
-    accesorios = [
-        'cable', 'adaptador', 'conversor', 'connector', 'conector', 'extensor', 
-        'hub', 'splitter', 'extension', 'alargador', 'riser', 'switch', 'kvm'
-    ]
-    
-    soportes = [
-        'soporte', 'base', 'stand', 'holder', 'bracket', 'mount', 'rack', 
-        'apoyo', 'patas', 'elevador', 'dock', 'docking'
-    ]
-    
-    protecciones = [
-        'funda', 'carcasa', 'case', 'cover', 'skin', 'protector', 'sleeve',
-        'bag', 'bolsa', 'estuche', 'maletin', 'protección', 'protection'
-    ]
-    
-    refrigeracion = [
-        'cooler', 'ventilador', 'fan', 'disipador', 'cooling', 'refrigeración',
-        'heatsink', 'radiador', 'thermal', 'térmico', 'pasta térmica', 'thermal paste',
-        'watercooling', 'water cooling', 'liquid cooling', 'enfriamiento'
-    ]
-    
-    decorativos = [
-        'poster', 'sticker', 'pegatina', 'llavero', 'keychain', 'figura', 'figure',
-        'adorno', 'decoración', 'decoration', 'art', 'arte', 'pin', 'pines', 'badge'
-    ]
-    
-    otros = [
-        'power supply', 'fuente de poder', 'psu', 'mouse pad', 'mousepad',
-        'alfombrilla', 'monitor', 'pantalla', 'screen', 'teclado', 'keyboard',
-        'mouse', 'ratón', 'headset', 'auriculares', 'audífonos', 'PC', 'desktop',
-        'portatil', 'laptop', 'notebook', 'cámara', 'camera', 'webcam', 'micrófono',
-        'microphone', 'parlante', 'speaker', 'escritorio', 'desk', 'silla', 'chair',
-        'ram', 'memory', 'memoria', 'ssd', 'hdd', 'disco', 'drive', 'motherboard',
-        'placa base', 'placa madre', 'tarjeta madre', 'mother board'
-    ]
-    
-    # Combinamos todas las categorías
-    palabras_prohibidas = accesorios + soportes + protecciones + refrigeracion + decorativos + otros
-    
-    # Palabras que indican definitivamente que es una GPU
-    palabras_gpu = [
-        'geforce', 'rtx', 'nvidia', 'graphics card', 'tarjeta gráfica', 
-        'tarjeta de video', 'gpu', 'graphics processing unit', 'gddr', 'vram'
-    ]
-    
     productos_filtrados = []
     
     for producto in productos:
-        nombre = producto.get('nombre', '').lower()
-        es_relevante = True
+        es_relevante = relevancia_nombre(producto.get('nombre', '').lower())
         
         # Si el precio es demasiado bajo para ser una GPU, probablemente no sea relevante
-        if producto.get('precio', 0) < 2000:  # Asumiendo que una GPU RTX 4000 no costará menos de 2000 pesos
-            es_relevante = False
-        
-        # Verificar si el nombre contiene alguna palabra prohibida
-        palabras_prohibidas_encontradas = []
-        for palabra in palabras_prohibidas:
-            if palabra.lower() in nombre:
-                palabras_prohibidas_encontradas.append(palabra)
-        
-        # Verificar si el nombre contiene palabras que indican que es una GPU
-        palabras_gpu_encontradas = []
-        for palabra in palabras_gpu:
-            if palabra.lower() in nombre:
-                palabras_gpu_encontradas.append(palabra)
-        
-        # Reglas de decisión mejoradas:
-        # 1. Si tiene más palabras prohibidas que palabras de GPU, probablemente no es relevante
-        # 2. Si tiene palabras específicas que son muy indicativas de no ser una GPU, no es relevante
-        # 3. Si tiene "rtx" o "geforce" y no tiene palabras muy específicas de accesorios, es relevante
-        
-        if len(palabras_prohibidas_encontradas) > len(palabras_gpu_encontradas):
-            es_relevante = False
-        
-        # Algunas palabras son muy indicativas de accesorios, incluso si menciona GPU
-        muy_especificas = ['cable', 'soporte', 'base', 'funda', 'adaptador', 'conversor', 'pasta']
-        for palabra in muy_especificas:
-            if palabra in nombre:
-                es_relevante = False
-                break
-        
-        # Si contiene rtx y no tiene palabras muy específicas de accesorios, probablemente es relevante
-        if ('rtx' in nombre or 'geforce' in nombre) and not any(p in nombre for p in muy_especificas):
-            es_relevante = True
+        if es_relevante is None:
+            es_relevante = producto.get('precio', 0) >= PRECIO_MINIMO_GPU
         
         if es_relevante:
             productos_filtrados.append(producto)
     
     return productos_filtrados
 
+def mascara_relevantes(lote):
+    """
+    Equivalente vectorizado de filtrar_productos_irrelevantes: las reglas del nombre se
+    evalúan una vez por nombre y el precio mínimo se aplica como máscara sobre el lote.
+    
+    Args:
+        lote (LoteProductos): Lote de productos
+        
+    Returns:
+        np.ndarray: Máscara booleana de los productos relevantes
+    """
+    # 1 = relevante, 0 = irrelevante, -1 = depende del precio
+    decisiones = np.fromiter(
+        (-1 if decision is None else decision
+         for decision in map(relevancia_nombre, (str(nombre or '').lower() for nombre in lote.textos['nombre']))),
+        dtype=np.int8, count=len(lote)
+    )
+    return (decisiones == 1) | ((decisiones == -1) & lote.mascara_precio_minimo(PRECIO_MINIMO_GPU))
+
+def filtrar_pagina(productos, sitio):
+    """
+    Filtros posteriores al parseo de una página, aplicados una sola vez sobre el lote
+    columnar: precio mayor a 0, modelo reconocido y productos relevantes. En los sitios de
+    SITIOS_RESPALDO_SIN_MODELO, si ningún producto tiene modelo reconocido se conservan los
+    que tienen precio y son relevantes.
+    
+    Args:
+        productos (list | LoteProductos): Productos extraídos de la página
+        sitio (str): Sitio de la página (ej: 'amazon')
+        
+    Returns:
+        list: Productos de la página que pasan los filtros, en el mismo orden
+    """
+    lote = productos if isinstance(productos, LoteProductos) else LoteProductos.desde_productos(productos)
+    validos = lote.mascara_validos()
+    relevantes = mascara_relevantes(lote)
+    seleccion = validos & relevantes
+    print(f"Total de productos con modelo reconocido: {int(validos.sum())}")
+    
+    if not seleccion.any() and len(lote) and sitio in SITIOS_RESPALDO_SIN_MODELO:
+        print("No se encontraron productos válidos, incluyendo algunos sin modelo reconocido...")
+        # Filtrar solo por precio y palabras prohibidas
+        seleccion = (lote.precio > 0) & relevantes
+    
+    print(f"Total de productos válidos después de filtrar: {int(seleccion.sum())}")
+    return lote.filtrar(seleccion).productos()
+
 def filtrar_productos_por_busqueda(productos, termino_busqueda):
     """
     Filtra productos según un término de búsqueda.
@@ -0,0 +1,190 @@
+# http_cache.py
+"""
+Caché persistente de respuestas HTTP en SQLite. Las entradas se identifican por URL y
+por las cabeceras que cambian el contenido, tienen un TTL, se revalidan con
+ETag/Last-Modified cuando el servidor los envía y se expulsan por LRU al superar el
+tamaño máximo configurado.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+import zlib
+
+from src.config.config import (
+    CACHE_RUTA,
+    CACHE_TTL_SEGUNDOS,
+    CACHE_TTL_POR_SITIO,
+    CACHE_MAX_BYTES,
+    CACHE_HEADERS_CLAVE
+)
+from src.utils.utils import identificar_sitio, codificar_html
+
+class CacheHTTP:
+    """
+    Caché de respuestas HTTP en disco con expulsión LRU.
+    """
+
+    def __init__(self, ruta=CACHE_RUTA, ttl=CACHE_TTL_SEGUNDOS, max_bytes=CACHE_MAX_BYTES):
+        self.ruta = ruta
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._tabla_creada = False
+
+    def _conectar(self):
+        conn = sqlite3.connect(self.ruta, timeout=30)
+        if not self._tabla_creada:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS respuestas (
+                    clave TEXT PRIMARY KEY,
+                    url TEXT,
+                    cuerpo BLOB,
+                    etag TEXT,
+                    last_modified TEXT,
+                    guardado REAL,
+                    ultimo_acceso REAL,
+                    tamano INTEGER
+                )
+            ''')
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_respuestas_acceso ON respuestas (ultimo_acceso)")
+            self._tabla_creada = True
+        return conn
+
+    def clave(self, url, headers=None):
+        """
+        Genera la clave de caché a partir de la URL y las cabeceras relevantes
+        (el User-Agent aleatorio no forma parte de la clave).
+        """
+        headers = headers or {}
+        partes = [url] + [f"{nombre}:{headers.get(nombre, '')}" for nombre in CACHE_HEADERS_CLAVE]
+        return hashlib.sha256("\n".join(partes).encode('utf-8')).hexdigest()
+
+    def ttl_para(self, url):
+        return CACHE_TTL_POR_SITIO.get(identificar_sitio(url), self.ttl)
+
+    def obtener(self, url, headers=None):
+        """
+        Busca una respuesta en la caché.
+
+        Args:
+            url (str): URL solicitada
+            headers (dict, opcional): Cabeceras de la petición
+
+        Returns:
+            dict: Entrada con 'cuerpo' (bytes sin decodificar), 'etag', 'last_modified' y
+                'fresca' (True si no ha expirado el TTL), o None si no está en caché
+        """
+        clave = self.clave(url, headers)
+        with self._lock:
+            conn = self._conectar()
+            try:
+                fila = conn.execute(
+                    "SELECT cuerpo, etag, last_modified, guardado FROM respuestas WHERE clave = ?", (clave,)
+                ).fetchone()
+                if not fila:
+                    return None
+                conn.execute("UPDATE respuestas SET ultimo_acceso = ? WHERE clave = ?", (time.time(), clave))
+                conn.commit()
+            finally:
+                conn.close()
+
+        cuerpo, etag, last_modified, guardado = fila
+        return {
+            'clave': clave,
+            'cuerpo': zlib.decompress(cuerpo),
+            'etag': etag,
+            'last_modified': last_modified,
+            'fresca': time.time() - guardado < self.ttl_para(url)
+        }
+
+    def guardar(self, url, headers, cuerpo, etag=None, last_modified=None):
+        """
+        Guarda (o reemplaza) una respuesta y expulsa las entradas menos usadas si se
+        supera el tamaño máximo. El cuerpo puede ser bytes (se guardan tal cual) o texto.
+        """
+        comprimido = zlib.compress(codificar_html(cuerpo))
+        ahora = time.time()
+        with self._lock:
+            conn = self._conectar()
+            try:
+                conn.execute('''
+                    INSERT OR REPLACE INTO respuestas
+                    (clave, url, cuerpo, etag, last_modified, guardado, ultimo_acceso, tamano)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (self.clave(url, headers), url, comprimido, etag, last_modified, ahora, ahora, len(comprimido)))
+                self._expulsar(conn)
+                conn.commit()
+            finally:
+                conn.close()
+
+    def renovar(self, entrada):
+        """
+        Marca una entrada como fresca de nuevo (el servidor respondió 304 Not Modified).
+        """
+        ahora = time.time()
+        with self._lock:
+            conn = self._conectar()
+            try:
+                conn.execute(
+                    "UPDATE respuestas SET guardado = ?, ultimo_acceso = ? WHERE clave = ?",
+                    (ahora, ahora, entrada['clave'])
+                )
+                conn.commit()
+            finally:
+                conn.close()
+
+    def eliminar(self, url, headers=None):
+        """
+        Elimina la entrada de una URL (ej: la página llegó sin resultados y no debe reutilizarse).
+        """
+        with self._lock:
+            conn = self._conectar()
+            try:
+                conn.execute("DELETE FROM respuestas WHERE clave = ?", (self.clave(url, headers),))
+                conn.commit()
+            finally:
+                conn.close()
+
+    def _expulsar(self, conn):
+        """
+        Elimina las entradas con el acceso más antiguo hasta quedar por debajo de max_bytes.
+        """
+        total = conn.execute("SELECT COALESCE(SUM(tamano), 0) FROM respuestas").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for clave, tamano in conn.execute("SELECT clave, tamano FROM respuestas ORDER BY ultimo_acceso ASC").fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM respuestas WHERE clave = ?", (clave,))
+            total -= tamano
+
+    def limpiar(self):
+        """
+        Elimina todas las entradas de la caché.
+        """
+        with self._lock:
+            conn = self._conectar()
+            try:
+                conn.execute("DELETE FROM respuestas")
+                conn.commit()
+            finally:
+                conn.close()
+
+def cabeceras_revalidacion(entrada):
+    """
+    Genera las cabeceras condicionales para revalidar una entrada expirada.
+
+    Returns:
+        dict: If-None-Match y/o If-Modified-Since según lo que haya enviado el servidor
+    """
+    cabeceras = {}
+    if entrada and entrada.get('etag'):
+        cabeceras['If-None-Match'] = entrada['etag']
+    if entrada and entrada.get('last_modified'):
+        cabeceras['If-Modified-Since'] = entrada['last_modified']
+    return cabeceras
+
+# Caché compartida por todo el proceso
+cache_http = CacheHTTP()
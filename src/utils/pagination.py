@@ -0,0 +1,100 @@
+# pagination.py
+"""
+Paginación de los resultados de búsqueda. Cada sitio se recorre siguiendo el enlace a la
+página siguiente o con una plantilla de URL (número de página o desplazamiento), según
+PAGINACION_POR_SITIO.
+"""
+
+import html
+import re
+from urllib.parse import urljoin
+
+from src.config.config import PAGINACION_POR_SITIO
+from src.utils.utils import identificar_sitio
+
+PATRON_ENLACE = re.compile(r'<a\b[^>]*>', re.IGNORECASE)
+PATRON_HREF = re.compile(r'href\s*=\s*["\']([^"\']+)["\']', re.IGNORECASE)
+PATRON_ENLACE_BYTES = re.compile(PATRON_ENLACE.pattern.encode('ascii'), re.IGNORECASE)
+PATRON_HREF_BYTES = re.compile(PATRON_HREF.pattern.encode('ascii'), re.IGNORECASE)
+
+def buscar_enlace_siguiente(html_content, marcador):
+    """
+    Busca el enlace a la página siguiente sin construir el árbol del documento: se revisan
+    solo las etiquetas <a> y se toma la primera que contenga el marcador.
+
+    Args:
+        html_content (bytes | str): Contenido HTML de la página actual
+        marcador (str): Texto que identifica la etiqueta del enlace (ej: una clase CSS)
+
+    Returns:
+        str: href del enlace (sin escapar), o None si no hay página siguiente
+    """
+    if isinstance(html_content, str):
+        patron_enlace, patron_href = PATRON_ENLACE, PATRON_HREF
+    else:
+        # Página sin decodificar (descargada con requests): se busca sobre los bytes
+        patron_enlace, patron_href = PATRON_ENLACE_BYTES, PATRON_HREF_BYTES
+        marcador = marcador.encode('utf-8')
+
+    for etiqueta in patron_enlace.finditer(html_content):
+        if marcador in etiqueta.group(0):
+            href = patron_href.search(etiqueta.group(0))
+            if href:
+                enlace = href.group(1)
+                if not isinstance(enlace, str):
+                    enlace = enlace.decode('utf-8', errors='replace')
+                return html.unescape(enlace)
+    return None
+
+def hay_pagina_siguiente(html_content, config):
+    """
+    Decide, sin parsear la página, si una búsqueda paginada con plantilla puede tener más
+    resultados: la página muestra el control de página siguiente o trae una página completa.
+
+    Args:
+        html_content (bytes | str): Contenido HTML de la página actual
+        config (dict): Configuración del sitio en PAGINACION_POR_SITIO
+
+    Returns:
+        bool: True si conviene pedir la página siguiente
+    """
+    if not html_content:
+        return False
+    marcadores = list(config.get('marcadores', []))
+    item = config.get('item')
+    if not isinstance(html_content, str):
+        marcadores = [marcador.encode('utf-8') for marcador in marcadores]
+        item = item.encode('utf-8') if item else None
+    if any(marcador in html_content for marcador in marcadores):
+        return True
+    return bool(item and config.get('por_pagina')) and html_content.count(item) >= config['por_pagina']
+
+def url_siguiente_pagina(url_inicial, url_actual, html_content, pagina):
+    """
+    Obtiene la URL de la página de resultados que sigue a la actual.
+
+    Args:
+        url_inicial (str): URL de la primera página de la búsqueda
+        url_actual (str): URL de la página actual (base de los enlaces relativos)
+        html_content (bytes | str): Contenido HTML de la página actual
+        pagina (int): Número de la página actual (la primera es 1)
+
+    Returns:
+        str: URL de la siguiente página, o None si el sitio no tiene paginación configurada
+            o la página actual no indica que haya más
+    """
+    config = PAGINACION_POR_SITIO.get(identificar_sitio(url_inicial))
+    if not config:
+        return None
+
+    if config.get('siguiente'):
+        href = buscar_enlace_siguiente(html_content, config['siguiente'])
+        return urljoin(url_actual, href) if href else None
+
+    if not hay_pagina_siguiente(html_content, config):
+        return None
+    return config['plantilla'].format(
+        url=url_inicial,
+        pagina=pagina + 1,
+        desplazamiento=pagina * config.get('por_pagina', 0) + 1
+    )
@@ -0,0 +1,193 @@
+# parse_pool.py
+"""
+Pool de procesos para parsear las páginas descargadas. El parseo con BeautifulSoup usa CPU
+y retiene el GIL, así que en un solo proceso las descargas concurrentes terminan esperando
+al parser. Aquí cada página (bytes sin decodificar + sitio) se parsea en otro proceso, uno
+por núcleo por defecto, y solo vuelven los productos como tuplas compactas. Una cola
+acotada limita las páginas pendientes para que las descargas se detengan si el parseo no
+da abasto.
+"""
+
+import asyncio
+import atexit
+import importlib
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from src.config.config import PROCESOS_PARSEO, MAX_PAGINAS_EN_PARSEO
+from src.utils.product import Producto, CAMPOS_PRODUCTO
+
+# Función de scraping de cada sitio: (módulo, función). Cada proceso importa solo los
+# scrapers de los sitios que le tocan
+SCRAPERS_POR_SITIO = {
+    'amazon': ('src.scrapers.amazon_scraper', 'scrape_amazon_page'),
+    'mercadolibre': ('src.scrapers.mercadolibre_scraper', 'scrape_mercadolibre_page'),
+    'newegg': ('src.scrapers.newegg_scraper', 'scrape_newegg_page'),
+    'bestbuy': ('src.scrapers.bestbuy_scraper', 'scrape_bestbuy_page'),
+    'aliexpress': ('src.scrapers.aliexpress_scraper', 'scrape_aliexpress_page')
+}
+
+# Reinicios tras los que se deja de usar el pool y se parsea en el proceso principal
+MAX_REINICIOS_POOL = 3
+
+def parsear_pagina(sitio, html_content):
+    """
+    Ejecuta el scrape_*_page del sitio. Es la función que corre en los procesos del pool.
+
+    Args:
+        sitio (str): Sitio de la página (ej: 'amazon')
+        html_content (bytes | str): Contenido HTML de la página
+
+    Returns:
+        list: Productos como tuplas con los valores de CAMPOS_PRODUCTO
+    """
+    modulo, funcion = SCRAPERS_POR_SITIO[sitio]
+    productos = getattr(importlib.import_module(modulo), funcion)(html_content)
+    return [tuple(producto.get(campo) for campo in CAMPOS_PRODUCTO) for producto in productos]
+
+def producto_desde_registro(registro):
+    """
+    Reconstruye el producto a partir de la tupla que devuelve el pool.
+    """
+    return Producto(*registro)
+
+class PoolParseo:
+    """
+    Procesos de parseo compartidos y cola acotada de páginas pendientes.
+    """
+
+    def __init__(self, procesos=PROCESOS_PARSEO, max_pendientes=MAX_PAGINAS_EN_PARSEO):
+        self.procesos = procesos or os.cpu_count() or 1
+        self.max_pendientes = max_pendientes or 2 * self.procesos
+        self._cupos = threading.BoundedSemaphore(self.max_pendientes)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._reinicios = 0
+
+    def _obtener_executor(self):
+        """
+        Arranca los procesos la primera vez que se necesitan. Se usa 'spawn' para que los
+        procesos no hereden los hilos ni las conexiones abiertas del proceso principal.
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.procesos, mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._executor
+
+    def _enviar(self, sitio, html_content):
+        """
+        Envía una página al pool (con un lugar de la cola ya reservado) y libera el lugar
+        cuando termina.
+        """
+        try:
+            futuro = self._obtener_executor().submit(parsear_pagina, sitio, html_content)
+        except Exception:
+            self._cupos.release()
+            raise
+        futuro.add_done_callback(lambda _: self._cupos.release())
+        return futuro
+
+    @property
+    def disponible(self):
+        """
+        False si el pool se rompió demasiadas veces y las páginas se parsean en el proceso principal.
+        """
+        return self._reinicios < MAX_REINICIOS_POOL
+
+    def _reiniciar(self, error):
+        """
+        Descarta un pool roto (un proceso murió) para que la siguiente página arranque uno nuevo.
+        """
+        with self._lock:
+            self._reinicios += 1
+            executor, self._executor = self._executor, None
+        if self.disponible:
+            print(f"⚠️ El pool de parseo falló ({error}), se reinicia")
+        else:
+            print(f"⚠️ El pool de parseo falló {self._reinicios} veces ({error}), se parsea en el proceso principal")
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def parsear(self, sitio, html_content):
+        """
+        Parsea una página en el pool. Bloquea mientras la cola de páginas está llena.
+
+        Args:
+            sitio (str): Sitio de la página (ej: 'amazon')
+            html_content (bytes | str): Contenido HTML de la página
+
+        Returns:
+            list: Productos extraídos (igual que scrape_*_page)
+        """
+        if not self.disponible:
+            return [producto_desde_registro(registro) for registro in parsear_pagina(sitio, html_content)]
+        self._cupos.acquire()
+        try:
+            registros = self._enviar(sitio, html_content).result()
+        except BrokenProcessPool as e:
+            self._reiniciar(e)
+            registros = parsear_pagina(sitio, html_content)
+        return [producto_desde_registro(registro) for registro in registros]
+
+    async def _tomar_cupo_async(self):
+        """
+        Espera un lugar en la cola sin bloquear el event loop. La cola también la usan hilos
+        (parsear), así que se espera en un hilo aparte; si la tarea se cancela mientras
+        espera, el lugar que ese hilo consiga después se devuelve en lugar de perderse.
+        """
+        if self._cupos.acquire(blocking=False):
+            return
+        lock = threading.Lock()
+        estado = {'tomado': False, 'cancelado': False}
+
+        def tomar():
+            self._cupos.acquire()
+            with lock:
+                if estado['cancelado']:
+                    self._cupos.release()
+                else:
+                    estado['tomado'] = True
+
+        try:
+            await asyncio.to_thread(tomar)
+        except asyncio.CancelledError:
+            with lock:
+                estado['cancelado'] = True
+                if estado['tomado']:
+                    # El hilo ya tenía el lugar cuando llegó la cancelación
+                    self._cupos.release()
+            raise
+
+    async def parsear_async(self, sitio, html_content):
+        """
+        Versión asíncrona de parsear: espera su lugar en la cola y el resultado sin
+        bloquear el event loop, así que las descargas siguen avanzando mientras se parsea.
+        """
+        if not self.disponible:
+            registros = await asyncio.to_thread(parsear_pagina, sitio, html_content)
+            return [producto_desde_registro(registro) for registro in registros]
+        await self._tomar_cupo_async()
+        try:
+            registros = await asyncio.wrap_future(self._enviar(sitio, html_content))
+        except BrokenProcessPool as e:
+            self._reiniciar(e)
+            registros = await asyncio.to_thread(parsear_pagina, sitio, html_content)
+        return [producto_desde_registro(registro) for registro in registros]
+
+    def cerrar(self):
+        """
+        Detiene los procesos del pool.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+# Pool compartido por todo el proceso
+pool_parseo = PoolParseo()
+atexit.register(pool_parseo.cerrar)
@@ -0,0 +1,250 @@
+# pipeline.py
+"""
+Corrida de scraping como una cadena de etapas conectadas por colas acotadas:
+
+    descarga → parseo → ids nuevos y duplicados → alertas → guardado
+
+Cada etapa tiene su propio número de tareas (CONCURRENCIA_ETAPAS) y solo se comunica
+con la siguiente por una cola de TAMANO_COLAS_PIPELINE páginas. Si una etapa se atrasa,
+su cola se llena y las anteriores esperan (las descargas se detienen en lugar de
+acumular páginas en memoria). Con retener=False los productos no se juntan en una lista
+al final, así que la memoria no crece con el número de sitios, modelos y páginas.
+
+Las alertas van antes del guardado porque comparan con el historial previo a la página
+(igual que procesar_productos). Los productos que ya se vieron idénticos en otra búsqueda
+de la corrida no pasan a las alertas ni al guardado (ver IndiceProductos).
+"""
+
+import asyncio
+
+import aiohttp
+
+from src.config.config import (
+    TIMEOUT_PETICIONES,
+    MAX_PETICIONES_CONCURRENTES,
+    MAX_PAGINAS_POR_BUSQUEDA,
+    CONCURRENCIA_ETAPAS,
+    TAMANO_COLAS_PIPELINE,
+    RETENER_PRODUCTOS,
+    DEDUPLICAR_CORRIDA
+)
+from src.utils.engine import fetch_page_async, pagina_en_cache
+from src.utils.rate_limit import limitador_hosts
+from src.utils.pagination import url_siguiente_pagina
+from src.utils.dedupe import IndiceProductos
+
+# Marca de fin de la entrada de una etapa
+FIN = object()
+
+async def _etapa(nombre, entrada, salida, funcion, tareas, tareas_siguiente):
+    """
+    Ejecuta una etapa con varias tareas que toman páginas de la cola de entrada hasta
+    recibir FIN. Lo que devuelve la función pasa a la cola de salida (None = nada que
+    pasar). Al terminar todas las tareas se envía FIN a cada tarea de la etapa siguiente.
+    """
+    async def trabajar():
+        while True:
+            pagina = await entrada.get()
+            if pagina is FIN:
+                return
+            try:
+                resultado = await funcion(pagina)
+            except Exception as e:
+                print(f"❌ Error en la etapa de {nombre} ({pagina['url']}): {e}")
+                resultado = None
+                if not pagina['senal'].done():
+                    # La búsqueda no espera una página que no llegará a la etapa de ids nuevos
+                    pagina['senal'].set_result(False)
+            if resultado is not None and salida is not None:
+                await salida.put(resultado)
+
+    await asyncio.gather(*(trabajar() for _ in range(tareas)))
+    if salida is not None:
+        for _ in range(tareas_siguiente):
+            await salida.put(FIN)
+
+async def ejecutar_pipeline(busquedas, extraer, alertar, guardar, usar_cache=True, max_paginas=MAX_PAGINAS_POR_BUSQUEDA,
+                            concurrencia=None, tamano_colas=TAMANO_COLAS_PIPELINE, retener=RETENER_PRODUCTOS,
+                            pool_parseo=None, deduplicar=DEDUPLICAR_CORRIDA, indice_productos=None):
+    """
+    Ejecuta todas las búsquedas por etapas, recorriendo hasta max_paginas páginas de
+    resultados por búsqueda: la página N+1 se descarga mientras la N avanza por el pipeline,
+    y la búsqueda termina cuando una página no trae ningún id_producto nuevo.
+
+    Args:
+        busquedas (list): Lista de diccionarios con las claves 'sitio', 'modelo', 'url' y 'parser'
+        extraer (callable): extraer(busqueda, html, productos) -> list; recibe los productos ya
+            parseados en el pool (o None) y devuelve los productos de la página
+        alertar (callable): alertar(productos); revisa el historial y envía alertas
+        guardar (callable): guardar(productos); guarda los productos en la base de datos
+        usar_cache (bool): Si es False, se ignora la caché de respuestas HTTP
+        max_paginas (int): Número máximo de páginas por búsqueda
+        concurrencia (dict, opcional): Tareas por etapa ('descarga', 'parseo', 'alertas',
+            'guardado'); las que falten se toman de CONCURRENCIA_ETAPAS, salvo 'parseo' con
+            pool_parseo, que por defecto es el número de lugares de la cola del pool
+        tamano_colas (int): Páginas que caben en la cola de entrada de cada etapa
+        retener (bool): Si es False, no se devuelven los productos (memoria constante)
+        pool_parseo (PoolParseo, opcional): Si se indica, las páginas se parsean en el pool de procesos
+        deduplicar (bool): Si es True, los productos repetidos sin cambios entre búsquedas se omiten
+        indice_productos (IndiceProductos, opcional): Índice de la corrida; por defecto uno nuevo
+
+    Returns:
+        list | int: Productos de la corrida en el orden de las búsquedas, o el número de
+            productos procesados si retener es False
+    """
+    indicada = concurrencia or {}
+    concurrencia = dict(CONCURRENCIA_ETAPAS, **indicada)
+    tareas_parseo = concurrencia['parseo']
+    if pool_parseo is not None and 'parseo' not in indicada:
+        # Cada tarea espera a su página en el pool: con menos tareas que lugares en la cola
+        # del pool, los procesos quedarían ociosos
+        tareas_parseo = pool_parseo.max_pendientes
+    tareas_alertas = concurrencia['alertas']
+    tareas_guardado = concurrencia['guardado']
+    descargas_simultaneas = concurrencia.get('descarga') or MAX_PETICIONES_CONCURRENTES
+    semaforo = asyncio.Semaphore(descargas_simultaneas)
+    # Páginas descargadas que aún no se parsean (incluidas las adelantadas): sin este límite
+    # cada búsqueda retendría su página mientras espera lugar en la cola de parseo
+    paginas_en_memoria = asyncio.Semaphore(descargas_simultaneas + tamano_colas)
+    timeout = aiohttp.ClientTimeout(total=TIMEOUT_PETICIONES)
+
+    cola_parseo = asyncio.Queue(tamano_colas)
+    cola_ids = asyncio.Queue(tamano_colas)
+    cola_alertas = asyncio.Queue(tamano_colas)
+    cola_guardado = asyncio.Queue(tamano_colas)
+    resultados = [[] for _ in busquedas] if retener else None
+    if deduplicar and indice_productos is None:
+        indice_productos = IndiceProductos()
+    total = 0
+
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+
+        async def descargar(url, continuacion=False):
+            # Una página fresca en la caché no espera turno del host ni ocupa el semáforo; la
+            # consulta (sqlite y descompresión) corre en un hilo para no detener el event loop
+            html_content = await asyncio.to_thread(pagina_en_cache, url, usar_cache)
+            if html_content:
+                await paginas_en_memoria.acquire()
+                return html_content
+            # La espera por host va antes del semáforo para no ocupar un lugar mientras se duerme;
+            # el turno libera la prueba del circuito si la petición no informa un resultado
+            async with limitador_hosts.turno_async(url) as permitido:
+                if not permitido:
+                    return None
+                await paginas_en_memoria.acquire()
+                try:
+                    async with semaforo:
+                        html_content = await fetch_page_async(session, url, usar_cache=usar_cache, continuacion=continuacion)
+                except BaseException:
+                    paginas_en_memoria.release()
+                    raise
+            if not html_content:
+                paginas_en_memoria.release()
+            return html_content
+
+        def descartar(descarga):
+            # Una página adelantada que ya no se necesita libera su lugar
+            if not descarga.done():
+                descarga.cancel()
+            elif not descarga.cancelled() and descarga.exception() is None and descarga.result():
+                paginas_en_memoria.release()
+
+        async def recorrer(indice, busqueda):
+            # Etapa de descarga: una tarea por búsqueda que recorre sus páginas en orden
+            ids_vistos = set()
+            url = busqueda['url']
+            descarga = asyncio.create_task(descargar(url))
+            try:
+                for numero in range(1, max_paginas + 1):
+                    print(f"🔍 Buscando RTX {busqueda['modelo']} en {busqueda['sitio'].capitalize()} (página {numero})...")
+                    html_content = await descarga
+                    descarga = None
+                    if not html_content:
+                        break
+
+                    # Prefetch: la siguiente página se descarga mientras esta avanza por el pipeline
+                    siguiente = url_siguiente_pagina(busqueda['url'], url, html_content, numero) if numero < max_paginas else None
+                    if siguiente:
+                        descarga = asyncio.create_task(descargar(siguiente, continuacion=True))
+
+                    senal = asyncio.get_running_loop().create_future()
+                    await cola_parseo.put({
+                        'busqueda': dict(busqueda, url=url, pagina=numero), 'indice': indice, 'url': url,
+                        'html': html_content, 'ids_vistos': ids_vistos, 'senal': senal
+                    })
+                    # La etapa de ids nuevos indica si la búsqueda sigue
+                    if not await senal or descarga is None:
+                        break
+                    url = siguiente
+            finally:
+                if descarga is not None:
+                    descartar(descarga)
+
+        async def descargas():
+            try:
+                await asyncio.gather(*(recorrer(indice, busqueda) for indice, busqueda in enumerate(busquedas)))
+            finally:
+                for _ in range(tareas_parseo):
+                    await cola_parseo.put(FIN)
+
+        async def parsear(pagina):
+            productos = None
+            try:
+                if pool_parseo is not None:
+                    productos = await pool_parseo.parsear_async(pagina['busqueda']['sitio'], pagina['html'])
+                productos = await asyncio.to_thread(extraer, pagina['busqueda'], pagina.pop('html'), productos)
+            finally:
+                paginas_en_memoria.release()
+            pagina['productos'] = productos
+            return pagina
+
+        async def revisar_ids(pagina):
+            productos = pagina['productos']
+            nuevos = {producto.get('id_producto') for producto in productos if producto.get('id_producto')} - pagina['ids_vistos']
+            pagina['ids_vistos'].update(nuevos)
+            pagina['senal'].set_result(bool(nuevos))
+            # La paginación cuenta los ids nuevos en la búsqueda; lo que sigue, solo los nuevos en la corrida
+            if indice_productos is not None:
+                productos = pagina['productos'] = indice_productos.filtrar(productos)
+            return pagina if productos else None
+
+        def olvidar(pagina):
+            # Lo que no se guardó no cuenta como visto: la siguiente aparición se procesa
+            if indice_productos is not None:
+                indice_productos.olvidar(pagina['productos'])
+
+        async def alertas(pagina):
+            try:
+                await asyncio.to_thread(alertar, pagina['productos'])
+            except BaseException:
+                olvidar(pagina)
+                raise
+            return pagina
+
+        async def guardado(pagina):
+            nonlocal total
+            try:
+                await asyncio.to_thread(guardar, pagina['productos'])
+            except BaseException:
+                olvidar(pagina)
+                raise
+            total += len(pagina['productos'])
+            if retener:
+                resultados[pagina['indice']].extend(pagina['productos'])
+
+        await asyncio.gather(
+            descargas(),
+            _etapa("parseo", cola_parseo, cola_ids, parsear, tareas_parseo, 1),
+            _etapa("ids nuevos y duplicados", cola_ids, cola_alertas, revisar_ids, 1, tareas_alertas),
+            _etapa("alertas", cola_alertas, cola_guardado, alertas, tareas_alertas, tareas_guardado),
+            _etapa("guardado", cola_guardado, None, guardado, tareas_guardado, 0)
+        )
+
+    if indice_productos is not None:
+        resumen = indice_productos.resumen()
+        print(f"♻️ {resumen['distintos']} productos distintos en la corrida: {resumen['omitidos']} repeticiones omitidas "
+              f"(consultas de historial, alertas y escrituras evitadas), {resumen['actualizados']} repeticiones con cambios")
+
+    if not retener:
+        return total
+    return [producto for productos in resultados for producto in productos]
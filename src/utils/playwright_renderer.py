@@ -0,0 +1,302 @@
+# playwright_renderer.py
+"""
+Renderizador asíncrono con Playwright. Mantiene un solo Chromium y un conjunto de
+contextos abiertos, y renderiza muchas páginas como pestañas concurrentes.
+El event loop de Playwright vive en un hilo propio, de modo que el renderizador se
+puede usar tanto desde código síncrono (fetch_page) como desde el motor asíncrono.
+"""
+
+import asyncio
+import atexit
+import html
+import threading
+
+from src.config.config import (
+    PLAYWRIGHT_CONTEXTOS,
+    PLAYWRIGHT_MAX_PESTANAS,
+    ESPERA_RENDER_POR_SITIO,
+    ESPERA_MAX_NAVEGADOR,
+    TIMEOUT_PETICIONES,
+    BLOQUEAR_RECURSOS,
+    USAR_JSON_EMBEBIDO,
+    CAPTURA_JSON_POR_SITIO
+)
+from src.utils.utils import get_random_user_agent, identificar_sitio
+from src.utils.resource_blocking import instalar_bloqueo_playwright
+from src.utils.rate_limit import limitador_hosts, es_error_conexion
+from src.utils.proxy_pool import pool_proxies, partes_proxy, ESTADOS_FALLO_PROXY
+
+def obtener_espera_sitio(url):
+    """
+    Obtiene la condición de espera configurada para el sitio de la URL.
+
+    Args:
+        url (str): URL a renderizar
+
+    Returns:
+        dict: Condición de espera con las claves opcionales 'selector' y 'timeout' (segundos)
+    """
+    return ESPERA_RENDER_POR_SITIO.get(identificar_sitio(url), {})
+
+def capturar_respuestas_json(page, url):
+    """
+    Registra las respuestas JSON de la pestaña cuyas URLs coinciden con los patrones XHR
+    del sitio (ver CAPTURA_JSON_POR_SITIO).
+
+    Args:
+        page: Página de Playwright (antes de navegar)
+        url (str): URL que se va a renderizar
+
+    Returns:
+        list: Lista de tareas que se llenará con (url, cuerpo) de cada respuesta capturada
+    """
+    patrones = CAPTURA_JSON_POR_SITIO.get(identificar_sitio(url), {}).get('xhr', [])
+    tareas = []
+    if not patrones:
+        return tareas
+
+    async def leer(response):
+        try:
+            return response.url, await response.text()
+        except Exception:
+            return response.url, None
+
+    def al_responder(response):
+        if any(patron in response.url for patron in patrones) and 'json' in response.headers.get('content-type', ''):
+            tareas.append(asyncio.ensure_future(leer(response)))
+
+    page.on("response", al_responder)
+    return tareas
+
+async def incrustar_respuestas_json(html_content, tareas):
+    """
+    Añade al HTML las respuestas JSON capturadas como bloques <script type="application/json">,
+    para que los scrapers las lean igual que el JSON que la página ya trae incrustado.
+    """
+    bloques = []
+    for url_respuesta, cuerpo in await asyncio.gather(*tareas):
+        if cuerpo:
+            bloques.append(f'<script type="application/json" data-xhr-capturado="{html.escape(url_respuesta)}">{cuerpo}</script>')
+    if not bloques:
+        return html_content
+    return html_content + "\n" + "\n".join(bloques)
+
+class RenderizadorPlaywright:
+    """
+    Navegador Chromium compartido que renderiza páginas en pestañas concurrentes.
+    """
+
+    def __init__(self, contextos=PLAYWRIGHT_CONTEXTOS, max_pestanas=PLAYWRIGHT_MAX_PESTANAS):
+        self.num_contextos = contextos
+        self.max_pestanas = max_pestanas
+        self._loop = None
+        self._hilo = None
+        self._lock = threading.Lock()
+        self._inicio_lock = asyncio.Lock()
+        self._pestanas = asyncio.Semaphore(max_pestanas)
+        self._playwright = None
+        self._browser = None
+        self._contextos = []
+        self._contextos_proxy = {}  # Contexto por proxy (la ruta de red se fija por contexto)
+        self._siguiente_contexto = 0
+
+    def _asegurar_loop(self):
+        """
+        Arranca (una sola vez) el hilo con el event loop del renderizador.
+        """
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._hilo = threading.Thread(target=self._loop.run_forever, name="playwright", daemon=True)
+                self._hilo.start()
+        return self._loop
+
+    async def _iniciar(self):
+        """
+        Lanza Chromium y crea los contextos la primera vez que se necesitan, o de nuevo si
+        el navegador se cerró o se desconectó (por ejemplo, si el proceso de Chromium falló).
+        """
+        async with self._inicio_lock:
+            if self._browser is not None:
+                if self._browser.is_connected():
+                    return
+                print("⚠️ El navegador de Playwright se desconectó, se vuelve a lanzar...")
+                await self._descartar_navegador()
+            from playwright.async_api import async_playwright
+
+            self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(headless=True)
+            for _ in range(self.num_contextos):
+                contexto = await self._browser.new_context(
+                    user_agent=get_random_user_agent(),
+                    viewport={"width": 1920, "height": 1080}
+                )
+                self._contextos.append(contexto)
+
+    async def _descartar_navegador(self):
+        """
+        Olvida el navegador desconectado y sus contextos (ya no sirven) y detiene su
+        instancia de Playwright antes de lanzar uno nuevo.
+        """
+        self._browser = None
+        self._contextos = []
+        self._contextos_proxy = {}
+        self._siguiente_contexto = 0
+        if self._playwright is not None:
+            try:
+                await self._playwright.stop()
+            except Exception as e:
+                print(f"⚠️ Error al detener Playwright: {e}")
+            self._playwright = None
+
+    async def _esperar_condicion(self, page, espera):
+        """
+        Espera la condición del sitio (selector del contenedor de resultados o un tiempo fijo)
+        en lugar de esperar a que la red quede inactiva.
+        """
+        timeout_ms = espera.get('timeout', ESPERA_MAX_NAVEGADOR) * 1000
+        if espera.get('selector'):
+            try:
+                await page.wait_for_selector(espera['selector'], timeout=timeout_ms)
+            except Exception as e:
+                print(f"⚠️ No apareció '{espera['selector']}' en {page.url}, se usa el HTML actual: {e}")
+        elif espera.get('timeout'):
+            await page.wait_for_timeout(timeout_ms)
+
+    async def _contexto_para(self, proxy):
+        """
+        Devuelve el contexto donde abrir la pestaña: uno de los contextos compartidos o,
+        si la petición va por un proxy, el contexto de ese proxy (se crea la primera vez).
+        """
+        if proxy is None:
+            contexto = self._contextos[self._siguiente_contexto % len(self._contextos)]
+            self._siguiente_contexto += 1
+            return contexto
+
+        if proxy not in self._contextos_proxy:
+            contexto = await self._browser.new_context(
+                user_agent=get_random_user_agent(),
+                viewport={"width": 1920, "height": 1080},
+                proxy={clave: valor for clave, valor in partes_proxy(proxy).items() if valor}
+            )
+            # Otra pestaña pudo crear el contexto del mismo proxy mientras se esperaba
+            if proxy in self._contextos_proxy:
+                await contexto.close()
+            else:
+                self._contextos_proxy[proxy] = contexto
+        return self._contextos_proxy[proxy]
+
+    async def _renderizar(self, url, espera):
+        """
+        Renderiza una URL en una pestaña nueva de uno de los contextos.
+
+        Returns:
+            str: HTML renderizado
+        """
+        await self._iniciar()
+        async with self._pestanas, pool_proxies.usar_async(url) as reserva:
+            contexto = await self._contexto_para(reserva['proxy'])
+
+            page = await contexto.new_page()
+            try:
+                estadisticas = await instalar_bloqueo_playwright(page, url) if BLOQUEAR_RECURSOS else None
+                respuestas_json = capturar_respuestas_json(page, url) if USAR_JSON_EMBEBIDO else []
+                try:
+                    respuesta = await page.goto(url, wait_until="domcontentloaded", timeout=TIMEOUT_PETICIONES * 1000)
+                except Exception as e:
+                    if es_error_conexion(e):
+                        limitador_hosts.registrar_fallo(url)
+                    raise
+                if respuesta:
+                    limitador_hosts.registrar_respuesta(url, respuesta.status, respuesta.headers)
+                    reserva['exito'] = respuesta.status not in ESTADOS_FALLO_PROXY
+                await self._esperar_condicion(page, espera)
+                html_content = await page.content()
+                if respuestas_json:
+                    html_content = await incrustar_respuestas_json(html_content, respuestas_json)
+                if estadisticas:
+                    estadisticas.reportar(url)
+                return html_content
+            finally:
+                await page.close()
+
+    def enviar(self, url, espera=None):
+        """
+        Programa el renderizado de una URL en el hilo del renderizador.
+
+        Args:
+            url (str): URL a renderizar
+            espera (dict, opcional): Condición de espera; por defecto la del sitio
+
+        Returns:
+            concurrent.futures.Future: Futuro con el HTML renderizado
+        """
+        if espera is None:
+            espera = obtener_espera_sitio(url)
+        return asyncio.run_coroutine_threadsafe(self._renderizar(url, espera), self._asegurar_loop())
+
+    def renderizar(self, url, espera=None):
+        """
+        Renderiza una URL y bloquea hasta obtener el HTML.
+        """
+        return self.enviar(url, espera).result()
+
+    def renderizar_varias(self, urls):
+        """
+        Renderiza varias URLs como pestañas concurrentes.
+
+        Args:
+            urls (list): URLs a renderizar
+
+        Returns:
+            list: HTML de cada URL (None si falló), en el mismo orden
+        """
+        futuros = [self.enviar(url) for url in urls]
+        resultados = []
+        for url, futuro in zip(urls, futuros):
+            try:
+                resultados.append(futuro.result())
+            except Exception as e:
+                print(f"⚠️ Error al usar Playwright para {url}: {e}")
+                resultados.append(None)
+        return resultados
+
+    async def renderizar_async(self, url, espera=None):
+        """
+        Versión para usar desde otro event loop (por ejemplo, el motor asíncrono).
+        """
+        return await asyncio.wrap_future(self.enviar(url, espera))
+
+    async def _cerrar(self):
+        for contexto in self._contextos + list(self._contextos_proxy.values()):
+            await contexto.close()
+        self._contextos = []
+        self._contextos_proxy = {}
+        if self._browser is not None:
+            await self._browser.close()
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    def cerrar(self):
+        """
+        Cierra el navegador y detiene el hilo del renderizador.
+        """
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._cerrar(), loop).result(timeout=ESPERA_MAX_NAVEGADOR)
+        except Exception as e:
+            print(f"⚠️ Error al cerrar Playwright: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        self._hilo.join(timeout=ESPERA_MAX_NAVEGADOR)
+        # Las primitivas quedan ligadas al loop anterior; se recrean para un posible reinicio
+        self._inicio_lock = asyncio.Lock()
+        self._pestanas = asyncio.Semaphore(self.max_pestanas)
+
+# Renderizador compartido por todo el proceso
+renderizador_playwright = RenderizadorPlaywright()
+atexit.register(renderizador_playwright.cerrar)
@@ -0,0 +1,118 @@
+# product.py
+"""
+Registro compacto de un producto extraído. Cada página trae decenas de productos y todos
+pasan por los filtros, la base de datos, las alertas y la lista de la corrida; con
+__slots__ cada producto ocupa una fracción de lo que ocupa un diccionario de 8 claves, y
+los textos que se repiten en todos los productos (tienda, modelo, vendedor) se guardan
+una sola vez con sys.intern.
+
+Producto se comporta como un diccionario de solo lectura (producto['precio'],
+producto.get('vendedor'), dict(producto), ==) para el código y las plantillas que ya
+trabajan con diccionarios, y también permite leer los campos como atributos.
+"""
+
+import sys
+from collections.abc import Mapping
+from operator import attrgetter
+
+# Campos de un producto, en el orden de crear_producto_base y de la tabla productos
+CAMPOS_PRODUCTO = ('tienda', 'modelo', 'nombre', 'precio', 'vendedor', 'link', 'imagen', 'id_producto')
+
+def _internar(valor):
+    # tienda, modelo y vendedor tienen pocos valores distintos que se comparten entre productos
+    return sys.intern(valor) if type(valor) is str else valor
+
+class Producto(Mapping):
+    """
+    Producto con los campos de CAMPOS_PRODUCTO y vista de diccionario de solo lectura.
+    """
+
+    __slots__ = CAMPOS_PRODUCTO
+
+    def __init__(self, tienda, modelo, nombre, precio, vendedor, link, imagen, id_producto):
+        self.tienda = _internar(tienda)
+        self.modelo = _internar(modelo)
+        self.nombre = nombre
+        self.precio = precio
+        self.vendedor = _internar(vendedor)
+        self.link = link
+        self.imagen = imagen
+        self.id_producto = id_producto
+
+    @classmethod
+    def desde_dict(cls, datos):
+        """
+        Crea un producto a partir de un diccionario (ej: una fila de la base de datos);
+        las claves que no son campos del producto se ignoran.
+        """
+        return cls(*(datos.get(campo) for campo in CAMPOS_PRODUCTO))
+
+    def __getitem__(self, clave):
+        try:
+            return _LECTORES[clave](self)
+        except (KeyError, TypeError):
+            raise KeyError(clave) from None
+
+    def get(self, clave, predeterminado=None):
+        lector = _LECTORES.get(clave)
+        return predeterminado if lector is None else lector(self)
+
+    def __contains__(self, clave):
+        return clave in _LECTORES
+
+    def __iter__(self):
+        return iter(CAMPOS_PRODUCTO)
+
+    def __len__(self):
+        return len(CAMPOS_PRODUCTO)
+
+    def a_tupla(self):
+        """
+        Returns:
+            tuple: Valores en el orden de CAMPOS_PRODUCTO
+        """
+        return (self.tienda, self.modelo, self.nombre, self.precio,
+                self.vendedor, self.link, self.imagen, self.id_producto)
+
+    def a_dict(self, **extra):
+        """
+        Copia el producto a un diccionario (para JSON o para la base de datos).
+
+        Args:
+            **extra: Campos adicionales (ej: fecha=...)
+
+        Returns:
+            dict: Campos del producto más los adicionales
+        """
+        datos = dict(zip(CAMPOS_PRODUCTO, self.a_tupla()))
+        datos.update(extra)
+        return datos
+
+    def __reduce__(self):
+        # Para enviar productos entre procesos como una tupla
+        return (Producto, self.a_tupla())
+
+    def __repr__(self):
+        return f"Producto({self.a_dict()!r})"
+
+    __hash__ = None
+
+# Lectura por clave de cada campo (solo los campos, no los métodos)
+_LECTORES = {campo: attrgetter(campo) for campo in CAMPOS_PRODUCTO}
+
+def fila_producto(producto, fecha):
+    """
+    Valores para insertar un producto en la tabla productos (SQLite o PostgreSQL).
+
+    Args:
+        producto (Producto | dict): Producto a insertar
+        fecha (str): Fecha de la captura en formato ISO
+
+    Returns:
+        tuple: (tienda, modelo, nombre, precio, fecha, vendedor, link, imagen, id_producto)
+    """
+    return (
+        producto["tienda"], producto["modelo"], producto["nombre"],
+        producto["precio"], fecha, producto["vendedor"],
+        producto["link"], producto["imagen"], producto["id_producto"]
+    )
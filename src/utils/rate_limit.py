@@ -0,0 +1,316 @@
+# rate_limit.py
+"""
+Control de ritmo por host: una cubeta de tokens (con ráfaga) limita las peticiones a cada
+sitio y un circuit breaker deja de enviarle peticiones tras varios 429/503 o timeouts
+seguidos. Se respeta la cabecera Retry-After. Lo comparten la ruta síncrona (requests) y
+el motor asíncrono, así que las esperas se calculan bajo un lock de hilos y cada llamador
+duerme con time.sleep o asyncio.sleep.
+"""
+
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from src.config.config import (
+    LIMITE_POR_SITIO,
+    ESTADOS_SATURACION,
+    CIRCUITO_UMBRAL_FALLOS,
+    CIRCUITO_ENFRIAMIENTO,
+    CIRCUITO_ENFRIAMIENTO_MAX,
+    CIRCUITO_PLAZO_PRUEBA,
+    ESPERA_MAX_POR_HOST,
+    DELAY_ENTRE_PETICIONES
+)
+from src.utils.utils import identificar_sitio
+
+def interpretar_retry_after(valor):
+    """
+    Convierte el valor de la cabecera Retry-After en segundos.
+
+    Args:
+        valor (str): Segundos ("120") o fecha HTTP ("Wed, 21 Oct 2015 07:28:00 GMT")
+
+    Returns:
+        float: Segundos a esperar, o None si no hay cabecera o no se puede interpretar
+    """
+    if not valor:
+        return None
+    valor = valor.strip()
+    if valor.isdigit():
+        return float(valor)
+    try:
+        fecha = parsedate_to_datetime(valor)
+    except (TypeError, ValueError):
+        return None
+    if fecha.tzinfo is None:
+        fecha = fecha.replace(tzinfo=timezone.utc)
+    return max(0.0, (fecha - datetime.now(timezone.utc)).total_seconds())
+
+def es_timeout(error):
+    """
+    Verifica si una excepción es un timeout (de requests, aiohttp, Selenium o Playwright).
+    """
+    return isinstance(error, (TimeoutError, asyncio.TimeoutError)) or 'Timeout' in type(error).__name__
+
+# Errores de red de Chrome: Selenium y Playwright los informan en el mensaje de la excepción
+ERRORES_RED_NAVEGADOR = ('net::ERR_CONNECTION', 'net::ERR_TIMED_OUT', 'net::ERR_EMPTY_RESPONSE', 'net::ERR_ADDRESS_UNREACHABLE')
+
+def es_error_conexion(error):
+    """
+    Verifica si una excepción es un timeout o un error de conexión (conexión rechazada,
+    cortada o sin respuesta), que cuentan como fallos del circuit breaker.
+    """
+    return (es_timeout(error) or isinstance(error, ConnectionError)
+            or any(marcador in str(error) for marcador in ERRORES_RED_NAVEGADOR))
+
+class CubetaTokens:
+    """
+    Cubeta de tokens: se recargan 'tasa' tokens por segundo hasta 'rafaga'. Cada petición
+    reserva un token; si no hay, se devuelve el tiempo hasta que le toque.
+    """
+
+    def __init__(self, tasa, rafaga):
+        self.tasa = tasa
+        self.rafaga = rafaga
+        self.tokens = float(rafaga)
+        self.ultima_recarga = time.monotonic()
+
+    def reservar(self, ahora):
+        """
+        Reserva un token.
+
+        Returns:
+            float: Segundos a esperar antes de usar el token (0 si hay disponible)
+        """
+        self.tokens = min(self.rafaga, self.tokens + (ahora - self.ultima_recarga) * self.tasa)
+        self.ultima_recarga = ahora
+        self.tokens -= 1
+        return max(0.0, -self.tokens / self.tasa)
+
+class EstadoHost:
+    """
+    Cubeta de tokens y circuit breaker de un sitio.
+    Estados del circuito: 'cerrado' (normal), 'abierto' (se omiten las peticiones) y
+    'semiabierto' (se deja pasar una sola petición de prueba, con un plazo para informar
+    su resultado).
+    """
+
+    def __init__(self, tasa, rafaga):
+        self.cubeta = CubetaTokens(tasa, rafaga)
+        self.estado = 'cerrado'
+        self.fallos = 0
+        self.aperturas = 0
+        self.bloqueado_hasta = 0.0
+        self.prueba_en_curso = False
+        self.prueba_hasta = 0.0
+        self.pruebas = 0  # Número de la prueba en curso (para que solo su dueño la libere)
+
+class LimitadorHosts:
+    """
+    Limitador de peticiones y circuit breaker por sitio.
+    """
+
+    def __init__(self, limites=None, umbral_fallos=CIRCUITO_UMBRAL_FALLOS,
+                 enfriamiento=CIRCUITO_ENFRIAMIENTO, enfriamiento_max=CIRCUITO_ENFRIAMIENTO_MAX,
+                 espera_max=ESPERA_MAX_POR_HOST, plazo_prueba=CIRCUITO_PLAZO_PRUEBA):
+        self.limites = limites or LIMITE_POR_SITIO
+        self.umbral_fallos = umbral_fallos
+        self.enfriamiento = enfriamiento
+        self.enfriamiento_max = enfriamiento_max
+        self.espera_max = espera_max
+        self.plazo_prueba = plazo_prueba
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _estado(self, url):
+        sitio = identificar_sitio(url)
+        if sitio not in self._hosts:
+            limite = self.limites.get(sitio, self.limites['default'])
+            self._hosts[sitio] = EstadoHost(limite['tasa'], limite['rafaga'])
+        return sitio, self._hosts[sitio]
+
+    def _abrir(self, sitio, estado, ahora):
+        # Llamar con el lock tomado: abre el circuito con el enfriamiento de la siguiente apertura
+        estado.aperturas += 1
+        enfriamiento = min(self.enfriamiento * 2 ** (estado.aperturas - 1), self.enfriamiento_max)
+        estado.bloqueado_hasta = max(estado.bloqueado_hasta, ahora + enfriamiento)
+        estado.estado = 'abierto'
+        estado.prueba_en_curso = False
+        print(f"⛔ Circuito abierto para {sitio} durante {estado.bloqueado_hasta - ahora:.0f}s tras {estado.fallos} fallos")
+
+    def _reservar(self, url):
+        """
+        Reserva el turno de la siguiente petición a la URL.
+
+        Returns:
+            tuple: (segundos a esperar o None si hay que omitir la petición, número de la
+                prueba si esta petición es la prueba del circuito semiabierto, o None)
+        """
+        with self._lock:
+            sitio, estado = self._estado(url)
+            ahora = time.monotonic()
+
+            if estado.estado == 'semiabierto' and estado.prueba_en_curso and ahora >= estado.prueba_hasta:
+                # La prueba no informó nada a tiempo (se canceló o se perdió): se trata como un fallo
+                print(f"⌛ La petición de prueba a {sitio} no respondió a tiempo")
+                self._abrir(sitio, estado, ahora)
+            if estado.estado == 'abierto':
+                if ahora < estado.bloqueado_hasta:
+                    return None, None
+                print(f"🔌 Circuito semiabierto para {sitio}, enviando petición de prueba")
+                estado.estado = 'semiabierto'
+            if estado.estado == 'semiabierto' and estado.prueba_en_curso:
+                return None, None
+
+            bloqueo = max(0.0, estado.bloqueado_hasta - ahora)
+            if bloqueo > self.espera_max:
+                return None, None
+            espera = bloqueo + estado.cubeta.reservar(ahora + bloqueo)
+            if estado.estado != 'semiabierto':
+                return espera, None
+            estado.prueba_en_curso = True
+            estado.prueba_hasta = ahora + espera + self.plazo_prueba
+            estado.pruebas += 1
+            return espera, estado.pruebas
+
+    def reservar(self, url):
+        """
+        Reserva el turno de la siguiente petición a la URL.
+
+        Returns:
+            float: Segundos a esperar antes de enviarla, o None si el circuito está abierto
+                (o el host pide esperar más de espera_max) y la petición debe omitirse
+        """
+        return self._reservar(url)[0]
+
+    def liberar_prueba(self, url, prueba):
+        """
+        Libera la prueba del circuito semiabierto si terminó sin informar un resultado (página
+        vacía, navegador sin HTML o petición cancelada), para que la siguiente petición pruebe.
+
+        Args:
+            url (str): URL de la petición de prueba
+            prueba (int): Número de prueba devuelto al reservar el turno
+        """
+        with self._lock:
+            sitio, estado = self._estado(url)
+            if estado.estado == 'semiabierto' and estado.prueba_en_curso and estado.pruebas == prueba:
+                estado.prueba_en_curso = False
+                print(f"🔌 La petición de prueba a {sitio} terminó sin resultado, la siguiente hará la prueba")
+
+    def esperar(self, url):
+        """
+        Espera (bloqueando el hilo) hasta que se pueda enviar la petición.
+
+        Returns:
+            bool: False si la petición debe omitirse porque el circuito está abierto
+        """
+        espera = self.reservar(url)
+        if espera is None:
+            print(f"⛔ Circuito abierto para {identificar_sitio(url)}, omitiendo {url}")
+            return False
+        if espera > 0:
+            time.sleep(espera)
+        return True
+
+    async def esperar_async(self, url):
+        """
+        Versión asíncrona de esperar: duerme sin bloquear el event loop.
+        """
+        espera = self.reservar(url)
+        if espera is None:
+            print(f"⛔ Circuito abierto para {identificar_sitio(url)}, omitiendo {url}")
+            return False
+        if espera > 0:
+            await asyncio.sleep(espera)
+        return True
+
+    @asynccontextmanager
+    async def turno_async(self, url):
+        """
+        Como esperar_async, pero como contexto alrededor de la petición: si esta es la prueba
+        del circuito semiabierto y sale del contexto sin registrar un éxito o un fallo (incluso
+        si se cancela), la prueba se libera.
+
+        Yields:
+            bool: False si la petición debe omitirse porque el circuito está abierto
+        """
+        espera, prueba = self._reservar(url)
+        if espera is None:
+            print(f"⛔ Circuito abierto para {identificar_sitio(url)}, omitiendo {url}")
+            yield False
+            return
+        try:
+            if espera > 0:
+                await asyncio.sleep(espera)
+            yield True
+        finally:
+            if prueba is not None:
+                self.liberar_prueba(url, prueba)
+
+    def registrar_exito(self, url):
+        """
+        Registra una respuesta correcta: cierra el circuito y reinicia los fallos.
+        """
+        with self._lock:
+            sitio, estado = self._estado(url)
+            if estado.estado != 'cerrado':
+                print(f"✅ Circuito cerrado para {sitio}")
+            estado.estado = 'cerrado'
+            estado.fallos = 0
+            estado.aperturas = 0
+            estado.prueba_en_curso = False
+
+    def registrar_fallo(self, url, retry_after=None):
+        """
+        Registra un 429/503 o un timeout. El host se pausa lo que indique Retry-After (o con
+        backoff exponencial si no lo envía) y, tras varios fallos seguidos, se abre el circuito.
+
+        Args:
+            url (str): URL de la petición fallida
+            retry_after (float, opcional): Segundos indicados por el servidor
+        """
+        with self._lock:
+            sitio, estado = self._estado(url)
+            ahora = time.monotonic()
+            estado.fallos += 1
+            estado.prueba_en_curso = False
+
+            pausa = retry_after if retry_after is not None else DELAY_ENTRE_PETICIONES * 2 ** (estado.fallos - 1)
+            estado.bloqueado_hasta = max(estado.bloqueado_hasta, ahora + pausa)
+
+            if estado.estado == 'semiabierto' or estado.fallos >= self.umbral_fallos:
+                self._abrir(sitio, estado, ahora)
+
+    def registrar_respuesta(self, url, codigo, headers=None):
+        """
+        Registra el código de estado de una respuesta HTTP.
+
+        Args:
+            url (str): URL de la petición
+            codigo (int): Código de estado HTTP
+            headers (dict, opcional): Cabeceras de la respuesta (para Retry-After)
+        """
+        if codigo in ESTADOS_SATURACION or codigo >= 500:
+            # Saturación o error del servidor (500, 502, 504...): el host no está sirviendo páginas
+            headers = headers or {}
+            # Playwright entrega las cabeceras en minúsculas
+            self.registrar_fallo(url, interpretar_retry_after(headers.get('Retry-After') or headers.get('retry-after')))
+        elif codigo >= 300:
+            # El host responde, aunque no sea con la página: no está limitando las peticiones
+            self.registrar_exito(url)
+        # Las respuestas 2xx se registran al revisar el contenido (revisar_pagina), porque las
+        # páginas de bloqueo también llegan con código 200
+
+    def estado(self, url):
+        """
+        Devuelve el estado del circuito del sitio de la URL ('cerrado', 'abierto' o 'semiabierto').
+        """
+        with self._lock:
+            return self._estado(url)[1].estado
+
+# Limitador compartido por todo el proceso (requests, aiohttp y navegadores)
+limitador_hosts = LimitadorHosts()
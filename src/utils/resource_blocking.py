@@ -0,0 +1,160 @@
+# resource_blocking.py
+"""
+Bloqueo de recursos innecesarios (imágenes, fuentes, hojas de estilo, rastreadores)
+al renderizar páginas con Selenium o Playwright. Los parsers solo leen el DOM, así que
+descargar esos recursos solo cuesta tiempo y ancho de banda.
+"""
+
+import json
+from urllib.parse import urlparse
+
+from src.config.config import (
+    RECURSOS_PERMITIDOS_POR_SITIO,
+    DOMINIOS_RASTREADORES,
+    BYTES_ESTIMADOS_POR_TIPO
+)
+from src.utils.utils import identificar_sitio
+
+# Patrones de URL por tipo de recurso (Selenium solo puede bloquear por URL)
+EXTENSIONES_POR_TIPO = {
+    'image': ['*.png*', '*.jpg*', '*.jpeg*', '*.gif*', '*.webp*', '*.svg*', '*.ico*', '*.avif*'],
+    'font': ['*.woff*', '*.ttf*', '*.otf*', '*.eot*'],
+    'stylesheet': ['*.css*'],
+    'media': ['*.mp4*', '*.webm*', '*.m3u8*', '*.mp3*']
+}
+
+def obtener_recursos_permitidos(url):
+    """
+    Obtiene los tipos de recurso que se permiten descargar para el sitio de la URL.
+
+    Args:
+        url (str): URL de la página a renderizar
+
+    Returns:
+        set: Tipos de recurso permitidos (ej: {'document', 'script', 'xhr', 'fetch'})
+    """
+    sitio = identificar_sitio(url)
+    return set(RECURSOS_PERMITIDOS_POR_SITIO.get(sitio, RECURSOS_PERMITIDOS_POR_SITIO['default']))
+
+def es_rastreador(url_recurso):
+    """
+    Verifica si la URL pertenece a un dominio de analítica o publicidad.
+    """
+    host = urlparse(url_recurso).netloc.lower()
+    return any(host == dominio or host.endswith('.' + dominio) for dominio in DOMINIOS_RASTREADORES)
+
+def debe_bloquear(url_recurso, tipo, permitidos):
+    """
+    Decide si un recurso debe bloquearse.
+
+    Args:
+        url_recurso (str): URL del recurso solicitado por la página
+        tipo (str): Tipo de recurso (document, image, font, script, xhr, ...)
+        permitidos (set): Tipos permitidos para el sitio
+
+    Returns:
+        bool: True si el recurso no es necesario para el parser
+    """
+    return es_rastreador(url_recurso) or tipo.lower() not in permitidos
+
+class EstadisticasBloqueo:
+    """
+    Contador de recursos bloqueados en una página y bytes ahorrados (estimados, porque
+    un recurso bloqueado nunca se descarga y su tamaño real no se conoce).
+    """
+
+    def __init__(self):
+        self.bloqueados_por_tipo = {}
+
+    def registrar(self, tipo):
+        tipo = tipo.lower()
+        self.bloqueados_por_tipo[tipo] = self.bloqueados_por_tipo.get(tipo, 0) + 1
+
+    @property
+    def total_bloqueados(self):
+        return sum(self.bloqueados_por_tipo.values())
+
+    @property
+    def bytes_ahorrados(self):
+        return sum(
+            cantidad * BYTES_ESTIMADOS_POR_TIPO.get(tipo, BYTES_ESTIMADOS_POR_TIPO['other'])
+            for tipo, cantidad in self.bloqueados_por_tipo.items()
+        )
+
+    def reportar(self, url):
+        """
+        Imprime el resumen de recursos bloqueados para la página.
+        """
+        if not self.total_bloqueados:
+            return
+        detalle = ", ".join(f"{tipo}: {cantidad}" for tipo, cantidad in sorted(self.bloqueados_por_tipo.items()))
+        print(f"🧹 {self.total_bloqueados} recursos bloqueados en {url} ({detalle}) - ~{self.bytes_ahorrados / 1024:.0f} KB ahorrados")
+
+async def instalar_bloqueo_playwright(page, url):
+    """
+    Intercepta las peticiones de una pestaña de Playwright y aborta las innecesarias.
+
+    Args:
+        page: Página de Playwright (antes de navegar)
+        url (str): URL que se va a renderizar (determina la lista de permitidos)
+
+    Returns:
+        EstadisticasBloqueo: Estadísticas que se irán llenando durante la carga
+    """
+    permitidos = obtener_recursos_permitidos(url)
+    estadisticas = EstadisticasBloqueo()
+
+    async def interceptar(route):
+        peticion = route.request
+        if debe_bloquear(peticion.url, peticion.resource_type, permitidos):
+            estadisticas.registrar(peticion.resource_type)
+            await route.abort()
+        else:
+            await route.continue_()
+
+    await page.route("**/*", interceptar)
+    return estadisticas
+
+def patrones_bloqueo_selenium(url):
+    """
+    Genera los patrones de URL a bloquear en Chrome para el sitio de la URL.
+
+    Returns:
+        list: Patrones para Network.setBlockedURLs
+    """
+    permitidos = obtener_recursos_permitidos(url)
+    patrones = [f"*{dominio}*" for dominio in DOMINIOS_RASTREADORES]
+    for tipo, extensiones in EXTENSIONES_POR_TIPO.items():
+        if tipo not in permitidos:
+            patrones.extend(extensiones)
+    return patrones
+
+def aplicar_bloqueo_selenium(driver, url):
+    """
+    Configura el bloqueo de recursos del navegador Selenium antes de cargar la URL.
+    Los navegadores del pool se comparten entre sitios, así que se configura en cada carga.
+    """
+    # Descartar los eventos de red de la página anterior
+    driver.get_log('performance')
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patrones_bloqueo_selenium(url)})
+
+def estadisticas_selenium(driver):
+    """
+    Obtiene los recursos bloqueados durante la última carga a partir del log de rendimiento
+    de Chrome (eventos Network.requestWillBeSent y Network.loadingFailed).
+
+    Returns:
+        EstadisticasBloqueo: Estadísticas de la carga
+    """
+    estadisticas = EstadisticasBloqueo()
+    tipos = {}
+    for entrada in driver.get_log('performance'):
+        mensaje = json.loads(entrada['message'])['message']
+        params = mensaje.get('params', {})
+        if mensaje.get('method') == 'Network.requestWillBeSent':
+            tipos[params.get('requestId')] = params.get('type', 'other')
+        elif mensaje.get('method') == 'Network.loadingFailed':
+            if params.get('blockedReason') or 'BLOCKED' in params.get('errorText', ''):
+                estadisticas.registrar(params.get('type') or tipos.get(params.get('requestId'), 'other'))
+    return estadisticas
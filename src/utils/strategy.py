@@ -0,0 +1,171 @@
+# strategy.py
+"""
+Selector de estrategia de descarga por sitio (requests, Playwright o Selenium). Registra
+el éxito, la latencia y la tasa de bloqueo de cada estrategia, va directo a la más barata
+que haya funcionado recientemente y, cada cierto tiempo, vuelve a probar las más baratas.
+Las estadísticas se guardan en disco para que una estrategia que falla no se repita en
+cada corrida.
+"""
+
+import json
+import os
+import threading
+import time
+
+from src.config.config import (
+    ORDEN_ESTRATEGIAS,
+    ESTRATEGIAS_RUTA,
+    ESTRATEGIA_UMBRAL_EXITO,
+    ESTRATEGIA_REPRUEBA_SEGUNDOS,
+    MARCADORES_RESULTADOS_POR_SITIO
+)
+from src.utils.utils import identificar_sitio, requiere_navegador
+
+# Peso de la última descarga en los promedios móviles
+PESO_MEDICION = 0.3
+
+def pagina_sin_resultados(url, html_content):
+    """
+    Verifica sin parsear el HTML si la página carece de resultados de búsqueda: se buscan
+    los marcadores del sitio (clases de los contenedores de productos o JSON incrustado).
+
+    Args:
+        url (str): URL de la página
+        html_content (bytes | str): Contenido HTML descargado
+
+    Returns:
+        bool: True si la página está vacía o no contiene ninguno de los marcadores del sitio
+    """
+    if not html_content:
+        return True
+    marcadores = MARCADORES_RESULTADOS_POR_SITIO.get(identificar_sitio(url))
+    if not marcadores:
+        return False
+    if not isinstance(html_content, str):
+        marcadores = [marcador.encode('utf-8') for marcador in marcadores]
+    return not any(marcador in html_content for marcador in marcadores)
+
+class SelectorEstrategias:
+    """
+    Estadísticas por sitio y estrategia, y elección de la estrategia para cada descarga.
+    """
+
+    def __init__(self, ruta=ESTRATEGIAS_RUTA, orden=None, umbral_exito=ESTRATEGIA_UMBRAL_EXITO,
+                 reprueba_segundos=ESTRATEGIA_REPRUEBA_SEGUNDOS):
+        self.ruta = ruta
+        self.orden = orden or ORDEN_ESTRATEGIAS
+        self.umbral_exito = umbral_exito
+        self.reprueba_segundos = reprueba_segundos
+        self._estadisticas = None
+        self._lock = threading.Lock()
+
+    def _cargar(self):
+        if self._estadisticas is None:
+            self._estadisticas = {}
+            if self.ruta and os.path.exists(self.ruta):
+                try:
+                    with open(self.ruta, 'r', encoding='utf-8') as f:
+                        self._estadisticas = json.load(f)
+                except (OSError, ValueError) as e:
+                    print(f"⚠️ No se pudieron leer las estadísticas de estrategias: {e}")
+        return self._estadisticas
+
+    def _guardar(self):
+        if not self.ruta:
+            return
+        temporal = f"{self.ruta}.tmp"
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(self._estadisticas, f, indent=2)
+        os.replace(temporal, self.ruta)
+
+    def _estadistica(self, sitio, estrategia, url):
+        por_sitio = self._cargar().setdefault(sitio, {})
+        if estrategia not in por_sitio:
+            # Sin historial se confía en la estrategia configurada para el sitio; las demás
+            # quedan sin probar y la reprueba periódica se encarga de ellas
+            inicial = requiere_navegador(url) or 'requests'
+            por_sitio[estrategia] = {
+                'intentos': 0,
+                'tasa_exito': 1.0 if estrategia == inicial else 0.0,
+                'tasa_bloqueo': 0.0,
+                'latencia': None,
+                'ultimo_intento': 0.0
+            }
+        return por_sitio[estrategia]
+
+    def plan(self, url):
+        """
+        Decide en qué orden probar las estrategias para la URL.
+
+        Returns:
+            list: Estrategias a intentar: la elegida (o una más barata que toca reprobar)
+                seguida de las más caras como respaldo
+        """
+        sitio = identificar_sitio(url)
+        ahora = time.time()
+        with self._lock:
+            estadisticas = {e: self._estadistica(sitio, e, url) for e in self.orden}
+            funcionan = [e for e in self.orden if estadisticas[e]['tasa_exito'] >= self.umbral_exito]
+            if funcionan:
+                elegida = funcionan[0]
+            else:
+                # Ninguna funciona: la de mejor tasa (a igualdad, la más barata)
+                elegida = max(self.orden, key=lambda e: (estadisticas[e]['tasa_exito'], -self.orden.index(e)))
+
+            indice = self.orden.index(elegida)
+            for estrategia in self.orden[:indice]:
+                if ahora - estadisticas[estrategia]['ultimo_intento'] >= self.reprueba_segundos:
+                    # Se marca ahora para que las descargas concurrentes no reprueben también
+                    estadisticas[estrategia]['ultimo_intento'] = ahora
+                    print(f"🔁 Reprobando estrategia {estrategia} para {sitio}")
+                    return [estrategia] + self.orden[indice:]
+
+        return self.orden[indice:]
+
+    def registrar(self, url, estrategia, html_content, latencia, bloqueada=False):
+        """
+        Registra el resultado de una descarga.
+
+        Args:
+            url (str): URL descargada
+            estrategia (str): 'requests', 'playwright' o 'selenium'
+            html_content (bytes | str): HTML obtenido (None o vacío si falló)
+            latencia (float): Duración de la descarga en segundos
+            bloqueada (bool): True si ya se detectó que es una página de bloqueo
+
+        Returns:
+            bool: True si la página sirve (tiene resultados)
+        """
+        sin_resultados = bool(html_content) and not bloqueada and pagina_sin_resultados(url, html_content)
+        bloqueada = bool(html_content) and (bloqueada or sin_resultados)
+        exito = bool(html_content) and not bloqueada
+        sitio = identificar_sitio(url)
+        with self._lock:
+            estadistica = self._estadistica(sitio, estrategia, url)
+            # La primera medición reemplaza el valor inicial en lugar de promediarse con él
+            peso = PESO_MEDICION if estadistica['intentos'] else 1.0
+            estadistica['intentos'] += 1
+            estadistica['ultimo_intento'] = time.time()
+            estadistica['tasa_exito'] = (1 - peso) * estadistica['tasa_exito'] + peso * exito
+            estadistica['tasa_bloqueo'] = (1 - peso) * estadistica['tasa_bloqueo'] + peso * bloqueada
+            if exito:
+                previa = estadistica['latencia']
+                estadistica['latencia'] = latencia if previa is None else (1 - PESO_MEDICION) * previa + PESO_MEDICION * latencia
+            try:
+                self._guardar()
+            except OSError as e:
+                print(f"⚠️ No se pudieron guardar las estadísticas de estrategias: {e}")
+
+        if sin_resultados:
+            print(f"🚧 {estrategia} obtuvo una página sin resultados para {url}")
+        return exito
+
+    def resumen(self):
+        """
+        Devuelve una copia de las estadísticas por sitio y estrategia.
+        """
+        with self._lock:
+            return json.loads(json.dumps(self._cargar()))
+
+# Selector compartido por todo el proceso
+selector_estrategias = SelectorEstrategias()
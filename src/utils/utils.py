@@ -5,11 +5,25 @@ obtener User-Agents aleatorios, etc.
 """
 
 import requests
-import time
+import codecs
 import random
+import re
+import time
+import threading
 from datetime import datetime
-from bs4 import BeautifulSoup
-from src.config.config import DELAY_ENTRE_PETICIONES, TIMEOUT_PETICIONES, REINTENTOS_PETICIONES
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+from src.config.config import (
+    TIMEOUT_PETICIONES,
+    REINTENTOS_PETICIONES,
+    POOL_CONEXIONES,
+    POOL_MAX_TAMANO,
+    ESPERA_MAX_NAVEGADOR,
+    NAVEGADOR_POR_SITIO,
+    BLOQUEAR_RECURSOS,
+    CACHE_ACTIVADO,
+    TAMANO_TROZO_DESCARGA
+)
 
 # Lista de User-Agents para simular diferentes navegadores
 USER_AGENTS = [
@@ -49,79 +63,381 @@ def get_headers():
         'Cache-Control': 'max-age=0'
     }
 
-def fetch_page(url, use_selenium=False, use_playwright=False):
+# Sitios conocidos: todos los hosts de un mismo sitio comparten cookies
+SITIOS_CONOCIDOS = ['amazon', 'mercadolibre', 'newegg', 'bestbuy', 'aliexpress']
+
+# Pool de sesiones HTTP por host y cookies compartidas por sitio
+_sesiones = {}
+_cookies_por_sitio = {}
+_lock_sesiones = threading.Lock()
+
+def identificar_sitio(url):
+    """
+    Obtiene el sitio al que pertenece una URL (ej: 'amazon' para www.amazon.com.mx
+    y m.media-amazon.com). Si no es un sitio conocido, se usa el host completo.
+    
+    Args:
+        url (str): URL a identificar
+        
+    Returns:
+        str: Nombre del sitio o host
+    """
+    host = urlparse(url).netloc.lower()
+    for sitio in SITIOS_CONOCIDOS:
+        if sitio in host:
+            return sitio
+    return host
+
+def get_session(url):
+    """
+    Devuelve la sesión HTTP asociada al host de la URL, creándola si no existe.
+    Cada sesión mantiene un pool de conexiones keep-alive (se evita un handshake
+    TCP/TLS por petición) y comparte el cookie jar con los demás hosts del mismo sitio.
+    
+    Args:
+        url (str): URL a la que se realizará la petición
+        
+    Returns:
+        requests.Session: Sesión reutilizable para el host
+    """
+    host = urlparse(url).netloc.lower()
+    with _lock_sesiones:
+        session = _sesiones.get(host)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_CONEXIONES, pool_maxsize=POOL_MAX_TAMANO)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            sitio = identificar_sitio(url)
+            session.cookies = _cookies_por_sitio.setdefault(sitio, requests.cookies.RequestsCookieJar())
+            _sesiones[host] = session
+    return session
+
+def cerrar_sesiones():
+    """
+    Cierra todas las sesiones HTTP del pool y libera sus conexiones.
+    """
+    with _lock_sesiones:
+        for session in _sesiones.values():
+            session.close()
+        _sesiones.clear()
+        _cookies_por_sitio.clear()
+
+def requiere_navegador(url):
+    """
+    Indica si la URL pertenece a un sitio que solo entrega resultados con un navegador
+    y qué navegador usar (ver NAVEGADOR_POR_SITIO en la configuración).
+    
+    Args:
+        url (str): URL a consultar
+        
+    Returns:
+        str: 'selenium' o 'playwright' si la página requiere navegador, None en caso contrario
+    """
+    return NAVEGADOR_POR_SITIO.get(identificar_sitio(url))
+
+# La declaración de codificación (BOM o <meta charset>) debe estar al inicio del documento
+BYTES_DECLARACION = 2048
+
+PATRON_CHARSET_META = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([\w.:-]+)', re.IGNORECASE)
+PATRON_CHARSET_HEADER = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.IGNORECASE)
+
+BOMS = (
+    (codecs.BOM_UTF8, 'utf-8'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be')
+)
+
+def normalizar_codificacion(nombre):
+    """
+    Devuelve el nombre canónico de una codificación (ej: 'UTF8' -> 'utf-8'), o None si
+    Python no la conoce.
+    """
+    if not nombre:
+        return None
+    try:
+        return codecs.lookup(nombre).name
+    except LookupError:
+        return None
+
+def codificacion_documento(contenido):
+    """
+    Obtiene la codificación que declara el propio documento (BOM o <meta charset>),
+    revisando solo los primeros bytes.
+    
+    Args:
+        contenido (bytes | str): Contenido HTML
+        
+    Returns:
+        str: Nombre canónico de la codificación, o None si el documento no la declara
+    """
+    cabecera = contenido[:BYTES_DECLARACION]
+    if isinstance(cabecera, str):
+        cabecera = cabecera.encode('ascii', errors='ignore')
+    else:
+        cabecera = bytes(cabecera)
+    for bom, codificacion in BOMS:
+        if cabecera.startswith(bom):
+            return codificacion
+    meta = PATRON_CHARSET_META.search(cabecera)
+    return normalizar_codificacion(meta.group(1).decode('ascii')) if meta else None
+
+def codificacion_cabecera(content_type):
+    """
+    Obtiene la codificación que declara la cabecera Content-Type (ej: 'text/html; charset=ISO-8859-1').
+    
+    Returns:
+        str: Nombre canónico de la codificación, o None si la cabecera no la declara
+    """
+    charset = PATRON_CHARSET_HEADER.search(content_type or '')
+    return normalizar_codificacion(charset.group(1)) if charset else None
+
+def cuerpo_html(cuerpo, content_type=None):
+    """
+    Prepara el cuerpo de una respuesta HTTP para los parsers sin decodificarlo: los bytes
+    se entregan tal cual y el parser los decodifica con la codificación que declara el
+    documento (o UTF-8). Así se evita la detección de charset de requests y la copia a str.
+    
+    Args:
+        cuerpo (bytes): Cuerpo de la respuesta
+        content_type (str, opcional): Cabecera Content-Type de la respuesta
+        
+    Returns:
+        bytes | str: Los mismos bytes, o el texto ya decodificado en el caso poco común de que
+            el servidor declare una codificación distinta a la del documento (la cabecera manda)
+    """
+    declarada = codificacion_cabecera(content_type)
+    if declarada is None or declarada == (codificacion_documento(cuerpo) or 'utf-8'):
+        return cuerpo
+    return cuerpo.decode(declarada, errors='replace')
+
+def codificar_html(contenido):
+    """
+    Convierte el contenido HTML a bytes para guardarlo (caché o archivo). Los bytes se
+    guardan tal cual; el texto se codifica con la codificación que declara el documento
+    para que al leerlo se decodifique igual que una respuesta recién descargada.
+    
+    Args:
+        contenido (bytes | str): Contenido HTML
+        
+    Returns:
+        bytes: Contenido codificado
+    """
+    if isinstance(contenido, str):
+        return contenido.encode(codificacion_documento(contenido) or 'utf-8', errors='xmlcharrefreplace')
+    return bytes(contenido)
+
+def fetch_page(url, use_selenium=False, use_playwright=False, usar_cache=True):
     """
     Realiza una petición HTTP a la URL especificada y devuelve el contenido HTML.
+    La estrategia (requests, Playwright o Selenium) la decide el selector de estrategias según
+    lo que ha funcionado recientemente para el sitio; si la página llega sin resultados o es
+    una página de bloqueo se intenta con la siguiente estrategia más cara.
     
     Args:
         url (str): URL a la que se realizará la petición
         use_selenium (bool): Si es True, utiliza Selenium para cargar la página (útil para contenido dinámico)
         use_playwright (bool): Si es True, utiliza Playwright para cargar la página (alternativa a Selenium)
+        usar_cache (bool): Si es False, ignora la caché de respuestas y descarga la página
         
     Returns:
-        str: Contenido HTML de la página
+        bytes | str: Contenido HTML de la página (los bytes los decodifica el parser)
     """
-    # Usar Selenium por defecto solo para MercadoLibre
-    if 'mercadolibre' in url.lower() and not use_playwright:
-        use_selenium = True
-        
-    try:
-        # Primero intentar con requests para mayor velocidad
-        if not use_selenium and not use_playwright:
-            html = fetch_with_requests(url)
-            # Si obtenemos contenido y es una página de Amazon, verificar si contiene productos
-            if html and 'amazon' in url.lower():
-                soup = BeautifulSoup(html, 'html.parser')
-                # Verificar si hay resultados de búsqueda
-                if not soup.find_all('div', {'data-component-type': 's-search-result'}) and not soup.find_all('div', class_=lambda c: c and ('s-result-item' in c)):
-                    print("No se encontraron productos con requests, intentando con Selenium...")
-                    use_selenium = True
-                    return fetch_with_selenium(url)
+    from src.utils.strategy import selector_estrategias
+    from src.utils.block_detection import revisar_pagina
+    from src.utils.rate_limit import limitador_hosts
+    
+    if use_selenium:
+        estrategias = ['selenium']
+    elif use_playwright:
+        estrategias = ['playwright']
+    else:
+        estrategias = selector_estrategias.plan(url)
+    
+    html = ""
+    for indice, estrategia in enumerate(estrategias):
+        # Antes de pasar a otra estrategia se respeta el backoff del host
+        if indice and not limitador_hosts.esperar(url):
+            break
+        inicio = time.monotonic()
+        try:
+            html = fetch_con_estrategia(url, estrategia, usar_cache)
+        except Exception as e:
+            print(f"⚠️ Error al obtener la página {url} con {estrategia}: {e}")
+            html = ""
+        # Las páginas de bloqueo se detectan antes de parsear y no llegan al scraper
+        bloqueo = revisar_pagina(url, html, estrategia)
+        if selector_estrategias.registrar(url, estrategia, html, time.monotonic() - inicio, bloqueada=bool(bloqueo)):
             return html
-            
-        if use_selenium:
-            return fetch_with_selenium(url)
-        elif use_playwright:
-            return fetch_with_playwright(url)
-        else:
-            return fetch_with_requests(url)
-    except Exception as e:
-        print(f"⚠️ Error al obtener la página {url}: {e}")
-        return ""
+        descartar_de_cache(url, html, usar_cache)
+        if bloqueo:
+            html = ""
+    return html or ""
+
+def fetch_con_estrategia(url, estrategia, usar_cache=True):
+    """
+    Descarga una página con una estrategia concreta.
+    
+    Args:
+        url (str): URL a la que se realizará la petición
+        estrategia (str): 'requests', 'playwright' o 'selenium'
+        usar_cache (bool): Si es False, ignora la caché de respuestas
+        
+    Returns:
+        bytes | str: Contenido HTML de la página, o None si hubo un error
+    """
+    usar_cache = usar_cache and CACHE_ACTIVADO
+    if estrategia == 'requests':
+        # La caché se revalida dentro de fetch_with_requests
+        return fetch_with_requests(url, usar_cache=usar_cache)
+    
+    if usar_cache:
+        from src.utils.http_cache import cache_http
+        # Las páginas renderizadas no se pueden revalidar: solo se usa el TTL
+        entrada = cache_http.obtener(url, get_headers())
+        if entrada and entrada['fresca']:
+            print(f"📦 Usando respuesta en caché para {url}")
+            return entrada['cuerpo']
+    
+    html = fetch_with_selenium(url) if estrategia == 'selenium' else fetch_with_playwright(url)
+    if html and usar_cache:
+        cache_http.guardar(url, get_headers(), html)
+    return html
 
-def fetch_with_requests(url):
+def descartar_de_cache(url, html, usar_cache=True):
+    """
+    Elimina de la caché una página que llegó sin resultados, para que la siguiente
+    estrategia (o la siguiente corrida) no la reutilice.
+    """
+    if html and usar_cache and CACHE_ACTIVADO:
+        from src.utils.http_cache import cache_http
+        cache_http.eliminar(url, get_headers())
+
+def fetch_with_requests(url, usar_cache=True):
     """
     Realiza una petición HTTP usando la biblioteca requests.
+    Si la página está en caché y sigue fresca se devuelve sin descargarla; si expiró, se
+    revalida con ETag/Last-Modified y un 304 reutiliza el contenido guardado.
     
     Args:
         url (str): URL a la que realizar la petición
+        usar_cache (bool): Si es False, ignora la caché de respuestas
         
     Returns:
-        str: Contenido HTML de la página, o None si hubo un error
+        bytes | str: Contenido HTML de la página sin decodificar (ver cuerpo_html), o None si hubo un error
     """
     headers = get_headers()
+    session = get_session(url)
     
+    entrada = None
+    usar_cache = usar_cache and CACHE_ACTIVADO
+    if usar_cache:
+        from src.utils.http_cache import cache_http, cabeceras_revalidacion
+        entrada = cache_http.obtener(url, headers)
+        if entrada and entrada['fresca']:
+            print(f"📦 Usando respuesta en caché para {url}")
+            return entrada['cuerpo']
+        headers.update(cabeceras_revalidacion(entrada))
+    
+    from src.utils.rate_limit import limitador_hosts
+    from src.utils.proxy_pool import pool_proxies, ESTADOS_FALLO_PROXY
     for intento in range(REINTENTOS_PETICIONES):
+        # Esperar el turno del host (cubeta de tokens, Retry-After y backoff tras fallos)
+        if not limitador_hosts.esperar(url):
+            break
         try:
-            response = requests.get(url, headers=headers, timeout=TIMEOUT_PETICIONES)
+            with pool_proxies.usar(url) as reserva:
+                proxies = {'http': reserva['proxy'], 'https': reserva['proxy']} if reserva['proxy'] else None
+                response = session.get(url, headers=headers, timeout=TIMEOUT_PETICIONES, proxies=proxies)
+                reserva['exito'] = response.status_code not in ESTADOS_FALLO_PROXY
+            limitador_hosts.registrar_respuesta(url, response.status_code, response.headers)
             
-            if response.status_code == 200:
-                return response.text
+            if response.status_code == 304 and entrada:
+                print(f"📦 Página sin cambios (304), usando caché para {url}")
+                cache_http.renovar(entrada)
+                return entrada['cuerpo']
+            elif response.status_code == 200:
+                html = cuerpo_html(response.content, response.headers.get('Content-Type'))
+                if usar_cache:
+                    cache_http.guardar(
+                        url, headers, html,
+                        response.headers.get('ETag'), response.headers.get('Last-Modified')
+                    )
+                return html
             else:
                 print(f"⚠️ Error al obtener la página {url}: Código {response.status_code}")
                 
         except requests.RequestException as e:
+            limitador_hosts.registrar_fallo(url)
             print(f"⚠️ Error al realizar la petición a {url}: {e}")
-        
-        # Esperar antes de reintentar
-        if intento < REINTENTOS_PETICIONES - 1:
-            time.sleep(DELAY_ENTRE_PETICIONES * (intento + 1))  # Backoff exponencial
     
     return None
 
+def fetch_por_trozos(url, usar_cache=True):
+    """
+    Descarga una página con requests entregando el cuerpo por trozos a medida que llega, para
+    que el parser incremental procese los productos sin esperar la página completa (ver
+    scrape_incremental). Si el consumidor cierra el generador (ya tiene lo que necesita) se
+    cierra la conexión y la descarga se corta.
+    
+    Una página fresca en la caché se entrega completa como un solo trozo. Las descargas por
+    trozos no se reintentan ni se guardan en la caché, porque pueden cortarse antes del final.
+    
+    Args:
+        url (str): URL a la que realizar la petición
+        usar_cache (bool): Si es False, ignora la caché de respuestas
+        
+    Yields:
+        bytes | str: Trozos del cuerpo sin decodificar, o ya decodificados si el servidor
+            declara una codificación distinta a la del documento (ver cuerpo_html)
+    """
+    headers = get_headers()
+    if usar_cache and CACHE_ACTIVADO:
+        from src.utils.http_cache import cache_http
+        entrada = cache_http.obtener(url, headers)
+        if entrada and entrada['fresca']:
+            print(f"📦 Usando respuesta en caché para {url}")
+            yield entrada['cuerpo']
+            return
+    
+    from src.utils.rate_limit import limitador_hosts
+    from src.utils.proxy_pool import pool_proxies, ESTADOS_FALLO_PROXY
+    if not limitador_hosts.esperar(url):
+        return
+    try:
+        with pool_proxies.usar(url) as reserva:
+            proxies = {'http': reserva['proxy'], 'https': reserva['proxy']} if reserva['proxy'] else None
+            response = get_session(url).get(url, headers=headers, timeout=TIMEOUT_PETICIONES, proxies=proxies, stream=True)
+            reserva['exito'] = response.status_code not in ESTADOS_FALLO_PROXY
+    except requests.RequestException as e:
+        limitador_hosts.registrar_fallo(url)
+        print(f"⚠️ Error al realizar la petición a {url}: {e}")
+        return
+    limitador_hosts.registrar_respuesta(url, response.status_code, response.headers)
+    
+    with response:
+        if response.status_code != 200:
+            print(f"⚠️ Error al obtener la página {url}: Código {response.status_code}")
+            return
+        declarada = codificacion_cabecera(response.headers.get('Content-Type'))
+        decodificador = None
+        try:
+            for indice, trozo in enumerate(response.iter_content(TAMANO_TROZO_DESCARGA)):
+                if not indice and declarada and declarada != (codificacion_documento(trozo) or 'utf-8'):
+                    # La cabecera manda: se decodifica por trozos sin partir caracteres
+                    decodificador = codecs.getincrementaldecoder(declarada)(errors='replace')
+                yield decodificador.decode(trozo) if decodificador else trozo
+            if decodificador:
+                resto = decodificador.decode(b'', final=True)
+                if resto:
+                    yield resto
+        except requests.RequestException as e:
+            print(f"⚠️ Descarga de {url} interrumpida: {e}")
+
 def fetch_with_selenium(url):
     """
     Realiza una petición HTTP usando Selenium para cargar páginas dinámicas.
+    El navegador se toma prestado del pool compartido en lugar de lanzarse por cada URL.
     
     Args:
         url (str): URL a la que realizar la petición
@@ -129,44 +445,45 @@ def fetch_with_selenium(url):
     Returns:
         str: Contenido HTML de la página, o None si hubo un error
     """
+    from src.utils.rate_limit import limitador_hosts, es_error_conexion
+    
     try:
-        from selenium import webdriver
-        from selenium.webdriver.chrome.options import Options
-        from selenium.webdriver.chrome.service import Service
-        from webdriver_manager.chrome import ChromeDriverManager
-        
-        # Configurar opciones de Chrome
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument(f"user-agent={get_random_user_agent()}")
-        
-        # Iniciar el navegador
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=chrome_options)
-        
-        # Cargar la página
-        driver.get(url)
+        from selenium.webdriver.support.ui import WebDriverWait
+        from src.utils.browser_pool import pool_selenium
         
-        # Esperar a que la página cargue completamente
-        time.sleep(5)
+        from src.utils.resource_blocking import aplicar_bloqueo_selenium, estadisticas_selenium
+        from src.utils.proxy_pool import pool_proxies
         
-        # Obtener el HTML
-        html_content = driver.page_source
-        
-        # Cerrar el navegador
-        driver.quit()
-        
-        return html_content
+        with pool_proxies.usar(url) as reserva, pool_selenium.navegador(reserva['proxy']) as driver:
+            # Bloquear imágenes, fuentes y rastreadores que el parser no necesita
+            if BLOQUEAR_RECURSOS:
+                aplicar_bloqueo_selenium(driver, url)
+            
+            # Cargar la página
+            driver.get(url)
+            
+            # Esperar a que la página termine de cargar (en lugar de una espera fija)
+            WebDriverWait(driver, ESPERA_MAX_NAVEGADOR).until(
+                lambda d: d.execute_script("return document.readyState") == "complete"
+            )
+            
+            if BLOQUEAR_RECURSOS:
+                estadisticas_selenium(driver).reportar(url)
+            
+            # Obtener el HTML (el éxito se registra al revisar el contenido)
+            return driver.page_source
     
     except Exception as e:
+        if es_error_conexion(e):
+            limitador_hosts.registrar_fallo(url)
         print(f"⚠️ Error al usar Selenium para {url}: {e}")
         return None
 
 def fetch_with_playwright(url):
     """
     Realiza una petición HTTP usando Playwright para cargar páginas dinámicas.
+    La página se renderiza como una pestaña del navegador compartido, esperando la
+    condición configurada para el sitio en ESPERA_RENDER_POR_SITIO.
     
     Args:
         url (str): URL a la que realizar la petición
@@ -175,31 +492,9 @@ def fetch_with_playwright(url):
         str: Contenido HTML de la página, o None si hubo un error
     """
     try:
-        from playwright.sync_api import sync_playwright
+        from src.utils.playwright_renderer import renderizador_playwright
         
-        with sync_playwright() as p:
-            # Lanzar navegador
-            browser = p.chromium.launch(headless=True)
-            
-            # Crear contexto con User-Agent personalizado
-            context = browser.new_context(
-                user_agent=get_random_user_agent(),
-                viewport={"width": 1920, "height": 1080}
-            )
-            
-            # Crear página
-            page = context.new_page()
-            
-            # Navegar a la URL
-            page.goto(url, wait_until="networkidle")
-            
-            # Obtener el HTML
-            html_content = page.content()
-            
-            # Cerrar navegador
-            browser.close()
-            
-            return html_content
+        return renderizador_playwright.renderizar(url)
     
     except Exception as e:
         print(f"⚠️ Error al usar Playwright para {url}: {e}")